@@ -0,0 +1,52 @@
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from backend.constants import DRIVE_CHUNK_SIZE
+from backend.utils.file_io import iter_csv_rows
+
+class FakeDriveClient:
+    """In-memory stand-in for GoogleAPIClient's Drive methods, for running ingestion offline.
+
+    Files are served from memory in DRIVE_CHUNK_SIZE chunks with the metadata fields
+    ProcessTransactionData and DriveDownloadCache rely on, so downloads, caching and
+    manifest records take the same code paths as with Drive.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, bytes] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+
+    def add_file(self, file_id: str, content: bytes, name: Optional[str] = None) -> str:
+        """Stores a file under a Drive file ID, replacing it (as a new revision) if it already exists."""
+        with self._lock:
+            revision = int(self._metadata.get(file_id, {}).get('headRevisionId', '0')) + 1
+            self._files[file_id] = content
+            self._metadata[file_id] = {
+                'id': file_id,
+                'name': name or f'{file_id}.csv',
+                'md5Checksum': hashlib.md5(content).hexdigest(),
+                'modifiedTime': datetime.now(timezone.utc).isoformat(),
+                'headRevisionId': str(revision),
+                'size': str(len(content)),
+            }
+        return file_id
+
+    def get_drive_file_metadata(self, file_id: str, fields: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        metadata = self._metadata.get(file_id)
+        if metadata is None or not fields:
+            return dict(metadata) if metadata is not None else None
+        return {field: metadata[field] for field in fields.split(',') if field in metadata}
+
+    def get_drive_file(self, file_id: str) -> str:
+        return self._files[file_id].decode('utf-8')
+
+    def iter_drive_file_chunks(self, file_id: str, chunksize: int = DRIVE_CHUNK_SIZE) -> Iterator[bytes]:
+        content = self._files[file_id]
+        for start in range(0, len(content), chunksize):
+            yield content[start:start + chunksize]
+
+    def iter_drive_file_rows(self, file_id: str, chunksize: int = DRIVE_CHUNK_SIZE) -> Iterator[Dict[str, str]]:
+        return iter_csv_rows(self.iter_drive_file_chunks(file_id, chunksize))
@@ -0,0 +1,219 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.benchmarks.fake_drive import FakeDriveClient
+from backend.benchmarks.synthetic import START_DATE, benchmark_instruments, generate_export, instrument_account
+from backend.constants import BENCHMARK_RESULTS_DIR
+from backend.database.download_cache import DriveDownloadCache
+from backend.database.manifest import ProcessedFilesManifest
+from backend.database.quarantine import QuarantineStore
+from backend.database.rollups import TransactionRollups
+from backend.database.storage import TransactionStorage
+from backend.models.instruments import INSTRUMENT_TYPES
+from backend.process_transaction_data import ProcessTransactionData
+from backend.services.instruments.classifier import TransactionClassifier
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+from backend.utils.metrics import StageMetrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+STAGES = ('download', 'parse', 'normalize', 'validate', 'dedupe', 'persist', 'merge', 'range_load', 'rollup_query')
+REGRESSION_THRESHOLD = 0.10  # Relative slowdown reported as a regression by compare.
+MIN_COMPARED_SECONDS = 0.005  # Stages faster than this in both runs are too noisy to compare.
+
+def run_case(instrument_type: INSTRUMENT_TYPES, rows: int, seed: int = 0) -> Dict[str, Any]:
+    """Ingests a synthetic export of an instrument end to end and times each stage.
+
+    A first export of `rows` transactions is downloaded from a fake Drive, parsed,
+    normalized, validated, deduped and persisted. A second export overlapping the last half of
+    the first (as a re-downloaded statement would) is then merged into it. Finally a
+    one-year range is loaded back from storage and the monthly rollups are queried,
+    both through fresh objects so nothing is served from memory.
+
+    Returns:
+        Dict[str, Any]: rows, seconds per stage and the process's peak RSS (MB) after each stage.
+    """
+    account_owner, account_type, account = instrument_account(instrument_type)
+    schema = INSTRUMENT_CLASSES[account_type].SCHEMA
+    export = generate_export(instrument_type, rows + rows // 2, seed)
+    drive = FakeDriveClient()
+    first = drive.add_file('export-1', export.to_csv(0, rows), f'{account}-1.csv')
+    second = drive.add_file('export-2', export.to_csv(rows // 2), f'{account}-2.csv')
+    del export
+
+    seconds: Dict[str, float] = {}
+    peak_rss_mb: Dict[str, Optional[float]] = {}
+    with tempfile.TemporaryDirectory() as root:
+        storage = TransactionStorage(os.path.join(root, 'instrument_data'))
+        metrics = StageMetrics()
+        pipeline = ProcessTransactionData(
+            client=drive,
+            manifest=ProcessedFilesManifest(os.path.join(root, 'process_history.csv')),
+            storage=storage,
+            download_cache=DriveDownloadCache(os.path.join(root, 'drive_cache')),
+            classifier=TransactionClassifier(storage, os.path.join(root, 'classifier.npz')),
+            metrics=metrics,
+            quarantine=QuarantineStore(os.path.join(root, 'quarantine'))
+        )
+
+        data = pipeline.process_file((account_owner, account_type, first))
+        peak_rss_mb['normalize'] = _peak_rss_mb()
+        pipeline._add_transaction_data(account_type, data, first)
+        peak_rss_mb['dedupe'] = _peak_rss_mb()
+        with metrics.span('persist', first):
+            pipeline.instruments[account_type].sync_transaction_data()
+        peak_rss_mb['persist'] = _peak_rss_mb()
+        seconds.update(metrics.file_timings(first))
+
+        data = pipeline.process_file((account_owner, account_type, second))
+        pipeline._add_transaction_data(account_type, data, second)
+        seconds['merge'] = metrics.file_timings(second)['dedupe']
+        pipeline.instruments[account_type].sync_transaction_data()
+        peak_rss_mb['merge'] = _peak_rss_mb()
+        del pipeline, data
+
+        date_start = START_DATE + timedelta(days=365)
+        start = time.perf_counter()
+        loaded = TransactionStorage(storage.root).load(account_type, schema, date_start, date_start + timedelta(days=364))
+        seconds['range_load'] = time.perf_counter() - start
+        peak_rss_mb['range_load'] = _peak_rss_mb()
+
+        start = time.perf_counter()
+        TransactionRollups(storage).totals(account_type, schema, 'month')
+        seconds['rollup_query'] = time.perf_counter() - start
+        peak_rss_mb['rollup_query'] = _peak_rss_mb()
+
+    return {
+        'rows': rows,
+        'range_rows': len(loaded),
+        'seconds': {stage: seconds[stage] for stage in STAGES if stage in seconds},
+        'peak_rss_mb': peak_rss_mb,
+    }
+
+def run_benchmarks(
+    instruments: Sequence[INSTRUMENT_TYPES],
+    sizes: Sequence[str],
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Runs every (instrument, size) case, each in a fresh process so peak memory is per case."""
+    context = multiprocessing.get_context('spawn')
+    cases = {}
+    for instrument_type in instruments:
+        for size in sizes:
+            with context.Pool(1) as pool:
+                case = pool.apply(run_case, (instrument_type, SIZES[size], seed))
+            cases[f'{instrument_type}/{size}'] = case
+            total = sum(case['seconds'].values())
+            print(f"{instrument_type}/{size}: {total:.3f}s, peak {max(filter(None, case['peak_rss_mb'].values()), default=0):.0f} MB", flush=True)
+    return {
+        'commit': _git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f'{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs',
+        'seed': seed,
+        'cases': cases,
+    }
+
+def save_results(results: Dict[str, Any], directory: str = BENCHMARK_RESULTS_DIR) -> str:
+    """Writes a run's results as ingestion-<commit>.json, so runs of different commits sit side by side."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"ingestion-{results['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def compare_results(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float = REGRESSION_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """Compares the stage timings of the cases two runs have in common.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per (case, stage) with both timings, their
+        ratio and whether it is a regression beyond the threshold.
+    """
+    rows = []
+    for case in sorted(base['cases'].keys() & new['cases'].keys()):
+        base_seconds, new_seconds = base['cases'][case]['seconds'], new['cases'][case]['seconds']
+        for stage in STAGES:
+            if stage not in base_seconds or stage not in new_seconds:
+                continue
+            before, after = base_seconds[stage], new_seconds[stage]
+            ratio = after / before if before else float('inf')
+            compared = max(before, after) >= MIN_COMPARED_SECONDS
+            rows.append({
+                'case': case,
+                'stage': stage,
+                'base': before,
+                'new': after,
+                'ratio': ratio,
+                'regression': compared and ratio > 1 + threshold,
+            })
+    return rows
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _git_commit() -> str:
+    try:
+        repo = os.path.dirname(os.path.abspath(__file__))
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs or compares ingestion benchmarks: python -m backend.benchmarks.ingestion {run,compare} ..."""
+    parser = argparse.ArgumentParser(description="Benchmark ingestion on synthetic bank exports.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Run the benchmarks and store the results.")
+    run.add_argument('--instruments', nargs='+', choices=benchmark_instruments(), default=benchmark_instruments())
+    run.add_argument('--sizes', nargs='+', choices=sorted(SIZES), default=list(SIZES))
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--output', default=BENCHMARK_RESULTS_DIR, help="Directory the results are written to.")
+    compare = commands.add_parser('compare', help="Diff the timings of two stored runs.")
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.instruments, args.sizes, args.seed)
+        print(f"Results written to {save_results(results, args.output)}")
+        return 0
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+    rows = compare_results(base, new, args.threshold)
+    print(f"{base['commit']} -> {new['commit']}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['case']:<28} {row['stage']:<13} {row['base']:>9.4f}s {row['new']:>9.4f}s {row['ratio']:>6.2f}x{flag}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
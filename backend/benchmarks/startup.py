@@ -0,0 +1,52 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence
+
+# Libraries that must not be loaded just to start the server and answer /health.
+HEAVY_MODULES = ('cv2', 'pymupdf', 'pytesseract', 'googleapiclient', 'gspread', 'google_auth_oauthlib')
+
+# Runs in a fresh interpreter, so every measurement is a cold start.
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from backend.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    response = client.get("/health")
+    answered = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "first_request": answered - ready,
+    "status": response.status_code,
+    "heavy_modules": sorted(name for name in %r if name in sys.modules),
+}))
+''' % (HEAVY_MODULES,)
+
+def measure_startup() -> Dict[str, object]:
+    """Imports the app and serves one /health request in a new interpreter, returning the timings in seconds."""
+    output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Reports cold-start latency: python -m backend.benchmarks.startup [--runs N]"""
+    parser = argparse.ArgumentParser(description="Measure the backend's cold import and first-request latency.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.0, help="Fail if the median import + first request exceeds this many seconds.")
+    args = parser.parse_args(argv)
+
+    runs: List[Dict[str, object]] = [measure_startup() for _ in range(args.runs)]
+    import_time = statistics.median(run['import'] for run in runs)
+    first_request = statistics.median(run['first_request'] for run in runs)
+    heavy = sorted({name for run in runs for name in run['heavy_modules']})
+    print(f"import backend.main: {import_time * 1000:.0f} ms (median of {len(runs)})")
+    print(f"first /health request: {first_request * 1000:.1f} ms")
+    print(f"heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    return 1 if heavy or import_time + first_request > args.budget else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+from datetime import date
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.constants import ACCOUNT_INSTRUMENTS, SUB_ACCOUNT_INSTRUMENTS
+from backend.models.instruments import ACCOUNT_OWNERS, ACCOUNT_TYPES, INSTRUMENT_TYPES
+
+#### Synthetic bank exports. ####
+# Deterministic stand-ins for the raw CSV exports of every instrument with a defined
+# export schema (see backend/models/instruments.py). Headers match the banks' own, so
+# the files go through the same parsing and batch transforms as real uploads.
+
+START_DATE = date(2021, 1, 1)
+SPAN_DAYS = 3 * 365  # Every export covers three years, however many rows it has.
+MERCHANTS = (
+    'WAL-MART', 'COSTCO WHSE', 'SMITHS FOOD', 'HARMONS', 'CHEVRON', 'MAVERIK', 'SHELL OIL', 'AMZN MKTP US',
+    'TARGET', 'UBER TRIP', 'UBER EATS', 'CHICK-FIL-A', 'CAFE RIO', 'CRUMBL COOKIES', 'NETFLIX.COM', 'SPOTIFY',
+    'ROCKY MTN POWER', 'DOMINION ENERGY', 'VERIZON WIRELESS', 'VASA FITNESS', 'WALGREENS', 'HOME DEPOT',
+    'PAYROLL DEPOSIT', 'VENMO PAYMENT', 'ZELLE TRANSFER', 'INTEREST PAYMENT',
+)
+BANK_CATEGORIES = (
+    'Groceries', 'Gasoline', 'Restaurants', 'Shopping', 'Utilities', 'Entertainment', 'Health', 'Transfer', 'Income',
+)
+TICKERS = ('VTI', 'VOO', 'QQQ', 'AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'SCHD', 'VXUS')
+CRYPTO_TICKERS = ('BTC', 'ETH', 'SOL', 'DOGE')
+
+class SyntheticExport(NamedTuple):
+    """A generated export: its CSV header and one CSV line per transaction, in date order."""
+
+    instrument_type: INSTRUMENT_TYPES
+    header: str
+    lines: np.ndarray  # str
+
+    def to_csv(self, start: int = 0, stop: Optional[int] = None) -> bytes:
+        """Encodes lines[start:stop] as a CSV file, so overlapping exports can be cut from one generated history."""
+        return ('\n'.join([self.header] + self.lines[start:stop].tolist()) + '\n').encode('utf-8')
+
+def _dates(rng: np.random.Generator, rows: int, date_format: str) -> np.ndarray:
+    """Returns sorted dates over SPAN_DAYS, formatted 'iso' (YYYY-MM-DD) or 'us' (MM/DD/YYYY)."""
+    dates = np.datetime64(START_DATE, 'D') + np.sort(rng.integers(0, SPAN_DAYS, rows))
+    if date_format == 'iso':
+        return dates.astype(str)
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    parts = (
+        (months - years.astype('datetime64[M]')).astype(np.int64) + 1,
+        (dates - months.astype('datetime64[D]')).astype(np.int64) + 1,
+        years.astype(np.int64) + 1970,
+    )
+    month, day, year = (np.char.zfill(part.astype(str), width) for part, width in zip(parts, (2, 2, 4)))
+    return np.char.add(np.char.add(np.char.add(np.char.add(month, '/'), day), '/'), year)
+
+def _money(values: np.ndarray) -> np.ndarray:
+    return np.char.mod('%.2f', values)
+
+def _blank_where(values: np.ndarray, blank: np.ndarray) -> np.ndarray:
+    return np.where(blank, '', values)
+
+def _descriptions(rng: np.random.Generator, rows: int) -> np.ndarray:
+    merchants = np.array(MERCHANTS)[rng.integers(0, len(MERCHANTS), rows)]
+    return np.char.add(np.char.add(merchants, ' #'), rng.integers(100, 1000, rows).astype(str))
+
+def _cash_amounts(rng: np.random.Generator, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns (is_credit, absolute amount): mostly small card purchases, a few larger deposits."""
+    is_credit = rng.random(rows) < 0.15
+    amount = np.round(np.where(is_credit, rng.lognormal(6.5, 0.8, rows), rng.lognormal(3.2, 1.0, rows)), 2)
+    return is_credit, np.maximum(amount, 0.01)
+
+def _discover(rng: np.random.Generator, rows: int) -> Dict[str, np.ndarray]:
+    is_credit, amount = _cash_amounts(rng, rows)
+    return {
+        'Transaction Date': _dates(rng, rows, 'us'),
+        'Transaciton Description': _descriptions(rng, rows),
+        'Transaction Type': np.where(is_credit, 'Deposit', 'Debit'),
+        'Debit': _blank_where(_money(amount), is_credit),
+        'Credit': _blank_where(_money(amount), ~is_credit),
+        'Balance': _money(5000 + np.cumsum(np.where(is_credit, amount, -amount))),
+    }
+
+def _uccu(rng: np.random.Generator, rows: int) -> Dict[str, np.ndarray]:
+    is_credit, amount = _cash_amounts(rng, rows)
+    return {
+        'Account Number': np.full(rows, '******4821'),
+        'Post Date': _dates(rng, rows, 'us'),
+        'Check': _blank_where(rng.integers(1000, 9999, rows).astype(str), rng.random(rows) > 0.01),
+        'Description': _descriptions(rng, rows),
+        'Debit': _blank_where(_money(-amount), is_credit),
+        'Credit': _blank_where(_money(amount), ~is_credit),
+        'Status': np.where(rng.random(rows) < 0.03, 'Pending', 'Posted'),
+        'Balance': _money(5000 + np.cumsum(np.where(is_credit, amount, -amount))),
+        'Classification': np.array(BANK_CATEGORIES)[rng.integers(0, len(BANK_CATEGORIES), rows)],
+    }
+
+def _usaa(rng: np.random.Generator, rows: int) -> Dict[str, np.ndarray]:
+    is_credit, amount = _cash_amounts(rng, rows)
+    descriptions = _descriptions(rng, rows)
+    return {
+        'Date': _dates(rng, rows, 'iso'),
+        'Description': np.char.title(descriptions),
+        'Original Description': descriptions,
+        'Category': np.array(BANK_CATEGORIES)[rng.integers(0, len(BANK_CATEGORIES), rows)],
+        'Amount': _money(np.where(is_credit, amount, -amount)),
+        'Status': np.where(rng.random(rows) < 0.03, 'Pending', 'Posted'),
+    }
+
+def _robinhood_brokerage(rng: np.random.Generator, rows: int) -> Dict[str, np.ndarray]:
+    codes = np.array(['Buy', 'Sell', 'CDIV', 'ACH'])[rng.choice(4, rows, p=[0.55, 0.15, 0.2, 0.1])]
+    tickers = np.array(TICKERS)[rng.integers(0, len(TICKERS), rows)]
+    is_trade = np.isin(codes, ['Buy', 'Sell'])
+    quantity = np.round(rng.lognormal(0.5, 1.0, rows), 6)
+    price = np.round(rng.uniform(20, 600, rows), 2)
+    amount = np.where(is_trade, np.round(quantity * price, 2), np.round(rng.lognormal(4, 1, rows), 2))
+    is_credit = np.isin(codes, ['Sell', 'CDIV']) | ((codes == 'ACH') & (rng.random(rows) < 0.8))
+    return {
+        'Description': np.where(is_trade, np.char.add(tickers, ' market order'), np.where(codes == 'ACH', 'ACH Deposit', 'Cash Div')),
+        'Symbol': _blank_where(tickers, codes == 'ACH'),
+        'Acct Type': np.full(rows, 'Cash'),
+        'Transaction': codes,
+        'Date': _dates(rng, rows, 'us'),
+        'Qty': _blank_where(np.char.mod('%.6f', quantity), ~is_trade),
+        'Price': _blank_where(_money(price), ~is_trade),
+        'Debit': _blank_where(np.char.add('$', _money(amount)), is_credit),
+        'Credit': _blank_where(np.char.add('$', _money(amount)), ~is_credit),
+    }
+
+def _robinhood_crypto(rng: np.random.Generator, rows: int) -> Dict[str, np.ndarray]:
+    is_buy = rng.random(rows) < 0.7
+    tickers = np.array(CRYPTO_TICKERS)[rng.integers(0, len(CRYPTO_TICKERS), rows)]
+    quantity = np.char.add(np.char.add(np.char.mod('%.8f', np.round(rng.lognormal(-2, 1.5, rows), 8)), ' '), tickers)
+    price = np.round(rng.uniform(0.05, 60000, rows), 2)
+    value = np.round(rng.lognormal(4, 1, rows), 2)
+    return {
+        'Date': _dates(rng, rows, 'iso'),
+        'Transaction Type': np.where(is_buy, 'Buy', 'Sell'),
+        'Debit': _blank_where(quantity, is_buy),
+        'Credit': _blank_where(quantity, ~is_buy),
+        'Price': _money(price),
+        'Value': _money(value),
+        'Fee': _money(np.round(value * 0.005, 2)),
+    }
+
+GENERATOR_FUNC = Callable[[np.random.Generator, int], Dict[str, np.ndarray]]
+
+# ChaseCredit has no export schema yet, so it has no generator.
+SYNTHETIC_GENERATORS: Dict[INSTRUMENT_TYPES, GENERATOR_FUNC] = {
+    'discover_checking': _discover,
+    'discover_credit': _discover,
+    'discover_savings': _discover,
+    'robinhood_crypto': _robinhood_crypto,
+    'robinhood_investing': _robinhood_brokerage,
+    'robinhood_IRA': _robinhood_brokerage,
+    'UCCU_checking': _uccu,
+    'UCCU_credit': _uccu,
+    'UCCU_savings': _uccu,
+    'USAA_checking': _usaa,
+    'USAA_credit': _usaa,
+    'USAA_savings': _usaa,
+}
+
+def generate_export(instrument_type: INSTRUMENT_TYPES, rows: int, seed: int = 0) -> SyntheticExport:
+    """Generates a raw export of an instrument; the same arguments always produce the same bytes."""
+    # Seeding with the instrument name keeps e.g. USAA checking and savings exports distinct.
+    rng = np.random.default_rng([seed, *instrument_type.encode('utf-8')])
+    columns = SYNTHETIC_GENERATORS[instrument_type](rng, rows)
+    lines = None
+    for values in columns.values():
+        lines = values.astype(str) if lines is None else np.char.add(np.char.add(lines, ','), values)
+    return SyntheticExport(instrument_type, ','.join(columns), lines if lines is not None else np.empty(0, dtype=str))
+
+def _routed_accounts() -> Iterator[Tuple[ACCOUNT_OWNERS, ACCOUNT_TYPES, INSTRUMENT_TYPES, str]]:
+    """Yields every (account owner, account type, instrument, normalized account) uploads are routed to."""
+    for (account_owner, account_type), (instrument, account) in ACCOUNT_INSTRUMENTS.items():
+        yield account_owner, account_type, instrument, account
+    for (account_owner, account_type), sub_accounts in SUB_ACCOUNT_INSTRUMENTS.items():
+        for instrument, account in sub_accounts.values():
+            yield account_owner, account_type, instrument, account
+
+def instrument_account(instrument_type: INSTRUMENT_TYPES) -> Tuple[ACCOUNT_OWNERS, ACCOUNT_TYPES, str]:
+    """Returns the first (account owner, account type) and normalized account an instrument is uploaded for.
+
+    Sub-accounts are named in the uploaded file's name, so exports named after the
+    normalized account (e.g. foster_credit_UCCU-1.csv) are routed to it.
+    """
+    for account_owner, account_type, instrument, account in _routed_accounts():
+        if instrument == instrument_type:
+            return account_owner, account_type, account
+    raise KeyError(f"No account uploads {instrument_type} exports.")
+
+def benchmark_instruments() -> List[INSTRUMENT_TYPES]:
+    """Returns the instruments that both have a generator and are routed to an account."""
+    routed = {instrument for _, _, instrument, _ in _routed_accounts()}
+    return [instrument for instrument in SYNTHETIC_GENERATORS if instrument in routed]
@@ -0,0 +1,92 @@
+import os
+from typing import Dict, Tuple
+
+from backend.models.instruments import ACCOUNT_OWNERS, ACCOUNT_TYPES, INSTRUMENT_TYPES
+
+#### Uploaded account routing. ####
+# Maps an uploaded (account owner, account type) to the instrument that exported the
+# file and the normalized account its transactions belong to (see accounts.txt).
+# Owners with several accounts of a type are listed in SUB_ACCOUNT_INSTRUMENTS instead.
+ACCOUNT_INSTRUMENTS: Dict[Tuple[ACCOUNT_OWNERS, ACCOUNT_TYPES], Tuple[INSTRUMENT_TYPES, str]] = {
+    ('Foster', 'checking'): ('UCCU_checking', 'foster_checking'),
+    ('Foster', 'savings'): ('UCCU_savings', 'foster_savings'),
+    ('Foster', 'crypto'): ('robinhood_crypto', 'foster_crypto'),
+    ('Foster', 'investing'): ('robinhood_investing', 'foster_investing'),
+    ('Natalia', 'checking'): ('USAA_checking', 'natalia_checking'),
+    ('Natalia', 'credit'): ('USAA_credit', 'natalia_credit'),
+    ('Natalia', 'savings'): ('USAA_savings', 'natalia_savings'),
+    ('Natalia', 'crypto'): ('robinhood_crypto', 'natalia_crypto'),
+    ('Natalia', 'investing'): ('robinhood_investing', 'natalia_investing'),
+    ('shared', 'checking'): ('discover_checking', 'shared_checking'),
+    ('shared', 'credit'): ('discover_credit', 'shared_credit'),
+    ('shared', 'savings'): ('discover_savings', 'shared_savings'),
+    ('shared', 'investing'): ('robinhood_investing', 'shared_investing'),
+}
+# (account owner, account type) pairs with several accounts. An upload names its account
+# with one of these keywords in its file name (e.g. foster_ira_roth_01-01-2025_to_02-01-2025.csv)
+# or, in the local inbox, its folder (e.g. Foster/IRA/roth/); a file name word matches a
+# keyword it starts with, so 'rothira' matches 'roth'.
+SUB_ACCOUNT_INSTRUMENTS: Dict[Tuple[ACCOUNT_OWNERS, ACCOUNT_TYPES], Dict[str, Tuple[INSTRUMENT_TYPES, str]]] = {
+    ('Foster', 'credit'): {
+        'uccu': ('UCCU_credit', 'foster_credit_UCCU'),
+        'chase': ('chase_credit', 'foster_credit_chase'),
+    },
+    ('Foster', 'IRA'): {
+        'roth': ('robinhood_IRA', 'foster_rothIRA'),
+        'traditional': ('robinhood_IRA', 'foster_traditionalIRA'),
+    },
+    ('Natalia', 'IRA'): {
+        'roth': ('robinhood_IRA', 'natalia_rothIRA'),
+        'traditional': ('robinhood_IRA', 'natalia_traditionalIRA'),
+    },
+}
+
+#### Ingestion tuning. ####
+DRIVE_CHUNK_SIZE = 1024 * 1024  # Bytes requested per MediaIoBaseDownload.next_chunk call.
+NORMALIZE_BATCH_SIZE = 50_000  # Parsed rows held in memory before being normalized.
+DRIVE_METADATA_FIELDS = 'id,name,md5Checksum,modifiedTime,headRevisionId,size'
+DRIVE_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Downloaded Drive files kept on disk before LRU eviction.
+
+#### Transaction queries. ####
+QUERY_CACHED_MONTHS = 240  # Instrument months kept in memory, sorted, for paginated API queries.
+
+#### Google Form transaction uploads. ####
+# Response sheet of the NumiFocus Transaction Data form; columns are Timestamp, Account
+# Owner, Account Type and the uploaded file's Drive link(s).
+UPLOADS_SHEET_KEY = os.environ.get('UPLOADS_SHEET_KEY')
+UPLOADS_WORKSHEET = os.environ.get('UPLOADS_WORKSHEET', 'Form Responses 1')
+UPLOADS_FIRST_ROW = 2  # Row 1 holds the form's question titles.
+UPLOADS_LAST_COLUMN = 'D'
+
+#### Logging. ####
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # 'text' (Rich console) or 'json' (one object per line).
+LOG_FILE_PATH = os.environ.get('LOG_FILE', 'app_debug.log')
+
+#### OCR. ####
+OCR_MAX_DIMENSION = 2000  # Longest image side, in pixels, kept before OCR.
+TESSERACT_CONFIG = '--oem 1 --psm 6'  # LSTM engine, single uniform block of text.
+
+#### Local inbox. ####
+# Files dropped into LOCAL_INBOX_DIR are ingested without Drive: CSV exports under
+# <owner>/<account type>/[<sub-account>/], receipt photos and paystub PDFs anywhere in it.
+WATCH_LOCAL_INBOX = os.environ.get('WATCH_LOCAL_INBOX', 'false').lower() == 'true'  # Start the watcher with the server.
+INBOX_SETTLE_MS = 500  # Quiet time after the last change before a batch of dropped files is processed.
+INBOX_DEBOUNCE_MS = 5000  # Longest a batch keeps growing while files are still being written.
+INBOX_TRANSACTION_EXTENSIONS = ('.csv',)
+INBOX_RECEIPT_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.webp')
+INBOX_PAYSTUB_EXTENSIONS = ('.pdf',)
+
+#### Paths to locally stored data. ####
+TRANSACTION_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'transaction_data')
+PROCESS_HISTORY_PATH = os.path.join(TRANSACTION_DATA_DIR, 'process_history.csv')
+UPLOADS_SYNC_STATE_PATH = os.path.join(TRANSACTION_DATA_DIR, 'uploads_sync_state.json')
+INSTRUMENT_DATA_DIR = os.environ.get('INSTRUMENT_DATA', os.path.join('.', 'data', 'instrument_data'))
+DRIVE_CACHE_DIR = os.environ.get('DRIVE_CACHE', os.path.join('.', 'data', 'drive_cache'))
+PAYSTUB_DATA_DIR = os.environ.get('PAYSTUB_DATA', os.path.join('.', 'data', 'paystub_data'))
+RECEIPT_DATA_DIR = os.environ.get('RECEIPT_DATA', os.path.join('.', 'data', 'receipt_data'))
+PRICE_DATA_DIR = os.environ.get('PRICE_DATA', os.path.join('.', 'data', 'price_data'))
+MODEL_DATA_DIR = os.environ.get('MODEL_DATA', os.path.join('.', 'data', 'model_data'))
+LOCAL_INBOX_DIR = os.environ.get('LOCAL_INBOX', os.path.join('.', 'data', 'inbox'))
+QUARANTINE_DATA_DIR = os.environ.get('QUARANTINE_DATA', os.path.join('.', 'data', 'quarantine_data'))
+BENCHMARK_RESULTS_DIR = os.environ.get('BENCHMARK_RESULTS', os.path.join('.', 'data', 'benchmarks'))
+CLASSIFIER_CACHE_PATH = os.environ.get('CLASSIFIER_CACHE', os.path.join('.', 'data', 'classifier_cache.npz'))
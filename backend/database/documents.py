@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+from datetime import date
+from typing import Any, ClassVar, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger('numifocus.db')
+
+class DocumentStore:
+    """Stores extracted documents (receipts, paystubs) as one JSON file per document.
+
+    Document IDs are content hashes of the uploaded file, so uploading the same file
+    twice overwrites rather than duplicates it, and a stored document doubles as the
+    cached extraction result for that file.
+    """
+
+    ID_FIELD: ClassVar[str]
+    DATE_FIELDS: ClassVar[Tuple[str, ...]] = ()
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def __contains__(self, document_id: str) -> bool:
+        return os.path.exists(self._path(document_id))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.isdir(self.root):
+            return
+        for filename in sorted(os.listdir(self.root)):
+            if filename.endswith('.json'):
+                document = self.get(filename[:-len('.json')])
+                if document is not None:
+                    yield document
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a stored document, if it exists."""
+        if document_id not in self:
+            return None
+        with open(self._path(document_id), encoding='utf-8') as f:
+            document = json.load(f)
+        for name in self.DATE_FIELDS:
+            if document.get(name):
+                document[name] = date.fromisoformat(document[name])
+        return document
+
+    def save(self, document: Dict[str, Any]) -> None:
+        """Writes a document, replacing any stored document with the same ID."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(document[self.ID_FIELD])
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(document, f, default=date.isoformat)
+        os.replace(f'{path}.tmp', path)
+        logger.debug("[%s] Saved %s", type(self).__name__, document[self.ID_FIELD])
+
+    def _path(self, document_id: str) -> str:
+        return os.path.join(self.root, f'{document_id}.json')
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from backend.constants import DRIVE_CACHE_DIR, DRIVE_CACHE_MAX_BYTES, DRIVE_CHUNK_SIZE
+
+logger = logging.getLogger('numifocus.db')
+
+INDEX_FILENAME = 'index.json'
+
+class DriveDownloadCache:
+    """Size-bounded local cache of downloaded Google Drive files.
+
+    File contents are stored once per md5 checksum under blobs/, and index.json maps
+    each Drive file ID to the revision and checksum Drive reported for the download
+    (either may be missing) and the blob holding it. A cached copy is only served
+    while the file's current Drive metadata still reports that revision and checksum,
+    and a download is only cached once its md5 matches the metadata. Least recently used blobs (by mtime) are evicted past max_bytes.
+    """
+
+    def __init__(self, root: str = DRIVE_CACHE_DIR, max_bytes: int = DRIVE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._blob_dir = os.path.join(root, 'blobs')
+        self._index_path = os.path.join(root, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path, encoding='utf-8') as f:
+                self._index = json.load(f)
+
+    def get_path(self, file_id: str, metadata: Optional[Mapping[str, Any]]) -> Optional[str]:
+        """Returns the cached copy of a file if it matches the file's current Drive metadata."""
+        entry = self._index.get(file_id)
+        if entry is None or not _cache_key(metadata) or _cache_key(metadata) != (entry['revision'], entry['md5']):
+            return None
+        path = os.path.join(self._blob_dir, _blob(entry))
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # Mark as recently used.
+        return path
+
+    def iter_chunks(
+        self,
+        file_id: str,
+        metadata: Optional[Mapping[str, Any]],
+        download: Callable[[], Iterator[bytes]],
+        chunksize: int = DRIVE_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Yields a file's content from the cache, or from download() while caching it.
+
+        Args:
+            file_id: Drive file ID.
+            metadata: The file's current Drive metadata (md5Checksum, headRevisionId, size);
+                without a checksum or revision the file is downloaded and not cached.
+            download: Starts the network download, yielding chunks of the file.
+            chunksize: Size of the chunks read back from a cached copy.
+        """
+        path = self.get_path(file_id, metadata)
+        if path is not None:
+            logger.debug("[DriveDownloadCache] Cache hit for file ID %s", file_id)
+            with open(path, 'rb') as f:
+                while chunk := f.read(chunksize):
+                    yield chunk
+            return
+
+        if not _cache_key(metadata):
+            yield from download()
+            return
+
+        os.makedirs(self._blob_dir, exist_ok=True)
+        hasher = hashlib.md5()
+        fd, staging = tempfile.mkstemp(dir=self._blob_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in download():
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    yield chunk
+            self._store(file_id, metadata, hasher.hexdigest(), staging)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+    def _store(self, file_id: str, metadata: Mapping[str, Any], md5: str, staging: str) -> None:
+        revision, expected_md5 = _cache_key(metadata)
+        if expected_md5 and md5 != expected_md5:
+            logger.warning("[DriveDownloadCache] File ID %s md5 %s doesn't match Drive's %s, not caching", file_id, md5, expected_md5)
+            return
+
+        with self._lock:
+            os.replace(staging, os.path.join(self._blob_dir, md5))
+            # Keyed as Drive reported it, so metadata without a checksum still matches next time.
+            self._index[file_id] = {'revision': revision, 'md5': expected_md5, 'blob': md5}
+            self._evict()
+            self._save_index()
+
+    def _evict(self) -> None:
+        """Deletes least recently used blobs until the cache fits in max_bytes."""
+        blobs = [entry for entry in os.scandir(self._blob_dir) if entry.is_file() and not entry.name.endswith('.part')]
+        total = sum(entry.stat().st_size for entry in blobs)
+        if total <= self.max_bytes:
+            return
+
+        evicted = set()
+        for entry in sorted(blobs, key=lambda entry: entry.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+            evicted.add(entry.name)
+        self._index = {file_id: entry for file_id, entry in self._index.items() if _blob(entry) not in evicted}
+        logger.info("[DriveDownloadCache] Evicted %d cached files", len(evicted))
+
+    def _save_index(self) -> None:
+        staging = f'{self._index_path}.tmp'
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(staging, self._index_path)
+
+def _blob(entry: Mapping[str, Any]) -> str:
+    """Returns the blob name of an index entry; older entries are named by their md5."""
+    return entry.get('blob') or entry['md5']
+
+def _cache_key(metadata: Optional[Mapping[str, Any]]) -> Optional[tuple]:
+    """Returns the (revision, md5) identifying a file's content, if its metadata has either."""
+    if not metadata or not (metadata.get('headRevisionId') or metadata.get('md5Checksum')):
+        return None
+    return metadata.get('headRevisionId'), metadata.get('md5Checksum')
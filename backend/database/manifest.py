@@ -0,0 +1,176 @@
+import csv
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from backend.constants import PROCESS_HISTORY_PATH
+from backend.models.instruments import ACCOUNT_UPLOAD_KEY, INSTRUMENT_TYPES, ProcessedFileRecord
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+
+logger = logging.getLogger('numifocus.db')
+
+# process_history.csv header for each ProcessedFileRecord field.
+MANIFEST_FIELDNAMES = {
+    'account_owner': 'Account Owner',
+    'account_type': 'Account',
+    'file_id': 'File ID',
+    'date_processed': 'Date Processed',
+    'instrument': 'Instrument',
+    'content_hash': 'Content Hash',
+    'md5_checksum': 'MD5 Checksum',
+    'modified_time': 'Modified Time',
+    'activity_date_start': 'Activity Date Start',
+    'activity_date_end': 'Activity Date End',
+    'row_count': 'Row Count',
+}
+
+class ProcessedFilesManifest:
+    """Persistent record of processed transaction files, backed by process_history.csv.
+
+    The manifest is loaded once into hash maps keyed by Drive file ID and by content
+    hash, so duplicate checks and date filters are O(1) lookups. New entries are
+    appended to the CSV; when a file is reprocessed the latest row wins.
+
+    Entries can be staged while their transactions are still in memory and only
+    committed once those are persisted, so a failed import is retried on the next run
+    instead of being skipped as already processed.
+    """
+
+    def __init__(self, path: str = PROCESS_HISTORY_PATH):
+        self.path = path
+        self._records: Dict[str, ProcessedFileRecord] = {}
+        self._hashes: Dict[str, str] = {}
+        self._pending: Dict[str, ProcessedFileRecord] = {}
+
+        if os.path.exists(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self._index(self._from_row(row))
+
+    def __contains__(self, file_id: str) -> bool:
+        return file_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, file_id: str) -> Optional[ProcessedFileRecord]:
+        """Returns the manifest entry for a Drive file ID, if it has been processed."""
+        return self._records.get(file_id)
+
+    def find_by_hash(self, content_hash: str) -> Optional[ProcessedFileRecord]:
+        """Returns the manifest entry of a processed (or staged) file with identical content, if any."""
+        for record in self._pending.values():
+            if record['content_hash'] == content_hash:
+                return record
+        file_id = self._hashes.get(content_hash)
+        return self._records.get(file_id) if file_id else None
+
+    def is_unchanged(self, file_id: str, metadata: Optional[Mapping[str, Any]]) -> bool:
+        """Checks whether a processed file's Drive md5Checksum/modifiedTime still match the manifest.
+
+        Without metadata to compare against, a processed file is assumed to be unchanged.
+        """
+        record = self._records.get(file_id)
+        if record is None:
+            return False
+        if not metadata:
+            return True
+        if metadata.get('md5Checksum') and record['md5_checksum']:
+            return metadata['md5Checksum'] == record['md5_checksum']
+        if metadata.get('modifiedTime') and record['modified_time']:
+            return metadata['modifiedTime'] == record['modified_time']
+        return True
+
+    def date_range(self, file_id: str) -> Optional[Tuple[Optional[date], Optional[date]]]:
+        """Returns the (min, max) activity dates of a processed file."""
+        record = self._records.get(file_id)
+        return (record['activity_date_start'], record['activity_date_end']) if record else None
+
+    def record(
+        self,
+        transaction_file: ACCOUNT_UPLOAD_KEY,
+        instrument: INSTRUMENT_TYPES,
+        content_hash: str,
+        data: ColumnarTransactionStore,
+        metadata: Optional[Mapping[str, Any]] = None
+    ) -> ProcessedFileRecord:
+        """Records a processed file along with the date range and row count of its normalized data."""
+        record = self.stage(transaction_file, instrument, content_hash, data, metadata)
+        self.commit([record['file_id']])
+        return record
+
+    def stage(
+        self,
+        transaction_file: ACCOUNT_UPLOAD_KEY,
+        instrument: INSTRUMENT_TYPES,
+        content_hash: str,
+        data: ColumnarTransactionStore,
+        metadata: Optional[Mapping[str, Any]] = None
+    ) -> ProcessedFileRecord:
+        """Prepares a processed file's entry without recording it yet; see commit()."""
+        account_owner, account_type, file_id = transaction_file
+        dates = data['activity_date']
+        dates = dates[~np.isnat(dates)]
+        metadata = metadata or {}
+
+        record = ProcessedFileRecord(
+            account_owner=account_owner,
+            account_type=account_type,
+            file_id=file_id,
+            date_processed=date.today(),
+            instrument=instrument,
+            content_hash=content_hash,
+            md5_checksum=metadata.get('md5Checksum'),
+            modified_time=metadata.get('modifiedTime'),
+            activity_date_start=dates.min().astype(date) if len(dates) else None,
+            activity_date_end=dates.max().astype(date) if len(dates) else None,
+            row_count=len(data)
+        )
+        self._pending[file_id] = record
+        return record
+
+    def commit(self, file_ids: Optional[Iterable[str]] = None) -> None:
+        """Records staged entries (all of them by default), once their transactions are persisted."""
+        file_ids = list(self._pending) if file_ids is None else [file_id for file_id in file_ids if file_id in self._pending]
+        if not file_ids:
+            return
+        records = [self._pending.pop(file_id) for file_id in file_ids]
+        for record in records:
+            self._index(record)
+
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(MANIFEST_FIELDNAMES.values()))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(self._to_row(record) for record in records)
+
+        logger.debug("[ProcessedFilesManifest] Recorded %d files", len(records))
+
+    def discard(self, file_ids: Optional[Iterable[str]] = None) -> None:
+        """Drops staged entries (all of them by default), so their files are processed again next time."""
+        for file_id in list(self._pending) if file_ids is None else file_ids:
+            self._pending.pop(file_id, None)
+
+    def _index(self, record: ProcessedFileRecord) -> None:
+        self._records[record['file_id']] = record
+        if record['content_hash']:
+            self._hashes[record['content_hash']] = record['file_id']
+
+    @staticmethod
+    def _to_row(record: ProcessedFileRecord) -> Dict[str, str]:
+        return {
+            header: '' if record[field] is None else str(record[field])
+            for field, header in MANIFEST_FIELDNAMES.items()
+        }
+
+    @staticmethod
+    def _from_row(row: Mapping[str, str]) -> ProcessedFileRecord:
+        values = {field: row.get(header) or None for field, header in MANIFEST_FIELDNAMES.items()}
+        for field in ('date_processed', 'activity_date_start', 'activity_date_end'):
+            values[field] = date.fromisoformat(values[field]) if values[field] else None
+        values['row_count'] = int(values['row_count'] or 0)
+        return ProcessedFileRecord(**values)
@@ -0,0 +1,11 @@
+from backend.constants import PAYSTUB_DATA_DIR
+from backend.database.documents import DocumentStore
+
+class PaystubStore(DocumentStore):
+    """Extracted PaystubData, keyed by the SHA-256 of the paystub PDF."""
+
+    ID_FIELD = 'paystub_id'
+    DATE_FIELDS = ('pay_date', 'period_start', 'period_end')
+
+    def __init__(self, root: str = PAYSTUB_DATA_DIR):
+        super().__init__(root)
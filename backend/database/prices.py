@@ -0,0 +1,234 @@
+import csv
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.constants import PRICE_DATA_DIR
+from backend.utils.file_io import field_name, parse_amounts, parse_dates
+
+logger = logging.getLogger('numifocus.db')
+
+# One daily bar; files are a flat array of these, so they can be appended to and memory-mapped as is.
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+])
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+BAR_SUFFIX = '.ohlcv'
+TICKER_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9.\-^=]{0,31}$')
+# CSV headers accepted for each bar field, after field_name() normalization.
+CSV_FIELD_ALIASES = {'close_last': 'close', 'price': 'close', 'vol': 'volume'}
+
+class PricePanel(NamedTuple):
+    """Every stored bar of every ticker in one array, sorted by (ticker, date)."""
+
+    tickers: Tuple[str, ...]
+    keys: np.ndarray  # Ticker index * KEY_STRIDE + KEY_DAY_OFFSET + days since epoch, for composite searchsorted lookups.
+    bars: np.ndarray  # BAR_DTYPE
+
+KEY_STRIDE = 1 << 32
+KEY_DAY_OFFSET = 1 << 31  # Keeps pre-1970 dates inside their ticker's key range.
+
+# (st_ino, st_size, st_mtime_ns) of a bar file: a backfill or correction can rewrite a
+# file at the same size, but it's written to a new file and renamed over the old one.
+FileSignature = Tuple[int, int, int]
+
+class PriceHistoryStore:
+    """Local, append-only store of daily OHLCV bars per ticker.
+
+    Each ticker's bars live in one flat binary file of BAR_DTYPE records in date
+    order, read through np.memmap, so a range slice is two binary searches and a
+    view. New bars after a ticker's last date are appended to the end of its file;
+    only backfills or corrections of earlier dates rewrite it.
+
+    As-of lookups across many tickers and dates go through a panel of all tickers
+    keyed by (ticker, date), so pricing a whole array of positions is a single
+    searchsorted and gather.
+    """
+
+    def __init__(self, root: str = PRICE_DATA_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._maps: Dict[str, Tuple[Optional[FileSignature], np.ndarray]] = {}
+        self._panel: Optional[Tuple[Tuple[Tuple[str, Optional[FileSignature]], ...], PricePanel]] = None
+
+    def tickers(self) -> List[str]:
+        """Returns the tickers with stored bars."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(BAR_SUFFIX)] for name in os.listdir(self.root) if name.endswith(BAR_SUFFIX))
+
+    def bars(self, ticker: str) -> np.ndarray:
+        """Returns a read-only memory-mapped view of all of a ticker's bars (empty if it has none)."""
+        ticker = _check_ticker(ticker)
+        path = self._path(ticker)
+        signature = _file_signature(path)
+        with self._lock:
+            cached = self._maps.get(ticker)
+            if cached is None or cached[0] != signature:
+                bars = np.memmap(path, dtype=BAR_DTYPE, mode='r') if signature and signature[1] else np.empty(0, dtype=BAR_DTYPE)
+                cached = self._maps[ticker] = (signature, bars)
+        return cached[1]
+
+    def history(self, ticker: str, date_start: Optional[date] = None, date_end: Optional[date] = None) -> np.ndarray:
+        """Returns a ticker's bars within [date_start, date_end] as a view of the mapped file."""
+        bars = self.bars(ticker)
+        low = np.searchsorted(bars['date'], np.datetime64(date_start, 'D'), side='left') if date_start else 0
+        high = np.searchsorted(bars['date'], np.datetime64(date_end, 'D'), side='right') if date_end else len(bars)
+        return bars[low:high]
+
+    def append(self, ticker: str, bars: np.ndarray) -> int:
+        """Adds bars to a ticker's history; bars for dates already stored replace them.
+
+        Returns:
+            int: The number of bars written.
+        """
+        ticker = _check_ticker(ticker)
+        bars = np.sort(np.asarray(bars, dtype=BAR_DTYPE), order='date')
+        bars = bars[~np.isnat(bars['date'])]
+        # Keep the last bar of each date.
+        bars = bars[np.r_[bars['date'][1:] != bars['date'][:-1], True]] if len(bars) else bars
+        if not len(bars):
+            return 0
+
+        os.makedirs(self.root, exist_ok=True)
+        existing = self.bars(ticker)
+        path = self._path(ticker)
+        if not len(existing) or bars['date'][0] > existing['date'][-1]:
+            with open(path, 'ab') as f:
+                f.write(bars.tobytes())
+        else:
+            kept = existing[~np.isin(existing['date'], bars['date'])]
+            merged = np.concatenate([np.asarray(kept), bars])
+            merged = merged[np.argsort(merged['date'], kind='stable')]
+            with tempfile.NamedTemporaryFile('wb', dir=self.root, suffix=BAR_SUFFIX + '.tmp', delete=False) as f:
+                f.write(merged.tobytes())
+            with self._lock:
+                self._maps.pop(ticker, None)  # Release the old mapping before replacing its file.
+            os.replace(f.name, path)
+            logger.info("[PriceHistoryStore] Rewrote %s history to backfill %d bars", ticker, len(bars))
+        with self._lock:
+            self._panel = None
+        return len(bars)
+
+    def import_csv(self, path: str, ticker: Optional[str] = None) -> int:
+        """Imports a daily price CSV (Date, Open, High, Low, Close[, Adj Close], Volume) already on disk.
+
+        Args:
+            path: CSV file; common exports (Yahoo Finance, Nasdaq, Stooq) are recognized by their headers.
+            ticker: Ticker the prices belong to; defaults to the file name, e.g. 'VTI.csv'.
+
+        Returns:
+            int: The number of bars written.
+        """
+        ticker = ticker or os.path.splitext(os.path.basename(path))[0]
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            headers = [CSV_FIELD_ALIASES.get(field_name(header), field_name(header)) for header in next(reader, [])]
+            columns = list(zip(*reader)) or [()] * len(headers)
+        values = dict(zip(headers, columns))
+        if 'date' not in values or 'close' not in values:
+            raise ValueError(f"{path} has no Date and Close columns.")
+
+        bars = np.empty(len(values['date']), dtype=BAR_DTYPE)
+        bars['date'] = parse_dates(values['date'])
+        for name in PRICE_FIELDS:
+            column = values.get(name)
+            if column is None:
+                bars[name] = np.nan
+                continue
+            # Missing values are written as 'null' or 'N/A' by some exporters.
+            text = np.asarray(column, dtype=str)
+            text = np.where(np.isin(np.char.lower(text), ('null', 'n/a', 'nan', '-')), '', text)
+            bars[name] = parse_amounts(text)['value']
+
+        written = self.append(ticker, bars[~np.isnan(bars['close'])])
+        logger.info("[PriceHistoryStore] Imported %s %s bars from %s", written, ticker.upper(), path)
+        return written
+
+    def import_directory(self, directory: str) -> Dict[str, int]:
+        """Imports every *.csv in a directory, one ticker per file named after it."""
+        return {
+            os.path.splitext(name)[0].upper(): self.import_csv(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory)) if name.lower().endswith('.csv')
+        }
+
+    def panel(self) -> PricePanel:
+        """Returns all stored bars as one (ticker, date) sorted panel, rebuilt only after files change."""
+        tickers = self.tickers()
+        signature = tuple((ticker, _file_signature(self._path(ticker))) for ticker in tickers)
+        cached = self._panel
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        histories = [self.bars(ticker) for ticker in tickers]
+        bars = np.concatenate(histories) if histories else np.empty(0, dtype=BAR_DTYPE)
+        ticker_index = np.repeat(np.arange(len(tickers), dtype=np.int64), [len(history) for history in histories])
+        keys = ticker_index * KEY_STRIDE + KEY_DAY_OFFSET + bars['date'].astype(np.int64)
+        panel = PricePanel(tuple(tickers), keys, bars)
+        self._panel = (signature, panel)
+        return panel
+
+    def as_of(
+        self,
+        tickers: Union[Sequence[str], np.ndarray],
+        dates: Union[Sequence[date], np.ndarray],
+        field: str = 'close'
+    ) -> np.ndarray:
+        """Looks up each (ticker, date) pair's latest bar on or before that date.
+
+        tickers and dates are broadcast against each other, so a column of position
+        tickers against a row of valuation dates prices the whole grid at once.
+
+        Returns:
+            np.ndarray: The field's value for every pair; NaN where the ticker has no bar by then.
+        """
+        panel = self.panel()
+        tickers, dates = np.broadcast_arrays(
+            np.char.upper(np.asarray(tickers, dtype=str)), np.asarray(dates, dtype='datetime64[D]')
+        )
+        values = np.full(tickers.shape, np.nan)
+        if not len(panel.tickers):
+            return values
+
+        known = np.array(panel.tickers, dtype=str)
+        ticker_index = np.minimum(np.searchsorted(known, tickers), len(known) - 1)
+        found = (known[ticker_index] == tickers) & ~np.isnat(dates)
+        keys = ticker_index.astype(np.int64) * KEY_STRIDE + KEY_DAY_OFFSET + dates.astype(np.int64)
+        positions = np.searchsorted(panel.keys, keys, side='right') - 1
+        found &= positions >= 0
+        found[found] &= panel.keys[positions[found]] // KEY_STRIDE == ticker_index[found]
+        values[found] = panel.bars[field][positions[found]]
+        return values
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, _check_ticker(ticker) + BAR_SUFFIX)
+
+def _file_signature(path: str) -> Optional[FileSignature]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def _check_ticker(ticker: str) -> str:
+    ticker = ticker.strip().upper()
+    if not TICKER_PATTERN.match(ticker):
+        raise ValueError(f"'{ticker}' is not a valid ticker.")
+    return ticker
+
+@lru_cache(maxsize=1)
+def get_price_store() -> PriceHistoryStore:
+    """Returns the process-wide PriceHistoryStore over PRICE_DATA."""
+    return PriceHistoryStore()
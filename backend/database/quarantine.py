@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from backend.constants import QUARANTINE_DATA_DIR
+from backend.database.documents import DocumentStore
+from backend.models.instruments import ACCOUNT_TYPES, QuarantinedTransactions
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.utils.validation import ValidationResult
+
+class QuarantineStore(DocumentStore):
+    """Transactions that failed validation, one document per account type and uploaded file.
+
+    Quarantined rows are left out of the import, so a handful of malformed rows never
+    abort a whole batch; they are kept here, with the reasons they failed, to be fixed
+    and re-uploaded.
+    """
+
+    ID_FIELD = 'quarantine_id'
+
+    def __init__(self, root: str = QUARANTINE_DATA_DIR):
+        super().__init__(root)
+
+    def quarantine(
+        self,
+        account_type: ACCOUNT_TYPES,
+        file_id: Optional[str],
+        data: ColumnarTransactionStore,
+        result: ValidationResult,
+        rows: np.ndarray
+    ) -> QuarantinedTransactions:
+        """Saves the given rows of a validated store, replacing any earlier quarantine of the same file."""
+        transactions: List[dict] = []
+        for row in rows.tolist():
+            record = dict(data.row(row))
+            record['errors'] = result.describe(row)
+            transactions.append(record)
+        document = QuarantinedTransactions(
+            quarantine_id=f'{account_type}-{file_id or "unknown"}',
+            account_type=account_type,
+            file_id=file_id,
+            quarantined_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            transactions=transactions
+        )
+        self.save(document)
+        return document
@@ -0,0 +1,11 @@
+from backend.constants import RECEIPT_DATA_DIR
+from backend.database.documents import DocumentStore
+
+class ReceiptStore(DocumentStore):
+    """Extracted ReceiptData, keyed by the SHA-256 of the receipt photo."""
+
+    ID_FIELD = 'receipt_id'
+    DATE_FIELDS = ('purchase_date',)
+
+    def __init__(self, root: str = RECEIPT_DATA_DIR):
+        super().__init__(root)
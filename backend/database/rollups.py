@@ -0,0 +1,276 @@
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import weakref
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Type
+
+import numpy as np
+
+from backend.database.storage import TransactionStorage, get_transaction_storage
+from backend.models.instruments import NormalizedTransactionSchema
+from backend.services.instruments.columnar_store import ColumnarTransactionStore, column_specs, encode_categories
+
+logger = logging.getLogger('numifocus.db')
+
+ROLLUP_DIRNAME = 'rollups'
+VALUE_COLUMNS = ('credit', 'debit', 'amount')
+GROUP_KEYS = ('month', 'account', 'classification')
+
+class RollupTable(NamedTuple):
+    """Per (month, account, classification) cell counts and amount sums of one instrument, sorted by cell."""
+
+    month: np.ndarray  # datetime64[M]
+    account: np.ndarray  # int16 account codes.
+    classification: np.ndarray  # int16 classification codes; -1 for schemas without a classification.
+    count: np.ndarray  # int64 transactions per cell.
+    sums: Dict[str, np.ndarray]  # float64 sum per cell of each amount column the schema has.
+
+    def __len__(self) -> int:
+        return len(self.month)
+
+    def take(self, positions: np.ndarray) -> 'RollupTable':
+        return RollupTable(
+            self.month[positions], self.account[positions], self.classification[positions], self.count[positions],
+            {name: values[positions] for name, values in self.sums.items()}
+        )
+
+def compute_rollup(data: ColumnarTransactionStore) -> RollupTable:
+    """Aggregates a store into rollup cells. Rows without an activity date aren't rolled up."""
+    months = data['activity_date'].astype('datetime64[M]')
+    dated = np.flatnonzero(~np.isnat(months))
+    if 'classification' in data.columns:
+        classification = data['classification'][dated]
+    else:
+        classification = np.full(len(dated), -1, dtype=np.int16)
+
+    keys = np.stack([
+        months[dated].astype(np.int64), data['account'][dated].astype(np.int64), classification.astype(np.int64)
+    ], axis=1)
+    cells, inverse = np.unique(keys.reshape(-1, 3), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    return RollupTable(
+        cells[:, 0].astype('datetime64[M]'),
+        cells[:, 1].astype(np.int16),
+        cells[:, 2].astype(np.int16),
+        np.bincount(inverse, minlength=len(cells)).astype(np.int64),
+        {
+            name: np.bincount(inverse, weights=np.nan_to_num(data[name][dated]), minlength=len(cells))
+            for name in _value_columns(data.schema)
+        }
+    )
+
+class TransactionRollups:
+    """Materialized monthly rollups of each instrument's stored transactions.
+
+    One small table per instrument holds the transaction count and credit/debit (or
+    amount) sums of every (month, account, classification) cell, so reports read a
+    few hundred precomputed cells instead of the raw transactions.
+
+    Tables are maintained incrementally: after a sync appends versions or tombstones
+    to some months, only those months' cells are recomputed from storage and swapped
+    into the table. Because a re-imported version only replaces the stored one if it
+    wins version resolution (posted first, then latest), the touched months are
+    re-aggregated from their resolved segments rather than adjusted by the raw
+    difference of the rows written. verify() and rebuild() recompute a whole table to
+    check or repair it.
+    """
+
+    def __init__(self, storage: Optional[TransactionStorage] = None, root: Optional[str] = None):
+        self.storage = storage if storage is not None else get_transaction_storage()
+        self.root = root if root is not None else os.path.join(self.storage.root, ROLLUP_DIRNAME)
+        self._lock = threading.RLock()
+        self._tables: Dict[str, RollupTable] = {}
+
+    def table(self, name: str, schema: Type[NormalizedTransactionSchema]) -> RollupTable:
+        """Returns an instrument's rollup table, building it from storage if it hasn't been materialized yet."""
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                table = self._read(name, schema)
+                if table is None:
+                    return self.rebuild(name, schema)
+                self._tables[name] = table
+            return table
+
+    def update(self, name: str, schema: Type[NormalizedTransactionSchema], months: Iterable[np.datetime64]) -> None:
+        """Recomputes the cells of the given months from storage and swaps them into the table."""
+        months = np.unique(np.asarray(list(months), dtype='datetime64[M]'))
+        months = months[~np.isnat(months)]
+        if not len(months):
+            return
+
+        with self._lock:
+            table = self.table(name, schema)
+            parts = [table.take(np.flatnonzero(~np.isin(table.month, months)))]
+            for month in months.tolist():
+                last_day = (month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+                parts.append(compute_rollup(self.storage.load(name, schema, month, last_day)))
+            self._save(name, _concat(parts))
+        logger.info("[TransactionRollups] Updated %d months of %s rollups", len(months), name)
+
+    def rebuild(self, name: str, schema: Type[NormalizedTransactionSchema]) -> RollupTable:
+        """Recomputes an instrument's whole rollup table from storage."""
+        with self._lock:
+            table = compute_rollup(self.storage.load(name, schema))
+            self._save(name, table)
+        logger.info("[TransactionRollups] Rebuilt %s rollups (%d cells)", name, len(table))
+        return table
+
+    def verify(self, name: str, schema: Type[NormalizedTransactionSchema]) -> List[str]:
+        """Compares the materialized table with a full recomputation.
+
+        Returns:
+            List[str]: The 'YYYY-MM' months whose cells differ; empty when the table is current.
+        """
+        stored = _cell_map(self.table(name, schema))
+        expected = _cell_map(compute_rollup(self.storage.load(name, schema)))
+        months = {
+            cell[0] for cell in stored.keys() | expected.keys()
+            if cell not in stored or cell not in expected or not np.allclose(stored[cell], expected[cell])
+        }
+        return sorted(str(month) for month in months)
+
+    def totals(
+        self,
+        name: str,
+        schema: Type[NormalizedTransactionSchema],
+        group_by: str,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        accounts: Optional[Sequence[str]] = None,
+        classifications: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Sums the rollup cells per 'month', account or classification label.
+
+        The date range is applied by whole months: every month overlapping
+        [date_start, date_end] is included in full.
+
+        Returns:
+            Dict[str, Dict[str, float]]: For each group, the sum of every amount column
+            (plus net when the schema has credit and debit).
+        """
+        if group_by not in GROUP_KEYS:
+            raise ValueError(f"Can't group rollups by '{group_by}'.")
+        specs = {spec.name: spec for spec in column_specs(schema)}
+        if (group_by == 'classification' or classifications) and 'classification' not in specs:
+            raise ValueError(f"{schema.__name__} has no classification column.")
+
+        table = self.table(name, schema)
+        mask = np.ones(len(table), dtype=np.bool_)
+        if date_start is not None:
+            mask &= table.month >= np.datetime64(date_start, 'M')
+        if date_end is not None:
+            mask &= table.month <= np.datetime64(date_end, 'M')
+        if accounts:
+            mask &= np.isin(table.account, encode_categories(specs['account'], accounts))
+        if classifications:
+            mask &= np.isin(table.classification, encode_categories(specs['classification'], classifications))
+
+        if group_by == 'month':
+            keys = table.month
+        else:
+            keys = getattr(table, group_by)
+            mask &= keys >= 0
+        groups, inverse = np.unique(keys[mask], return_inverse=True)
+        if group_by == 'month':
+            labels = [str(month) for month in groups]
+        else:
+            labels = [specs[group_by].categories[code] for code in groups.tolist()]
+
+        totals = {label: {} for label in labels}
+        for column, values in table.sums.items():
+            sums = np.bincount(inverse.reshape(-1), weights=values[mask], minlength=len(groups))
+            for label, total in zip(labels, sums.tolist()):
+                totals[label][column] = total
+        if 'credit' in table.sums and 'debit' in table.sums:
+            for group_totals in totals.values():
+                group_totals['net'] = group_totals['credit'] - group_totals['debit']
+        return totals
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, f'{name}.npz')
+
+    def _read(self, name: str, schema: Type[NormalizedTransactionSchema]) -> Optional[RollupTable]:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as stored:
+            return RollupTable(
+                stored['month'], stored['account'], stored['classification'], stored['count'],
+                {column: stored[f'sum_{column}'] for column in _value_columns(schema)}
+            )
+
+    def _save(self, name: str, table: RollupTable) -> None:
+        order = np.lexsort((table.classification, table.account, table.month))
+        table = table.take(order)
+        os.makedirs(self.root, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=self.root, suffix='.npz', delete=False) as f:
+            np.savez(
+                f,
+                month=table.month,
+                account=table.account,
+                classification=table.classification,
+                count=table.count,
+                **{f'sum_{column}': values for column, values in table.sums.items()}
+            )
+        os.replace(f.name, self._path(name))
+        self._tables[name] = table
+
+def _value_columns(schema: Type[NormalizedTransactionSchema]) -> List[str]:
+    names = {spec.name for spec in column_specs(schema)}
+    return [name for name in VALUE_COLUMNS if name in names]
+
+def _concat(tables: List[RollupTable]) -> RollupTable:
+    return RollupTable(
+        np.concatenate([table.month for table in tables]),
+        np.concatenate([table.account for table in tables]),
+        np.concatenate([table.classification for table in tables]),
+        np.concatenate([table.count for table in tables]),
+        {column: np.concatenate([table.sums[column] for table in tables]) for column in tables[0].sums}
+    )
+
+def _cell_map(table: RollupTable) -> Dict[tuple, np.ndarray]:
+    """Maps each cell to its count and sums, for comparing tables."""
+    values = np.stack([table.count.astype(np.float64)] + list(table.sums.values()), axis=1)
+    cells = zip(table.month.tolist(), table.account.tolist(), table.classification.tolist())
+    return dict(zip(cells, values))
+
+_rollups: 'weakref.WeakKeyDictionary[TransactionStorage, TransactionRollups]' = weakref.WeakKeyDictionary()
+_rollups_lock = threading.Lock()
+
+def get_transaction_rollups(storage: Optional[TransactionStorage] = None) -> TransactionRollups:
+    """Returns the shared TransactionRollups of a storage (INSTRUMENT_DATA by default)."""
+    storage = storage if storage is not None else get_transaction_storage()
+    with _rollups_lock:
+        rollups = _rollups.get(storage)
+        if rollups is None:
+            rollups = _rollups[storage] = TransactionRollups(storage)
+        return rollups
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Verifies or rebuilds the rollup tables: python -m backend.database.rollups {verify,rebuild} [account_type ...]"""
+    from backend.services.instruments.registry import INSTRUMENT_CLASSES
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild the materialized monthly transaction rollups.")
+    parser.add_argument('command', choices=('verify', 'rebuild'))
+    parser.add_argument('account_types', nargs='*', choices=sorted(INSTRUMENT_CLASSES), metavar='account_type')
+    args = parser.parse_args(argv)
+
+    rollups = get_transaction_rollups()
+    stale = 0
+    for account_type in args.account_types or INSTRUMENT_CLASSES:
+        schema = INSTRUMENT_CLASSES[account_type].SCHEMA
+        if args.command == 'rebuild':
+            table = rollups.rebuild(account_type, schema)
+            print(f"{account_type}: rebuilt {len(table)} cells")
+            continue
+        months = rollups.verify(account_type, schema)
+        stale += bool(months)
+        print(f"{account_type}: {'stale months ' + ', '.join(months) if months else 'ok'}")
+    return 1 if stale else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
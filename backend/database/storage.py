@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple, Type, TypedDict
+
+import numpy as np
+
+from backend.constants import INSTRUMENT_DATA_DIR
+from backend.models.instruments import NormalizedTransactionSchema
+from backend.services.instruments.columnar_store import SOURCE_COLUMN, ColumnSpec, ColumnarTransactionStore, column_specs
+from backend.services.instruments.transaction_merge import dedupe_rows
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger('numifocus.db')
+
+CATALOG_FILENAME = 'catalog.json'
+CATALOG_LOCK_FILENAME = 'catalog.lock'
+UNDATED_MONTH = 'undated'  # Partition for rows without an activity date.
+
+class SegmentEntry(TypedDict):
+    """Catalog entry for one immutable segment of an instrument's transaction data."""
+
+    seq: int
+    kind: Literal['data', 'tombstone']
+    month: str
+    path: str
+    rows: int
+
+class TransactionStorage:
+    """Append-only, columnar on-disk storage for normalized instrument data.
+
+    Each instrument's rows are partitioned by activity month into immutable segments,
+    one .npy file per column, which are memory-mapped when read. A small JSON catalog
+    lists every segment, so a date-range load only maps the months it needs.
+
+    Updates are appended as new versions of a transaction and deletes as tombstone
+    segments. On load, the latest posted version of each transaction wins and any
+    transaction with a newer tombstone is dropped, so writes never rewrite old
+    segments. compact() folds a month's segments back into one.
+
+    Several processes can share a data directory: writers hold a lock file while they
+    allocate a segment and update the catalog, and re-read the catalog first, so they
+    never reuse each other's segment numbers or drop each other's catalog entries.
+    """
+
+    def __init__(self, root: str = INSTRUMENT_DATA_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._catalog_path = os.path.join(root, CATALOG_FILENAME)
+        self._catalog: Dict[str, Dict[str, object]] = {}
+        self._catalog_signature: Optional[Tuple[int, int]] = None
+        self.refresh()
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-reads the catalog if another process has written to it since it was last read.
+
+        Args:
+            force: Re-read it even if it looks unchanged.
+        """
+        try:
+            stat = os.stat(self._catalog_path)
+        except FileNotFoundError:
+            return
+        # The catalog is replaced on every save, so its inode changes even within the mtime resolution.
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        if signature == self._catalog_signature and not force:
+            return
+        with self._lock:
+            with open(self._catalog_path, encoding='utf-8') as f:
+                self._catalog = json.load(f)['instruments']
+            self._catalog_signature = signature
+
+    def version(self, name: str) -> int:
+        """Returns a number that changes whenever an instrument's stored data changes."""
+        self.refresh()
+        with self._lock:
+            return self._catalog.get(name, {}).get('next_seq', 0)
+
+    def months(self, name: str) -> List[str]:
+        """Returns the activity months ('YYYY-MM') an instrument has dated segments in, in order."""
+        self.refresh()
+        with self._lock:
+            segments = self._catalog.get(name, {}).get('segments', [])
+            return sorted({segment['month'] for segment in segments} - {UNDATED_MONTH})
+
+    def segments(
+        self,
+        name: str,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None
+    ) -> List[SegmentEntry]:
+        """Returns the catalog entries of an instrument's segments overlapping [date_start, date_end], in write order."""
+        start = _month(date_start) if date_start else None
+        end = _month(date_end) if date_end else None
+        with self._lock:
+            segments = list(self._catalog.get(name, {}).get('segments', []))
+        return sorted(
+            (
+                segment for segment in segments
+                if segment['month'] == UNDATED_MONTH and not (start or end)
+                or segment['month'] != UNDATED_MONTH and (not start or segment['month'] >= start) and (not end or segment['month'] <= end)
+            ),
+            key=lambda segment: segment['seq']
+        )
+
+    def append(self, name: str, data: ColumnarTransactionStore) -> List[SegmentEntry]:
+        """Appends rows to an instrument, writing one new segment per activity month they cover."""
+        return [
+            self._write_segment(name, 'data', month, data.take(rows).columns, data.specs)
+            for month, rows in _month_partitions(data['activity_date'])
+        ]
+
+    def delete(self, name: str, transaction_ids: Sequence[str], activity_dates: np.ndarray) -> List[SegmentEntry]:
+        """Records tombstones for deleted transactions in the months they belong to."""
+        transaction_ids = np.asarray(transaction_ids, dtype=object)
+        return [
+            self._write_segment(name, 'tombstone', month, {'transaction_id': transaction_ids[rows]}, ())
+            for month, rows in _month_partitions(np.asarray(activity_dates, dtype='datetime64[D]'))
+        ]
+
+    def load(
+        self,
+        name: str,
+        schema: Type[NormalizedTransactionSchema],
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None
+    ) -> ColumnarTransactionStore:
+        """Loads an instrument's current transactions within [date_start, date_end].
+
+        Only the segments of the months covering the range are memory-mapped, and only
+        the rows that survive version resolution and the date filter are copied into
+        the returned store.
+        """
+        return self._resolve(schema, self.segments(name, date_start, date_end), date_start, date_end)
+
+    def read_segment(
+        self,
+        segment: SegmentEntry,
+        specs: Sequence[ColumnSpec],
+        rows: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """Reads columns of a segment: all of its rows memory-mapped, or copies of the given rows.
+
+        String columns are decoded, but only for the rows asked for.
+        """
+        path = os.path.join(self.root, segment['path'])
+        if segment['kind'] == 'tombstone':
+            return {'transaction_id': _read_strings(path, 'transaction_id', rows)}
+
+        columns = {}
+        for spec in specs:
+            if spec.kind == 'str':
+                columns[spec.name] = _read_strings(path, spec.name, rows)
+            else:
+                column = np.load(os.path.join(path, f'{spec.name}.npy'), mmap_mode='r')
+                columns[spec.name] = column if rows is None else column[rows]
+        return columns
+
+    def compact(self, name: str, schema: Type[NormalizedTransactionSchema], month: str) -> Optional[SegmentEntry]:
+        """Rewrites all segments of one month as a single resolved data segment.
+
+        Tombstones are always written to the month of the row they delete, so once a
+        month is resolved its tombstones can be dropped.
+        """
+        with self._lock:
+            old_segments = [segment for segment in self._catalog.get(name, {}).get('segments', []) if segment['month'] == month]
+        if len(old_segments) < 2:
+            return None
+
+        data = self._resolve(schema, old_segments)
+        segment = self._write_segment(name, 'data', month, data.columns, data.specs, replaces=old_segments)
+        logger.info("[TransactionStorage] Compacted %d %s segments for %s into %d rows", len(old_segments), name, month, len(data))
+        return segment
+
+    def _resolve(
+        self,
+        schema: Type[NormalizedTransactionSchema],
+        segments: Sequence[SegmentEntry],
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None
+    ) -> ColumnarTransactionStore:
+        """Combines segments into the current version of each transaction within [date_start, date_end].
+
+        Versions written before a tombstone for their transaction ID are dropped, then
+        the latest posted version of each remaining transaction ID wins. Version
+        resolution only needs the transaction IDs and numeric columns, so the other
+        string columns are decoded afterwards, for the surviving rows only.
+        """
+        specs = column_specs(schema) + (ColumnSpec(SOURCE_COLUMN, 'str'),)
+        key_specs = tuple(spec for spec in specs if spec.kind != 'str' or spec.name == 'transaction_id')
+        string_specs = tuple(spec for spec in specs if spec not in key_specs)
+
+        stores, seqs, tombstones, data_segments = [], [], {}, []
+        for segment in segments:
+            columns = self.read_segment(segment, key_specs)
+            if segment['kind'] == 'tombstone':
+                tombstones.update(dict.fromkeys(columns['transaction_id'].tolist(), segment['seq']))
+            else:
+                stores.append(ColumnarTransactionStore(schema, columns))
+                seqs.append(np.full(segment['rows'], segment['seq']))
+                data_segments.append(segment)
+
+        if not stores:
+            return ColumnarTransactionStore(schema)
+
+        data = stores[0].concat(*stores[1:])
+        rows = np.arange(len(data))
+        if tombstones:
+            deleted = np.fromiter(
+                (tombstones.get(transaction_id, -1) > seq for transaction_id, seq in zip(data['transaction_id'].tolist(), np.concatenate(seqs).tolist())),
+                dtype=np.bool_,
+                count=len(data)
+            )
+            rows = rows[~deleted]
+        rows = rows[dedupe_rows(data.take(rows))]
+        if date_start or date_end:
+            rows = rows[data.date_mask(date_start, date_end)[rows]]
+
+        resolved = data.take(rows)
+        starts = np.cumsum([0] + [segment['rows'] for segment in data_segments])
+        segment_of = np.searchsorted(starts, rows, side='right') - 1
+        strings = [
+            self.read_segment(segment, string_specs, rows[segment_of == index] - starts[index])
+            for index, segment in enumerate(data_segments)
+        ]
+        for spec in string_specs:
+            resolved.columns[spec.name] = np.concatenate([columns[spec.name] for columns in strings])
+        return resolved
+
+    def _write_segment(
+        self,
+        name: str,
+        kind: Literal['data', 'tombstone'],
+        month: str,
+        columns: Dict[str, np.ndarray],
+        specs: Sequence[ColumnSpec],
+        replaces: Sequence[SegmentEntry] = ()
+    ) -> SegmentEntry:
+        with self._catalog_transaction():
+            with self._lock:
+                instrument = self._catalog.setdefault(name, {'next_seq': 0, 'segments': []})
+                seq = instrument['next_seq']
+
+            relative_path = os.path.join(name, month, f'{seq:08d}-{kind}')
+            path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Write into a temporary directory and rename it, so a crash never leaves a partial segment.
+            staging = tempfile.mkdtemp(dir=os.path.dirname(path))
+            kinds = {spec.name: spec.kind for spec in specs}
+            for column_name, column in columns.items():
+                if kinds.get(column_name, 'str') == 'str':
+                    _write_strings(staging, column_name, column)
+                else:
+                    np.save(os.path.join(staging, f'{column_name}.npy'), np.ascontiguousarray(column))
+            os.replace(staging, path)
+
+            segment = SegmentEntry(seq=seq, kind=kind, month=month, path=relative_path, rows=len(columns['transaction_id']))
+            with self._lock:
+                instrument['next_seq'] = seq + 1
+                instrument['segments'] = [entry for entry in instrument['segments'] if entry not in replaces] + [segment]
+                self._save_catalog()
+
+        for old_segment in replaces:
+            shutil.rmtree(os.path.join(self.root, old_segment['path']), ignore_errors=True)
+        return segment
+
+    @contextmanager
+    def _catalog_transaction(self) -> Iterator[None]:
+        """Serializes catalog writers across threads and processes, starting from the catalog on disk.
+
+        Without fcntl (Windows) only this process's threads are serialized.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with self._write_lock, open(os.path.join(self.root, CATALOG_LOCK_FILENAME), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # Released when the file is closed.
+            self.refresh(force=True)
+            yield
+
+    def _save_catalog(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        staging = f'{self._catalog_path}.tmp'
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'instruments': self._catalog}, f, indent=2)
+        os.replace(staging, self._catalog_path)
+        stat = os.stat(self._catalog_path)
+        self._catalog_signature = (stat.st_ino, stat.st_mtime_ns)
+
+@lru_cache(maxsize=None)
+def get_transaction_storage(root: str = INSTRUMENT_DATA_DIR) -> TransactionStorage:
+    """Returns the shared storage engine for a data directory."""
+    return TransactionStorage(root)
+
+def _month(value: date) -> str:
+    return value.strftime('%Y-%m')
+
+def _month_partitions(dates: np.ndarray) -> Iterable[Tuple[str, np.ndarray]]:
+    """Yields (month, row indices) for each activity month present in a date column."""
+    months = dates.astype('datetime64[M]')
+    undated = np.isnat(months)
+    for month in np.unique(months[~undated]):
+        yield str(month), np.flatnonzero(months == month)
+    if undated.any():
+        yield UNDATED_MONTH, np.flatnonzero(undated)
+
+def _write_strings(path: str, name: str, values: np.ndarray) -> None:
+    """Stores an object column as UTF-8 bytes plus offsets and a null mask, all mmap-able."""
+    nulls = np.equal(values, None)
+    encoded = [b'' if value is None else str(value).encode('utf-8') for value in values.tolist()]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(os.path.join(path, f'{name}.bytes.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    np.save(os.path.join(path, f'{name}.offsets.npy'), offsets)
+    np.save(os.path.join(path, f'{name}.nulls.npy'), nulls)
+
+def _read_strings(path: str, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Decodes a string column written by _write_strings, or just the given rows of it.
+
+    The bytes, offsets and null mask are memory-mapped, so rows that aren't asked for are never read.
+    """
+    raw = np.load(os.path.join(path, f'{name}.bytes.npy'), mmap_mode='r')
+    offsets = np.load(os.path.join(path, f'{name}.offsets.npy'), mmap_mode='r')
+    nulls = np.load(os.path.join(path, f'{name}.nulls.npy'), mmap_mode='r')
+    rows = np.arange(len(nulls)) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    text = memoryview(raw) if len(raw) else memoryview(b'')
+    column = np.empty(len(rows), dtype=object)
+    column[:] = [str(text[start:end], 'utf-8') for start, end in zip(offsets[rows].tolist(), offsets[rows + 1].tolist())]
+    column[nulls[rows]] = None
+    return column
@@ -1,48 +1,104 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
 from rich.logging import RichHandler
 
-def setup_logging():
-    # Console handler with Rich for colorful output
-    console_handler = RichHandler(rich_tracebacks=True)
+from backend.constants import LOG_FILE_PATH, LOG_FORMAT
+
+# Attributes every LogRecord has; anything else on a record was passed through `extra`.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues records without formatting them, so message interpolation happens on the listener thread.
+
+    The stock QueueHandler formats every record in the logging thread before queuing
+    it. Log arguments are only interpolated when the listener's handlers format the
+    record, so they should be values that aren't mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(log_format: str = LOG_FORMAT) -> QueueListener:
+    """Routes all logging through a queue to console and rotating file handlers on a background thread.
+
+    Logging calls only put the record on an in-memory queue; formatting and I/O run on
+    the QueueListener's thread, so ingestion workers never wait on the console or disk.
+
+    Args:
+        log_format: 'text' for Rich console output and plain text log files, or 'json'
+            for one JSON object per line on both.
+
+    Returns:
+        QueueListener: The running listener; it is stopped (and flushed) at exit.
+    """
+    global _listener
+    stop_logging()
+
+    if log_format == 'json':
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        # Console handler with Rich for colorful output
+        console_handler = RichHandler(rich_tracebacks=True)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))  # Rich handles formatting
     console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(message)s')  # Rich handles formatting
-    console_handler.setFormatter(console_formatter)
 
     # File handler for debug+ logs, rotating files
-    file_handler = RotatingFileHandler(
-        'app_debug.log', maxBytes=5*1024*1024, backupCount=3, encoding='utf-8'
-    )
+    file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=5*1024*1024, backupCount=3, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        '%(asctime)s [%(levelname)s][%(name)s]: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(file_formatter)
+    if log_format == 'json':
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s [%(levelname)s][%(name)s]: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
+        ))
 
-    # Root logger setup: logs INFO+ to console only
+    log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    # Root logger setup: every record goes through the queue; handlers filter by level.
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)  # Capture all levels; handlers filter
-    root_logger.handlers = []  # Remove any default handlers
-    root_logger.addHandler(console_handler)
-
-    # File logger: dedicated logger for file output (debug+)
-    file_logger = logging.getLogger('file_logger')
-    file_logger.setLevel(logging.DEBUG)
-    if not any(isinstance(h, RotatingFileHandler) for h in file_logger.handlers):
-        file_logger.addHandler(file_handler)
-
-    # Create your app loggers here with no extra handlers (inherit root handlers)
-    for name in [
-        'numifocus.main',
-        'numifocus.utils',
-        'numifocus.services',
-        'numifocus.db',
-        'numifocus.external'
-    ]:
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.DEBUG)  # Fine-grained control per module
-
-        # Avoid duplicate handlers if this runs multiple times
-        if logger.hasHandlers():
-            continue
-        # No handlers added: inherits console output from root
\ No newline at end of file
+    root_logger.setLevel(logging.DEBUG)
+    root_logger.handlers = [DeferredQueueHandler(log_queue)]
+
+    # App loggers have no handlers of their own and propagate to the root queue.
+    for name in ['numifocus.main', 'numifocus.utils', 'numifocus.services', 'numifocus.db', 'numifocus.external']:
+        logging.getLogger(name).setLevel(logging.DEBUG)
+    return _listener
+
+def stop_logging() -> None:
+    """Stops the queue listener after it has handled every queued record."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
@@ -1,22 +1,55 @@
-import os
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI
-import logging
-from .routes import router
 
-from logging_config import setup_logging
+from backend.constants import WATCH_LOCAL_INBOX
+from backend.logging_config import setup_logging, stop_logging
+from backend.routes import router
+from backend.utils.ocr import shutdown_ocr_executor
 
-if __name__ == "__main__":
-    # TODO: make shit work.
+logger = logging.getLogger('numifocus.main')
 
-    setup_logging()
+STARTED_AT = time.monotonic()
 
-    logger = logging.getLogger('numifocus.main')
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Owns the process-wide subsystems for the lifetime of the server.
+
+    Logging is set up here rather than when the module is imported, so importing the
+    app (e.g. in tests or tooling) doesn't start the log listener thread. Nothing
+    else heavy is started here: the Google clients, the OCR process pool and the
+    storage engines are all created on first use by their get_*() accessors, so the
+    server is accepting requests as soon as the routes are registered. With
+    WATCH_LOCAL_INBOX set, the local inbox is watched on a background thread. On
+    shutdown, the watcher and the OCR worker processes are stopped so they don't
+    outlive the server, and the log listener is flushed.
+    """
+    setup_logging()
     logger.info("Starting NumiFocus")
+    inbox = None
+    if WATCH_LOCAL_INBOX:
+        from backend.services.inbox.watcher import LocalInbox  # Only imported when the inbox is enabled.
+        inbox = LocalInbox()
+        inbox.start()
+    logger.info("[NumiFocus] Ready in %.3fs", time.monotonic() - STARTED_AT)
+    yield
+    if inbox is not None:
+        inbox.stop()
+    shutdown_ocr_executor()
+    logger.info("[NumiFocus] Shut down")
+    stop_logging()
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(router)
 
-    app = FastAPI()
-    app.include_router(router)
+@app.get("/")
+def root():
+    return {"message": "Hello from FastAPI!"}
 
-    @app.get("/")
-    def root():
-        return {"message": "Hello from FastAPI!"}
+@app.get("/health")
+def health():
+    """Liveness check; doesn't touch storage, OCR or Google APIs."""
+    return {"status": "ok", "uptime": round(time.monotonic() - STARTED_AT, 3)}
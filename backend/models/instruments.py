@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Literal, Optional, Tuple, TypedDict
+from typing import Any, Dict, List, Literal, Optional, Tuple, TypedDict
 
 ### Google Sheets uploaded instrument data literals ####
 ACCOUNT_OWNERS = Literal['Foster', 'Natalia', 'shared']
@@ -21,6 +21,38 @@ INSTRUMENT_TYPES = Literal[
 ]
 ACCOUNT_UPLOAD_KEY = Tuple[ACCOUNT_OWNERS, ACCOUNT_TYPES, str]
 
+class ProcessedFileRecord(TypedDict):
+    """Manifest entry for an uploaded transaction file that has already been processed.
+
+    Stored as one row of process_history.csv so duplicate checks and date filters
+    never need to download the file again.
+    """
+
+    account_owner: ACCOUNT_OWNERS
+    account_type: ACCOUNT_TYPES
+    file_id: str
+    date_processed: date
+    instrument: INSTRUMENT_TYPES
+    content_hash: str
+    md5_checksum: Optional[str]
+    modified_time: Optional[str]
+    activity_date_start: Optional[date]
+    activity_date_end: Optional[date]
+    row_count: int
+
+class QuarantinedTransactions(TypedDict):
+    """Rows of an uploaded file that failed validation, set aside instead of being imported.
+
+    Each transaction is the normalized record as far as it could be decoded, plus an
+    'errors' list describing what failed (see backend.utils.validation).
+    """
+
+    quarantine_id: str
+    account_type: ACCOUNT_TYPES
+    file_id: Optional[str]
+    quarantined_at: str
+    transactions: List[Dict[str, Any]]
+
 #### All financial instrument transaction data schemas. ####
 class TransactionSchema(TypedDict):
     """Abstract base class for financial transaction instruments."""
@@ -172,10 +204,10 @@ class IRAData(NormalizedTransactionSchema):
     ticker: Optional[str]
     description: str
     trans_code: Literal["ACH", "CDIV", "BUY", "SELL"]
-    quantity: float
-    price: float
-    credit: float
-    debit: float
+    quantity: Optional[float]
+    price: Optional[float]
+    credit: Optional[float]
+    debit: Optional[float]
 
 #### Instrument specific transaction schemas. ####
 # Chase.
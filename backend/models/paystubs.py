@@ -0,0 +1,25 @@
+from datetime import date
+from typing import Optional, TypedDict
+
+class PaystubData(TypedDict):
+    """Schema for a paystub PDF after text extraction.
+
+    Amounts are this period's values; ytd_gross_pay is the year-to-date column when
+    the stub prints one. Any field may be None when its line wasn't found.
+    """
+
+    paystub_id: str  # SHA-256 of the PDF bytes.
+    employer: Optional[str]
+    pay_date: Optional[date]
+    period_start: Optional[date]
+    period_end: Optional[date]
+    gross_pay: Optional[float]
+    net_pay: Optional[float]
+    federal_tax: Optional[float]
+    state_tax: Optional[float]
+    social_security: Optional[float]
+    medicare: Optional[float]
+    ytd_gross_pay: Optional[float]
+    page_count: int
+    ocr_pages: int  # Pages without a text layer that had to be OCR'd.
+    raw_text: str
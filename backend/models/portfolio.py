@@ -0,0 +1,28 @@
+from datetime import date
+from typing import List, Optional, TypedDict
+
+class Lot(TypedDict):
+    """The still open part of one purchase of a ticker."""
+
+    acquired: date
+    quantity: float
+    cost_basis: float  # Cost of the remaining quantity, fees included.
+
+class Position(TypedDict):
+    """A ticker held in one account, with FIFO cost basis and P&L.
+
+    market_price is the latest known price of the ticker (the last trade price unless
+    a price is supplied); market_value and unrealized_pnl are None without one.
+    """
+
+    account: str
+    ticker: str
+    quantity: float
+    cost_basis: float
+    average_cost: Optional[float]
+    realized_pnl: float  # Sale proceeds minus the FIFO cost of the lots sold.
+    dividend_income: float
+    market_price: Optional[float]
+    market_value: Optional[float]
+    unrealized_pnl: Optional[float]
+    lots: List[Lot]
@@ -0,0 +1,30 @@
+from datetime import date
+from typing import List, Optional, TypedDict
+
+from backend.models.instruments import ACCOUNT_TYPES
+
+class ReceiptLineItem(TypedDict):
+    """A single purchased item read from a receipt."""
+
+    description: str
+    quantity: Optional[float]
+    amount: float
+
+class ReceiptData(TypedDict):
+    """Schema for a receipt photo after OCR and field extraction.
+
+    Amounts are the values printed on the receipt; any of them may be None when the
+    OCR text didn't contain a recognizable line for it.
+    """
+
+    receipt_id: str  # SHA-256 of the uploaded image bytes.
+    merchant: Optional[str]
+    purchase_date: Optional[date]
+    line_items: List[ReceiptLineItem]
+    subtotal: Optional[float]
+    tax: Optional[float]
+    total: Optional[float]
+    raw_text: str
+    # Card/bank transaction the receipt was matched to, if any.
+    account_type: Optional[ACCOUNT_TYPES]
+    transaction_id: Optional[str]
@@ -1,34 +1,287 @@
+import hashlib
+import json
+import multiprocessing
 import os
+import logging
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import date
-from typing import Any, Callable, List, Literal, Mapping, Optional, Tuple, TypedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Mapping, Optional, Tuple, TypedDict, get_args
+
+from backend.constants import (
+    ACCOUNT_INSTRUMENTS, DRIVE_METADATA_FIELDS, SUB_ACCOUNT_INSTRUMENTS, UPLOADS_FIRST_ROW, UPLOADS_LAST_COLUMN,
+    UPLOADS_SHEET_KEY, UPLOADS_SYNC_STATE_PATH, UPLOADS_WORKSHEET
+)
+from backend.database.download_cache import DriveDownloadCache
+from backend.database.manifest import ProcessedFilesManifest
+from backend.database.quarantine import QuarantineStore
+from backend.database.storage import TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_OWNERS, ACCOUNT_TYPES, ACCOUNT_UPLOAD_KEY, INSTRUMENT_TYPES
+from backend.routes.google_api_client import GoogleAPIClient
+from backend.services.instruments.classifier import TransactionClassifier
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.normalized_transaction_instrument import NormalizedTransactionInstrument
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+from backend.services.instruments.transaction_instrument import TransactionInstrument
+from backend.services.receipts.matching import ReceiptMatcher
+from backend.utils.file_io import iter_csv_rows, iter_file_chunks, iter_hashed
+from backend.utils.metrics import StageMetrics, get_stage_metrics
+
+logger = logging.getLogger('numifocus.services')
+
+# Matches the file ID in Drive links such as https://drive.google.com/open?id=<ID> or /file/d/<ID>/view.
+DRIVE_FILE_ID_PATTERN = re.compile(r'(?:[?&]id=|/d/)([\w-]+)')
+
+# Splits file names and inbox paths into the words sub-account keywords are matched against.
+FILE_NAME_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+def is_routable(account_owner: ACCOUNT_OWNERS, account_type: ACCOUNT_TYPES) -> bool:
+    """Checks whether an owner has any account of an account type that uploads can be filed under."""
+    return (account_owner, account_type) in ACCOUNT_INSTRUMENTS or (account_owner, account_type) in SUB_ACCOUNT_INSTRUMENTS
+
+def account_instrument(
+        account_owner: ACCOUNT_OWNERS,
+        account_type: ACCOUNT_TYPES,
+        file_name: Optional[str] = None
+    ) -> Tuple[INSTRUMENT_TYPES, str]:
+    """Returns the instrument and normalized account an uploaded file is filed under.
+
+    Args:
+        account_owner: The owner the file was uploaded for.
+        account_type: The account type the file was uploaded for.
+        file_name: The uploaded file's name (or inbox path), which names the sub-account
+            when the owner has several accounts of the type (see SUB_ACCOUNT_INSTRUMENTS).
+
+    Raises:
+        ValueError: If the owner has no account of that type, or the file name doesn't
+            name exactly one of the owner's accounts of that type.
+    """
+    routed = ACCOUNT_INSTRUMENTS.get((account_owner, account_type))
+    if routed is not None:
+        return routed
+    sub_accounts = SUB_ACCOUNT_INSTRUMENTS.get((account_owner, account_type))
+    if sub_accounts is None:
+        raise ValueError(f"{account_owner} has no {account_type} account to route uploads to.")
+
+    words = FILE_NAME_WORD_PATTERN.findall((file_name or '').lower())
+    named = [keyword for keyword in sub_accounts if any(word.startswith(keyword) for word in words)]
+    if len(named) != 1:
+        keywords = ', '.join(sub_accounts)
+        raise ValueError(f"'{file_name}' must name exactly one of {account_owner}'s {account_type} accounts ({keywords}).")
+    return sub_accounts[named[0]]
 
 class ProcessTransactionData():
     """
     Contains a list of methods used for retrieving and processing financial instrument transactions data.
     """
 
-    def __init__(self):
-        pass
+    def __init__(
+            self,
+            client: Optional[GoogleAPIClient] = None,
+            manifest: Optional[ProcessedFilesManifest] = None,
+            verify_processed_files: bool = False,
+            storage: Optional[TransactionStorage] = None,
+            download_cache: Optional[DriveDownloadCache] = None,
+            classifier: Optional[TransactionClassifier] = None,
+            metrics: Optional[StageMetrics] = None,
+            quarantine: Optional[QuarantineStore] = None
+        ):
+        """
+        Args:
+            client: Google API client to use; one is created on first use if omitted.
+            manifest: Record of already processed files; defaults to process_history.csv.
+            verify_processed_files: Whether to compare Drive md5Checksum/modifiedTime before
+                skipping a processed file, at the cost of one metadata request per file.
+            storage: On-disk storage processed transactions are synced to; defaults to INSTRUMENT_DATA.
+            download_cache: Local cache of downloaded Drive files; defaults to DRIVE_CACHE.
+            classifier: Classifies newly imported cash transactions; trained from storage by default.
+            metrics: Records the duration of each ingestion stage per file; defaults to the process-wide metrics.
+            quarantine: Where rows that fail validation are set aside; defaults to QUARANTINE_DATA.
+        """
+        self._client = client
+        self.manifest = manifest if manifest is not None else ProcessedFilesManifest()
+        self.verify_processed_files = verify_processed_files
+        self.storage = storage if storage is not None else get_transaction_storage()
+        self.download_cache = download_cache if download_cache is not None else DriveDownloadCache()
+        self.classifier = classifier if classifier is not None else TransactionClassifier(self.storage)
+        self.metrics = metrics if metrics is not None else get_stage_metrics()
+        self.quarantine = quarantine if quarantine is not None else QuarantineStore()
+        self.instruments: Dict[ACCOUNT_TYPES, NormalizedTransactionInstrument] = {}
+        self._file_metadata: Dict[str, Mapping[str, Any]] = {}
+        self._uploads_spreadsheet = None
+        self._pending_uploads_state: Optional[Dict[str, Any]] = None
 
-    def fetch_uploaded_transcation_files():
-        # TODO: make this grab all transactions files from the NumiFocus Google Sheets document. Returned as a tuple [acount_owner, account_type, file_ID].
+    @property
+    def client(self) -> GoogleAPIClient:
+        """Google API client used for Drive and Sheets access, created on first use."""
+        if self._client is None:
+            self._client = GoogleAPIClient()
+        return self._client
 
-        pass
+    @property
+    def transaction_data(self) -> Dict[ACCOUNT_TYPES, ColumnarTransactionStore]:
+        """Transaction data processed in this session, by account type."""
+        return {account_type: instrument.data for account_type, instrument in self.instruments.items()}
+
+    def fetch_uploaded_transcation_files(self) -> List[ACCOUNT_UPLOAD_KEY]:
+        """Returns the transaction files uploaded through the Google Form since the last run.
+
+        The form's response sheet only ever grows, so rather than reading it in full this
+        fetches the bounded range starting at the last row seen (one values request). That
+        row's timestamp is compared with the stored one to detect deleted or edited
+        responses, in which case the whole sheet is rescanned once and the manifest
+        filters out files that were already processed.
+
+        The high-water mark only advances once the returned files have been processed
+        without failures (see process_retrieved_transactions_files).
+
+        Returns:
+            List[ACCOUNT_UPLOAD_KEY]: (account_owner, account_type, file_ID) for each new upload.
+        """
+        if not UPLOADS_SHEET_KEY:
+            logger.warning("[ProcessTransactionData] UPLOADS_SHEET_KEY is not set, no uploads to fetch")
+            return []
+
+        state = self._load_uploads_state()
+        last_row, last_timestamp = state.get('last_row'), state.get('last_timestamp')
+        first_row = last_row if last_row else UPLOADS_FIRST_ROW
+        rows = self._get_upload_rows(first_row)
+
+        if last_row:
+            if rows and rows[0] and rows[0][0] == last_timestamp:
+                rows = rows[1:]
+                first_row += 1
+            else:
+                logger.warning("[ProcessTransactionData] Upload row %s changed since the last sync, rescanning all uploads", last_row)
+                first_row = UPLOADS_FIRST_ROW
+                rows = self._get_upload_rows(first_row)
+
+        uploads = []
+        for row_number, row in enumerate(rows, start=first_row):
+            uploads.extend(self._parse_upload_row(row_number, row))
+
+        if rows:
+            self._pending_uploads_state = {'last_row': first_row + len(rows) - 1, 'last_timestamp': rows[-1][0] if rows[-1] else None}
+        logger.info("[ProcessTransactionData] Found %d new uploaded files in %d form responses", len(uploads), len(rows))
+        return uploads
+
+    def _get_upload_rows(self, first_row: int) -> List[List[str]]:
+        """Reads the response sheet from first_row to its last response, in a single request."""
+        if self._uploads_spreadsheet is None:
+            self._uploads_spreadsheet = self.client.get_spreadsheet_from_key(UPLOADS_SHEET_KEY)
+        response = self._uploads_spreadsheet.values_get(f"'{UPLOADS_WORKSHEET}'!A{first_row}:{UPLOADS_LAST_COLUMN}")
+        return response.get('values', [])
+
+    @staticmethod
+    def _parse_upload_row(row_number: int, row: List[str]) -> List[ACCOUNT_UPLOAD_KEY]:
+        """Converts a form response row into one upload key per attached Drive file."""
+        owners = {owner.lower(): owner for owner in get_args(ACCOUNT_OWNERS)}
+        account_types = {account_type.lower(): account_type for account_type in get_args(ACCOUNT_TYPES)}
+
+        _, account_owner, account_type, links = (row + [''] * 4)[:4]
+        account_owner = owners.get(account_owner.strip().lower())
+        account_type = account_types.get(account_type.strip().lower())
+        if account_owner is None or account_type is None:
+            logger.warning("[ProcessTransactionData] Skipping upload row %s with an unknown account: %s", row_number, row[1:3])
+            return []
+        if not is_routable(account_owner, account_type):
+            logger.error("[ProcessTransactionData] Skipping upload row %s: %s has no %s account", row_number, account_owner, account_type)
+            return []
+        return [(account_owner, account_type, file_ID) for file_ID in DRIVE_FILE_ID_PATTERN.findall(links)]
+
+    def _load_uploads_state(self) -> Dict[str, Any]:
+        """Reads the upload sheet high-water mark saved by the last successful sync."""
+        if not os.path.exists(UPLOADS_SYNC_STATE_PATH):
+            return {}
+        with open(UPLOADS_SYNC_STATE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_uploads_state(self) -> None:
+        """Persists the high-water mark reached by the last fetch_uploaded_transcation_files call."""
+        if self._pending_uploads_state is None:
+            return
+        with open(UPLOADS_SYNC_STATE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(self._pending_uploads_state, f)
+        self._pending_uploads_state = None
 
     def process_retrieved_transactions_files(
             self,
             transaction_files: List[Tuple[str, str, str]],
             date_start: Optional[date] = None,
             date_end: Optional[date] = None,
-            accounts: Optional[List[str]] = None
-        ) -> None:
+            accounts: Optional[List[str]] = None,
+            concurrency: Optional[int] = None
+        ) -> Dict[ACCOUNT_UPLOAD_KEY, Exception]:
         """Processes a list of transaction files, optionally filtering by date and account.
 
         If no filters are provided, only non-duplicate files (as determined by
         self.is_duplicate) will be processed. If any filter is set, only files
         that match the criteria will be processed, regardless of duplication status.
+
+        With concurrency set, up to that many files are downloaded at once on worker
+        threads while a process pool parses and normalizes the completed downloads.
+        Either way, a failing file is logged and skipped without affecting the others,
+        and results are always merged in the order the files were given.
+
+        Processed transactions are synced to storage once all files are merged. Only then
+        are the files recorded in the manifest (so a failed sync leaves them to be
+        processed again) and, if no file failed, does the upload sheet high-water mark advance.
+
+        Returns:
+            Dict[ACCOUNT_UPLOAD_KEY, Exception]: Files that failed to process.
         """
-        use_filters = any([date_start, date_end, accounts])        
+        selected_files = list(self._select_files(transaction_files, date_start, date_end, accounts))
+        failed: Dict[ACCOUNT_UPLOAD_KEY, Exception] = {}
+        if concurrency:
+            failed = self._process_files_concurrently(selected_files, concurrency)
+        else:
+            for transaction_file in selected_files:
+                try:
+                    data = self.process_file(transaction_file)
+                    if data is not None:
+                        self._add_transaction_data(transaction_file[1], data, transaction_file[2])
+                except Exception as e:
+                    self.manifest.discard([transaction_file[2]])
+                    failed[transaction_file] = e
+                    logger.error("[ProcessTransactionData] Failed to process file ID %s: %s", transaction_file[2], e, exc_info=True)
+
+        try:
+            self.sync_transaction_data()
+        except Exception:
+            self.manifest.discard()
+            raise
+        self.manifest.commit()
+        if not failed:
+            self._save_uploads_state()
+        return failed
+
+    def sync_transaction_data(self) -> None:
+        """Appends the transactions changed in this session to on-disk storage, then links
+        the new transactions to any unmatched receipts."""
+        with self.metrics.span('persist'):
+            for instrument in self.instruments.values():
+                instrument.sync_transaction_data()
+
+        matcher = ReceiptMatcher(storage=self.storage)
+        for account_type, instrument in self.instruments.items():
+            matcher.match_transactions(account_type, instrument)
+
+    def clear_session(self) -> None:
+        """Forgets the transactions processed so far, once synced, so a long-lived instance
+        (such as the local inbox's) doesn't keep every import in memory."""
+        self.instruments.clear()
+        self._file_metadata.clear()
+
+    def _select_files(
+            self,
+            transaction_files: List[Tuple[str, str, str]],
+            date_start: Optional[date] = None,
+            date_end: Optional[date] = None,
+            accounts: Optional[List[str]] = None
+        ) -> Iterator[Tuple[str, str, str]]:
+        """Yields the transaction files that should be processed under the given filters."""
+        use_filters = any([date_start, date_end, accounts])
 
         for transaction_file in transaction_files:
             # Skip already processed files unless filters are in use.
@@ -37,33 +290,260 @@ class ProcessTransactionData():
 
             # Extract values from the transaction file tuple.
             account_owner, account_type, file_ID = transaction_file
+            if not is_routable(account_owner, account_type):
+                logger.error("[ProcessTransactionData] Skipping file ID %s: %s has no %s account", file_ID, account_owner, account_type)
+                continue
 
             # If filters are active, apply them.
             if use_filters:
                 file_date_start, file_date_end = self._get_processed_file_date(transaction_file)
                 if date_start and file_date_end < date_start:
                     continue
-                if date_end and file_date_start < date_end:
+                if date_end and file_date_start > date_end:
                     continue
                 if accounts and account_type not in accounts:
                     continue
-                
-        # Process the file.
-        self.process_file(transaction_file)
 
-    def process_file(transaction_file: Tuple[str, str, str]) -> None:
-        # TODO: impletment logic for processing a transaction file.
-        # First we need to fetch the data using the GoogleDrive API. Based of the instrument we assign the data to a different TypedDict.
-        pass
+            yield transaction_file
 
-    def normalize_transaction_data(transaction_file: Tuple[str, str, str], )
-                 
-    def _is_processed(transaction_file: Tuple[str, str, str]) -> bool:
-        # TODO: implement logic for determining if transaction file has already been processed or not.
-        pass
+    def _process_files_concurrently(
+            self,
+            transaction_files: List[Tuple[str, str, str]],
+            concurrency: int
+        ) -> Dict[ACCOUNT_UPLOAD_KEY, Exception]:
+        """Downloads files on a bounded thread pool and normalizes them on a process pool.
+
+        Downloads are streamed to a temporary directory and the workers read them back from
+        there, so file contents are never held in memory or pickled between processes.
+        """
+        results: Dict[int, ColumnarTransactionStore] = {}
+        content_hashes: Dict[int, str] = {}
+        failed: Dict[ACCOUNT_UPLOAD_KEY, Exception] = {}
+        cpu_workers = min(concurrency, os.cpu_count() or 1)
+
+        # Spawn rather than fork: the server runs threads (event loop, logging listener, inbox
+        # watcher) that a forked child would inherit in an undefined state.
+        spawn = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory(prefix='numifocus-downloads-') as download_dir:
+            with ThreadPoolExecutor(max_workers=concurrency) as io_pool, ProcessPoolExecutor(max_workers=cpu_workers, mp_context=spawn) as cpu_pool:
+                paths = [os.path.join(download_dir, f'{index}.csv') for index in range(len(transaction_files))]
+                downloads = {
+                    io_pool.submit(self._download_file, transaction_file, path): index
+                    for index, (transaction_file, path) in enumerate(zip(transaction_files, paths))
+                }
+
+                normalizations = {}
+                for download in as_completed(downloads):
+                    index = downloads[download]
+                    try:
+                        content_hashes[index] = download.result()
+                    except Exception as e:
+                        failed[transaction_files[index]] = e
+                        continue
+                    file_name = self._file_name(transaction_files[index][2])
+                    normalizations[cpu_pool.submit(self._normalize_in_worker, transaction_files[index], paths[index], file_name)] = index
+
+                for normalization in as_completed(normalizations):
+                    index = normalizations[normalization]
+                    try:
+                        results[index], timings = normalization.result()
+                    except Exception as e:
+                        failed[transaction_files[index]] = e
+                        continue
+                    self.metrics.merge(transaction_files[index][2], timings)
+
+        # Merge in input order so the result doesn't depend on which worker finished first.
+        for index in sorted(results):
+            transaction_file = transaction_files[index]
+            try:
+                if self._record_processed_file(transaction_file, results[index], content_hashes[index]):
+                    self._add_transaction_data(transaction_file[1], results[index], transaction_file[2])
+            except Exception as e:
+                self.manifest.discard([transaction_file[2]])
+                failed[transaction_file] = e
+
+        for transaction_file, e in failed.items():
+            logger.error("[ProcessTransactionData] Failed to process file ID %s: %s", transaction_file[2], e, exc_info=e)
+        return failed
+
+    def _download_file(self, transaction_file: ACCOUNT_UPLOAD_KEY, path: str) -> str:
+        """Downloads an uploaded transaction file to path, hashing it as it's written; safe to
+        call from worker threads.
+
+        Returns:
+            str: The file's SHA-256 content hash.
+        """
+        content_hash = hashlib.sha256()
+        with self.metrics.span('download', transaction_file[2]), open(path, 'wb') as f:
+            for chunk in iter_hashed(self._iter_file_chunks(transaction_file[2]), content_hash):
+                f.write(chunk)
+        return content_hash.hexdigest()
+
+    def _iter_file_chunks(self, file_ID: str) -> Iterator[bytes]:
+        """Streams a file's content from the local download cache, or from Drive if it changed or isn't cached."""
+        return self.download_cache.iter_chunks(
+            file_ID,
+            self._get_file_metadata(file_ID),
+            lambda: self.client.iter_drive_file_chunks(file_ID)
+        )
+
+    def process_file(self, transaction_file: ACCOUNT_UPLOAD_KEY) -> Optional[ColumnarTransactionStore]:
+        """Streams an uploaded transaction file from Google Drive, normalizes it and stages its manifest entry.
+
+        Rows are parsed as the download progresses and normalized in bounded batches,
+        so large brokerage exports never need to be held in memory as raw text.
+
+        Returns:
+            Optional[ColumnarTransactionStore]: The normalized data, or None if the file's content
+            is identical to a file that was already processed.
+        """
+        account_owner, account_type, file_ID = transaction_file
+        logger.info("[ProcessTransactionData] Processing %s %s file ID %s", account_owner, account_type, file_ID)
+
+        # Download, parsing and normalization interleave; each span only counts its own stage's share.
+        content_hash = hashlib.sha256()
+        chunks = self.metrics.timed_iter(iter_hashed(self._iter_file_chunks(file_ID), content_hash), 'download', file_ID)
+        rows = self.metrics.timed_iter(iter_csv_rows(chunks), 'parse', file_ID)
+        with self.metrics.span('normalize', file_ID):
+            data = self.normalize_transaction_data(transaction_file, rows)
+        data.tag_source(file_ID)
+        return data if self._record_processed_file(transaction_file, data, content_hash.hexdigest()) else None
+
+    def normalize_transaction_data(
+            self,
+            transaction_file: ACCOUNT_UPLOAD_KEY,
+            rows: Iterable[Mapping[str, str]]
+        ) -> ColumnarTransactionStore:
+        """Normalizes the parsed rows of an uploaded file using its account's instrument."""
+        account_owner, account_type, file_ID = transaction_file
+        instrument_type, account = account_instrument(account_owner, account_type, self._file_name(file_ID))
+        return TransactionInstrument.normalize_stream(rows, instrument_type, account)
+
+    @staticmethod
+    def normalize_file_content(
+            transaction_file: ACCOUNT_UPLOAD_KEY,
+            chunks: Iterable[bytes],
+            metrics: Optional[StageMetrics] = None,
+            file_name: Optional[str] = None
+        ) -> ColumnarTransactionStore:
+        """Parses and normalizes an already downloaded transaction file, streamed as byte chunks.
+
+        file_name is the file's uploaded name, which picks the sub-account of owners with
+        several accounts of the file's account type.
+        """
+        metrics = metrics if metrics is not None else get_stage_metrics()
+        account_owner, account_type, file_ID = transaction_file
+        instrument_type, account = account_instrument(account_owner, account_type, file_name)
+        with metrics.span('normalize', file_ID):
+            rows = metrics.timed_iter(iter_csv_rows(chunks), 'parse', file_ID)
+            data = TransactionInstrument.normalize_stream(rows, instrument_type, account)
+        data.tag_source(file_ID)
+        return data
+
+    @staticmethod
+    def _normalize_in_worker(
+            transaction_file: ACCOUNT_UPLOAD_KEY,
+            path: str,
+            file_name: Optional[str]
+        ) -> Tuple[ColumnarTransactionStore, Dict[str, float]]:
+        """Process pool entry point: normalizes a downloaded file and returns it with its stage
+        timings, which the parent merges into its own metrics."""
+        metrics = StageMetrics()
+        data = ProcessTransactionData.normalize_file_content(transaction_file, iter_file_chunks(path), metrics, file_name)
+        return data, metrics.file_timings(transaction_file[2])
+
+    def _add_transaction_data(
+            self,
+            account_type: ACCOUNT_TYPES,
+            data: ColumnarTransactionStore,
+            file_ID: Optional[str] = None
+        ) -> None:
+        """Validates and classifies newly normalized data and hash-merges it into the session's
+        instrument for its account type.
+
+        Rows that fail validation are quarantined rather than failing the file. Stored
+        history isn't loaded here: re-imported transactions are written as new versions
+        and resolved by transaction ID when storage is read.
+        """
+        with self.metrics.span('validate', file_ID):
+            data = self._quarantine_invalid_rows(account_type, data, file_ID)
+        with self.metrics.span('normalize', file_ID):
+            self.classifier.classify(data)
+        with self.metrics.span('dedupe', file_ID):
+            incoming = INSTRUMENT_CLASSES[account_type](data, self.storage)
+            existing = self.instruments.get(account_type)
+            if existing is None:
+                incoming.dedupe()
+                self.instruments[account_type] = incoming
+            else:
+                existing.merge_transaction_data(existing, incoming)
+
+    def _quarantine_invalid_rows(
+            self,
+            account_type: ACCOUNT_TYPES,
+            data: ColumnarTransactionStore,
+            file_ID: Optional[str]
+        ) -> ColumnarTransactionStore:
+        """Moves the rows of data that fail validation to the quarantine store and returns the rest."""
+        result = INSTRUMENT_CLASSES[account_type].validate_batch(data)
+        invalid = result.invalid_rows
+        if not len(invalid):
+            return data
+        self.quarantine.quarantine(account_type, file_ID, data, result, invalid)
+        logger.warning("[ProcessTransactionData] Quarantined %d of %d %s rows from file ID %s: %s", len(invalid), len(data), account_type, file_ID, result.counts())
+        return data.take(result.valid)
+
+    def _record_processed_file(
+            self,
+            transaction_file: ACCOUNT_UPLOAD_KEY,
+            data: ColumnarTransactionStore,
+            content_hash: str
+        ) -> bool:
+        """Stages a processed file's manifest entry, which is committed once its transactions are synced.
+
+        Returns:
+            bool: False if another file with identical content had already been processed.
+        """
+        account_owner, account_type, file_ID = transaction_file
+        original = self.manifest.find_by_hash(content_hash)
+        instrument_type, _ = account_instrument(account_owner, account_type, self._file_name(file_ID))
+        self.manifest.stage(transaction_file, instrument_type, content_hash, data, self._get_file_metadata(file_ID))
+
+        if original is not None and original['file_id'] != file_ID:
+            logger.info("[ProcessTransactionData] File ID %s is identical to file ID %s, skipping", file_ID, original['file_id'])
+            return False
+        return True
 
-    def _get_processed_file_date(transaction_file: Tuple[str, str, str]) -> Tuple[date, date]:
-        # TODO: implement logic for retrieving a processed files start and end dates.
-        pass 
+    def _is_duplicate(self, transaction_file: Tuple[str, str, str]) -> bool:
+        """Checks whether a transaction file was already processed and hasn't changed since."""
+        if not self._is_processed(transaction_file):
+            return False
+        if not self.verify_processed_files:
+            return True
+        return self.manifest.is_unchanged(transaction_file[2], self._get_file_metadata(transaction_file[2]))
 
-    def _rename_transaction_files():
\ No newline at end of file
+    def _is_processed(self, transaction_file: Tuple[str, str, str]) -> bool:
+        """Checks whether a transaction file is recorded in the processed files manifest."""
+        return transaction_file[2] in self.manifest
+
+    def _get_processed_file_date(self, transaction_file: Tuple[str, str, str]) -> Tuple[date, date]:
+        """Returns a processed file's activity date range, or an unbounded range if it's unknown."""
+        date_range = self.manifest.date_range(transaction_file[2])
+        if not date_range or None in date_range:
+            return date.min, date.max
+        return date_range
+
+    def _get_file_metadata(self, file_ID: str) -> Optional[Mapping[str, Any]]:
+        """Retrieves (and caches) the Drive checksum and modification time of a file."""
+        if file_ID not in self._file_metadata:
+            self._file_metadata[file_ID] = self.client.get_drive_file_metadata(file_ID, fields=DRIVE_METADATA_FIELDS)
+        return self._file_metadata[file_ID]
+
+    def _file_name(self, file_ID: str) -> Optional[str]:
+        """Returns a file's name on Drive, which names its sub-account (see account_instrument)."""
+        metadata = self._get_file_metadata(file_ID)
+        return metadata.get('name') if metadata else None
+
+    def _rename_transaction_files(self):
+        # TODO: implement logic for renaming processed transaction files on Google Drive.
+        pass
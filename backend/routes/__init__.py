@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+from backend.routes import metrics, paystubs, receipts, transactions
+
+router = APIRouter()
+router.include_router(metrics.router)
+router.include_router(paystubs.router)
+router.include_router(receipts.router)
+router.include_router(transactions.router)
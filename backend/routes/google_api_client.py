@@ -1,90 +1,73 @@
-import os
 import io
 import logging
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from typing import Dict, Iterator, Optional
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
-import gspread
 
-# Configure module-specific logger.
-logger = logging.getLogger("GoogleAPIClient")
-handler = logging.StreamHandler()
-formatter = logging.Formatter("[%(levelname)s] %(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+from backend.constants import DRIVE_CHUNK_SIZE
+from backend.utils.file_io import iter_csv_rows
+from backend.utils.google_cloud_api import GoogleClientPool, get_client_pool
+
+logger = logging.getLogger('numifocus.external')
 
 class GoogleAPIClient:
     """
     Encapsulates authentication and client generation for Google APIs.
+
+    Credentials and the underlying service clients come from a process-wide
+    GoogleClientPool, so instances are cheap to create and safe to share across
+    threads: each thread transparently uses its own HTTP transport.
     """
-    def __init__(self):
+    def __init__(self, pool: Optional[GoogleClientPool] = None):
         self.logger = logger
-        self.scopes = [s.strip() for s in os.environ.get("SCOPES", "").split(",") if s.strip()]
-        self.token_path = os.environ.get("TOKEN")
-        self.credentials_path = os.environ.get("CREDENTIALS")
-        self.creds = self._get_credentials()
-
-        self.drive_service = self.get_drive_service()
-        self.gspread_client = self.get_gspread_client()
-
-    def _get_credentials(self):
-        self.logger.info("[GoogleAPIClient] Loading credentials")
-        creds = None
-        if self.token_path and os.path.exists(self.token_path):
-            creds = Credentials.from_authorized_user_file(self.token_path, self.scopes)
-
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                self.logger.info("[GoogleAPIClient] Refreshing expired credentials")
-                creds.refresh(Request())
-            else:
-                self.logger.info("[GoogleAPIClient] Starting OAuth flow for new credentials")
-                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, self.scopes)
-                creds = flow.run_local_server(port=0)
-                with open(self.token_path, "w") as token:
-                    token.write(creds.to_json())
-
-        self.logger.info("[GoogleAPIClient] Credentials are ready")
-        return creds
+        self.pool = pool if pool is not None else get_client_pool()
+
+    @property
+    def creds(self):
+        """Shared OAuth credentials, refreshed once per expiry across all threads."""
+        return self.pool.credentials
+
+    @property
+    def drive_service(self):
+        """The calling thread's Google Drive service client."""
+        return self.get_drive_service()
+
+    @property
+    def gspread_client(self):
+        """The calling thread's gspread client."""
+        return self.get_gspread_client()
 
     def get_drive_service(self):
-        """Builds and returns the Google Drive service client."""
+        """Returns the calling thread's Google Drive service client, building it on first use."""
         try:
-            service = build("drive", "v3", credentials=self.creds)
-            self.logger.info("[GoogleAPIClient] Drive service client created")
-            return service
+            return self.pool.drive_service
         except HttpError as e:
-            self.logger.error(f"[GoogleAPIClient] Failed to build Drive service: {e}")
+            self.logger.error("[GoogleAPIClient] Failed to build Drive service: %s", e)
             return None
 
     def get_gspread_client(self):
-        """Authorizes and returns a gspread client for Google Sheets."""
+        """Returns the calling thread's gspread client for Google Sheets, authorizing it on first use."""
         try:
-            client = gspread.authorize(self.creds)
-            self.logger.info("[GoogleAPIClient] gspread client created")
-            return client
+            return self.pool.gspread_client
         except HttpError as e:
-            self.logger.error(f"[GoogleAPIClient] Failed to authorize gspread client: {e}")
+            self.logger.error("[GoogleAPIClient] Failed to authorize gspread client: %s", e)
             return None
 
     def get_spreadsheet_from_key(self, sheet_key):
         """Retrieves a Google Spreadsheet using its key."""
         return self.gspread_client.open_by_key(sheet_key)
 
-    def get_drive_file_metadata(self, file_id):
-        """Retrieves metadata for a file on Google Drive."""
+    def get_drive_file_metadata(self, file_id, fields=None):
+        """Retrieves metadata for a file on Google Drive, optionally limited to a comma-separated list of fields."""
         if not self.drive_service:
             return None
         try:
-            metadata = self.drive_service.files().get(fileId=file_id).execute()
-            logger.info(f"[GoogleAPIClient] Retrieved metadata for file ID {file_id}")
+            request = self.drive_service.files().get(fileId=file_id, fields=fields) if fields else self.drive_service.files().get(fileId=file_id)
+            metadata = request.execute()
+            logger.info("[GoogleAPIClient] Retrieved metadata for file ID %s", file_id)
             return metadata
         except HttpError as e:
-            logger.error(f"[GoogleAPIClient] Error retrieving file metadata: {e}")
+            logger.error("[GoogleAPIClient] Error retrieving file metadata: %s", e)
             return None
 
     def get_drive_file(self, file_id):
@@ -96,9 +79,33 @@ class GoogleAPIClient:
         done = False
         while not done:
             status, done = downloader.next_chunk()
-            logger.info(f"[GoogleAPIClient] Downloading file ID {file_id} {int(status.progress() * 100)}%.")
+            logger.debug("[GoogleAPIClient] Downloading file ID %s %d%%", file_id, status.progress() * 100)
 
         fh.seek(0)  # reset stream position to start
 
         file_content = fh.read().decode('utf-8')
         return file_content
+
+    def iter_drive_file_chunks(self, file_id, chunksize=DRIVE_CHUNK_SIZE) -> Iterator[bytes]:
+        """Downloads a file on Google Drive chunk by chunk, yielding each chunk's bytes as it arrives.
+
+        The download buffer is emptied after every chunk, so at most one chunk is held in memory.
+        """
+        request = self.drive_service.files().get_media(fileId=file_id)
+        fh = io.BytesIO()
+
+        downloader = MediaIoBaseDownload(fh, request, chunksize=chunksize)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+            logger.debug("[GoogleAPIClient] Downloading file ID %s %d%%", file_id, status.progress() * 100)
+
+            chunk = fh.getvalue()
+            fh.seek(0)
+            fh.truncate()
+            if chunk:
+                yield chunk
+
+    def iter_drive_file_rows(self, file_id, chunksize=DRIVE_CHUNK_SIZE) -> Iterator[Dict[str, str]]:
+        """Streams a CSV file on Google Drive, yielding parsed rows as soon as their bytes are downloaded."""
+        return iter_csv_rows(self.iter_drive_file_chunks(file_id, chunksize))
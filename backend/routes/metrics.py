@@ -0,0 +1,13 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+from backend.utils.metrics import get_stage_metrics
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+@router.get("/ingestion")
+def ingestion_metrics() -> Dict[str, Any]:
+    """Returns the time spent in each ingestion stage (download, parse, normalize, validate, dedupe, persist),
+    in total and per file ID."""
+    return get_stage_metrics().snapshot()
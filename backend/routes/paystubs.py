@@ -1,7 +1,27 @@
-from fastapi import APIRouter
+from typing import Any, Dict, List
 
-router = APIRouter
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from backend.services.paystubs.pdf_extraction import extract_paystubs
+
+router = APIRouter()
+
+MAX_BULK_PAYSTUBS = 200
 
 @router.get("/api/hello")
 def say_hello():
     return {"message": "Hello from the API!"}
+
+@router.post("/api/paystubs/bulk", tags=["paystubs"])
+async def upload_paystubs(files: List[UploadFile] = File(...)) -> List[Dict[str, Any]]:
+    """Extracts a batch of paystub PDFs concurrently, reporting a result or error per file."""
+    if len(files) > MAX_BULK_PAYSTUBS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_PAYSTUBS} paystubs can be uploaded at once.")
+
+    pdfs = [await file.read() for file in files]
+    results = await run_in_threadpool(extract_paystubs, pdfs)
+    return [
+        {"filename": file.filename, "error": str(result)} if isinstance(result, Exception) else {"filename": file.filename, "paystub": result}
+        for file, result in zip(files, results)
+    ]
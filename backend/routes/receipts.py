@@ -0,0 +1,37 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from backend.database.receipts import ReceiptStore
+from backend.services.receipts.matching import ReceiptMatcher
+from backend.services.receipts.receipt_ocr import ocr_receipts_async
+
+router = APIRouter(prefix="/api/receipts", tags=["receipts"])
+
+MAX_BULK_RECEIPTS = 100
+
+@router.post("/bulk")
+async def upload_receipts(files: List[UploadFile] = File(...)) -> List[Dict[str, Any]]:
+    """OCRs a batch of receipt photos in parallel, stores the extracted receipts and
+    links them to matching transactions.
+
+    Each photo gets its own result, so one unreadable photo doesn't fail the batch.
+    """
+    if len(files) > MAX_BULK_RECEIPTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_RECEIPTS} receipts can be uploaded at once.")
+
+    images = [await file.read() for file in files]
+    results = await ocr_receipts_async(images)
+
+    store = ReceiptStore()
+    receipts = [result for result in results if not isinstance(result, Exception)]
+    for receipt in receipts:
+        await run_in_threadpool(store.save, receipt)
+    # Link the new receipts to already imported card/bank transactions (updates the receipts in place).
+    await run_in_threadpool(ReceiptMatcher(store).match_receipts, receipts)
+
+    return [
+        {"filename": file.filename, "error": str(result)} if isinstance(result, Exception) else {"filename": file.filename, "receipt": result}
+        for file, result in zip(files, results)
+    ]
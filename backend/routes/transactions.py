@@ -0,0 +1,91 @@
+import json
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from backend.models.instruments import ACCOUNT_TYPES
+from backend.services.instruments.transaction_queries import get_transaction_queries
+
+router = APIRouter(prefix="/api/transactions", tags=["transactions"])
+
+MAX_PAGE_SIZE = 5000
+
+@router.get("/{account_type}")
+async def list_transactions(
+    account_type: ACCOUNT_TYPES,
+    date_start: Optional[date] = None,
+    date_end: Optional[date] = None,
+    account: Optional[List[str]] = Query(None),
+    classification: Optional[List[str]] = Query(None),
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Lists transactions ordered by activity date, one keyset-paginated page at a time.
+
+    Pass the returned next_cursor back as cursor to fetch the following page.
+    """
+    filters = dict(date_start=date_start, date_end=date_end, accounts=account, classifications=classification)
+    try:
+        page = await run_in_threadpool(get_transaction_queries().page, account_type, limit, cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"transactions": page.records, "next_cursor": page.next_cursor}
+
+@router.get("/{account_type}/export")
+async def export_transactions(
+    account_type: ACCOUNT_TYPES,
+    date_start: Optional[date] = None,
+    date_end: Optional[date] = None,
+    account: Optional[List[str]] = Query(None),
+    classification: Optional[List[str]] = Query(None)
+) -> StreamingResponse:
+    """Streams every matching transaction as NDJSON, for ranges too large to page through."""
+    try:
+        get_transaction_queries().check_filters(account_type, account, classification)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    batches = get_transaction_queries().iter_batches(
+        account_type, date_start=date_start, date_end=date_end, accounts=account, classifications=classification
+    )
+
+    async def ndjson() -> AsyncIterator[str]:
+        async for records in iterate_in_threadpool(batches):
+            yield ''.join(json.dumps(record, default=date.isoformat) + '\n' for record in records)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get("/{account_type}/totals")
+async def transaction_totals(
+    account_type: ACCOUNT_TYPES,
+    group_by: Optional[Literal["classification", "account", "month"]] = None,
+    date_start: Optional[date] = None,
+    date_end: Optional[date] = None,
+    account: Optional[List[str]] = Query(None),
+    classification: Optional[List[str]] = Query(None)
+) -> Dict[str, Dict[str, float]]:
+    """Sums credits, debits and net amounts per classification, account or month.
+
+    Groups by classification by default, or by month for instruments without classifications.
+    """
+    try:
+        return await run_in_threadpool(
+            get_transaction_queries().totals, account_type, group_by, date_start, date_end, account, classification
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{account_type}/balances")
+async def running_balances(
+    account_type: ACCOUNT_TYPES,
+    account: Optional[str] = None,
+    date_start: Optional[date] = None,
+    date_end: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Returns end-of-day running balances, optionally for a single account."""
+    try:
+        return await run_in_threadpool(get_transaction_queries().running_balances, account_type, account, date_start, date_end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,47 @@
+from typing import NamedTuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 60  # Trading days of features the model sees per sample.
+HORIZON = 5  # Trading days ahead the model predicts the log return for.
+VOLATILITY_WINDOWS = (5, 20)
+FEATURE_NAMES = ('log_return',) + tuple(f'volatility_{days}' for days in VOLATILITY_WINDOWS)
+WARMUP = max(VOLATILITY_WINDOWS)  # Bars before the first complete row of features.
+FIRST_WINDOW_END = WARMUP + WINDOW - 1  # Bar index the first window ends on.
+
+class TickerWindows(NamedTuple):
+    """Every model sample of one ticker's price history."""
+
+    ticker: str
+    dates: np.ndarray  # datetime64[D] of the bar each window ends on.
+    windows: np.ndarray  # (samples, features, WINDOW) read-only strided view over the daily features.
+    targets: np.ndarray  # Log return over the HORIZON bars after each window; NaN when that's in the future.
+
+def daily_features(close: np.ndarray) -> np.ndarray:
+    """Returns one row of FEATURE_NAMES per bar from WARMUP on: the log return into the bar
+    and the standard deviation of log returns over each VOLATILITY_WINDOWS span ending at it."""
+    returns = np.diff(np.log(close))
+    columns = [returns[WARMUP - 1:]]
+    for days in VOLATILITY_WINDOWS:
+        columns.append(sliding_window_view(returns, days).std(axis=1)[WARMUP - days:])
+    return np.stack(columns, axis=1).astype(np.float32)
+
+def ticker_windows(ticker: str, bars: np.ndarray, window: int = WINDOW, horizon: int = HORIZON) -> TickerWindows:
+    """Builds a ticker's samples from its BAR_DTYPE history.
+
+    The daily features are computed once; every sample is then a window into them
+    produced by sliding_window_view, so consecutive windows share memory instead of
+    being copied out one by one.
+    """
+    close = np.asarray(bars['close'], dtype=np.float64)
+    if len(close) < FIRST_WINDOW_END + 1:
+        return TickerWindows(ticker, np.empty(0, dtype='datetime64[D]'), np.empty((0, len(FEATURE_NAMES), window), dtype=np.float32), np.empty(0, dtype=np.float32))
+
+    windows = sliding_window_view(daily_features(close), window, axis=0)
+    ends = WARMUP + window - 1 + np.arange(len(windows))
+    log_close = np.log(close)
+    targets = np.full(len(windows), np.nan, dtype=np.float32)
+    known = ends + horizon < len(close)
+    targets[known] = log_close[ends[known] + horizon] - log_close[ends[known]]
+    return TickerWindows(ticker, np.asarray(bars['date'])[ends], windows, targets)
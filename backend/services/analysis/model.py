@@ -0,0 +1,134 @@
+import os
+import tempfile
+import zlib
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.analysis.features import FEATURE_NAMES, WINDOW
+
+HIDDEN_UNITS = 32
+BATCH_SIZE = 4096  # Windows per forward pass when scoring.
+TRAINING_BATCH_SIZE = 256
+
+class WindowModel:
+    """A one hidden layer network over (features x WINDOW) windows, predicting the HORIZON return.
+
+    Runs entirely on NumPy. The first layer is a tensordot over each batch of
+    windows, so scoring consumes the strided window views from features.py directly;
+    input standardization is folded into the first layer's weights at inference
+    time rather than applied to (and copying) the windows.
+    """
+
+    PARAMETERS = ('w1', 'b1', 'w2', 'b2', 'mean', 'scale')
+
+    def __init__(self, parameters: Optional[Dict[str, np.ndarray]] = None, hidden_units: int = HIDDEN_UNITS, seed: int = 0):
+        if parameters is None:
+            rng = np.random.default_rng(seed)
+            fan_in = len(FEATURE_NAMES) * WINDOW
+            parameters = {
+                'w1': (rng.standard_normal((len(FEATURE_NAMES), WINDOW, hidden_units)) / np.sqrt(fan_in)).astype(np.float32),
+                'b1': np.zeros(hidden_units, dtype=np.float32),
+                'w2': (rng.standard_normal(hidden_units) / np.sqrt(hidden_units)).astype(np.float32),
+                'b2': np.zeros(1, dtype=np.float32),
+                'mean': np.zeros(len(FEATURE_NAMES), dtype=np.float32),
+                'scale': np.ones(len(FEATURE_NAMES), dtype=np.float32),
+            }
+        self.parameters = parameters
+
+    @property
+    def version(self) -> str:
+        """Checksum of the parameters, identifying which model produced a score."""
+        checksum = 0
+        for name in self.PARAMETERS:
+            checksum = zlib.crc32(np.ascontiguousarray(self.parameters[name]).tobytes(), checksum)
+        return f'{checksum:08x}'
+
+    def predict(self, windows: np.ndarray, batch_size: int = BATCH_SIZE) -> np.ndarray:
+        """Scores (samples, features, WINDOW) windows in batches; windows with missing features score NaN."""
+        p = self.parameters
+        w1 = p['w1'] / p['scale'][:, None, None]
+        b1 = p['b1'] - np.tensordot(p['mean'] / p['scale'], p['w1'].sum(axis=1), axes=1)
+        scores = np.empty(len(windows), dtype=np.float32)
+        for start in range(0, len(windows), batch_size):
+            batch = windows[start:start + batch_size]
+            hidden = np.tanh(np.tensordot(batch, w1, axes=([1, 2], [0, 1])) + b1)
+            scores[start:start + batch_size] = hidden @ p['w2'] + p['b2'][0]
+        return scores
+
+    def fit(
+        self,
+        samples: Sequence[Tuple[np.ndarray, np.ndarray]],
+        epochs: int = 5,
+        batch_size: int = TRAINING_BATCH_SIZE,
+        learning_rate: float = 1e-3,
+        seed: int = 0
+    ) -> float:
+        """Trains on (windows, targets) pairs, e.g. one per ticker, with Adam on mean squared error.
+
+        Only windows with finite features and a known target are used. Batches are
+        gathered from the window views as they're drawn, so the training set is never
+        materialized as one array.
+
+        Returns:
+            float: Mean squared error of the last epoch.
+        """
+        rows = [np.flatnonzero(np.isfinite(targets) & np.isfinite(windows).all(axis=(1, 2))) for windows, targets in samples]
+        owners = np.concatenate([np.full(len(row), index) for index, row in enumerate(rows)]) if rows else np.empty(0, dtype=np.int64)
+        positions = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        if not len(positions):
+            raise ValueError("No complete windows with known targets to train on.")
+
+        # Standardize with the statistics of the daily feature rows (each window's last column).
+        p = self.parameters
+        features = np.concatenate([windows[:, :, -1] for windows, _ in samples])
+        scale = np.nanstd(features, axis=0)
+        p['mean'] = np.nanmean(features, axis=0).astype(np.float32)
+        p['scale'] = np.where(scale > 0, scale, 1.0).astype(np.float32)
+
+        rng = np.random.default_rng(seed)
+        trained = ('w1', 'b1', 'w2', 'b2')
+        moments = {name: (np.zeros_like(p[name]), np.zeros_like(p[name])) for name in trained}
+        step, loss = 0, float('nan')
+        for _ in range(epochs):
+            order = rng.permutation(len(positions))
+            losses = []
+            for start in range(0, len(order), batch_size):
+                picked = order[start:start + batch_size]
+                x = np.stack([samples[owner][0][position] for owner, position in zip(owners[picked], positions[picked])])
+                y = np.array([samples[owner][1][position] for owner, position in zip(owners[picked], positions[picked])], dtype=np.float32)
+                x = (x - p['mean'][None, :, None]) / p['scale'][None, :, None]
+
+                hidden = np.tanh(np.tensordot(x, p['w1'], axes=([1, 2], [0, 1])) + p['b1'])
+                error = hidden @ p['w2'] + p['b2'][0] - y
+                losses.append(float(np.mean(error ** 2)))
+
+                d_out = 2 * error / len(y)
+                d_hidden = np.outer(d_out, p['w2']) * (1 - hidden ** 2)
+                gradients = {
+                    'w1': np.tensordot(x, d_hidden, axes=([0], [0])),
+                    'b1': d_hidden.sum(axis=0),
+                    'w2': hidden.T @ d_out,
+                    'b2': np.array([d_out.sum()]),
+                }
+                step += 1
+                for name in trained:
+                    first, second = moments[name]
+                    first[...] = 0.9 * first + 0.1 * gradients[name]
+                    second[...] = 0.999 * second + 0.001 * gradients[name] ** 2
+                    update = learning_rate * (first / (1 - 0.9 ** step)) / (np.sqrt(second / (1 - 0.999 ** step)) + 1e-8)
+                    p[name] = (p[name] - update).astype(np.float32)
+            loss = float(np.mean(losses))
+        return loss
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.npz', delete=False) as f:
+            np.savez(f, **self.parameters)
+        os.replace(f.name, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'WindowModel':
+        with np.load(path) as stored:
+            return cls({name: stored[name] for name in cls.PARAMETERS})
@@ -0,0 +1,139 @@
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.constants import MODEL_DATA_DIR
+from backend.database.prices import PriceHistoryStore, get_price_store
+from backend.database.storage import TransactionStorage
+from backend.services.analysis.features import ticker_windows
+from backend.services.analysis.model import WindowModel
+from backend.services.portfolio.positions import PositionEngine
+
+logger = logging.getLogger('numifocus.services')
+
+MODEL_FILENAME = 'window_model.npz'
+SCORES_DIRNAME = 'scores'
+SCORED_ACCOUNT_TYPES = ('investing', 'IRA')
+
+class TickerScores(NamedTuple):
+    """Model scores of every window of a ticker's history."""
+
+    dates: np.ndarray  # datetime64[D] of the bar each scored window ends on.
+    scores: np.ndarray  # Predicted log return over the following HORIZON bars.
+
+class TickerScorer:
+    """Trains the window model and scores tickers' price histories with it.
+
+    Scores are cached per ticker together with the model version, the number of
+    bars scored and a checksum of those bars. As long as the model is unchanged and
+    the history has only been appended to since (the checksum of the previously
+    scored bars still matches), only the windows ending on new bars are scored.
+    """
+
+    def __init__(self, prices: Optional[PriceHistoryStore] = None, root: str = MODEL_DATA_DIR):
+        self.prices = prices if prices is not None else get_price_store()
+        self.root = root
+        self._model: Optional[WindowModel] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.root, MODEL_FILENAME)
+
+    @property
+    def model(self) -> WindowModel:
+        """The trained model, loaded from MODEL_DATA on first use."""
+        with self._lock:
+            if self._model is None:
+                if not os.path.exists(self.model_path):
+                    raise FileNotFoundError(f"No trained model at {self.model_path}; run TickerScorer.train first.")
+                self._model = WindowModel.load(self.model_path)
+            return self._model
+
+    def train(self, tickers: Iterable[str], epochs: int = 5) -> float:
+        """Trains a new model on the given tickers' histories and saves it, invalidating cached scores.
+
+        Returns:
+            float: Mean squared error of the last epoch.
+        """
+        samples = []
+        for ticker in tickers:
+            windows = ticker_windows(ticker, self.prices.bars(ticker))
+            samples.append((windows.windows, windows.targets))
+        model = WindowModel()
+        loss = model.fit(samples, epochs=epochs)
+        model.save(self.model_path)
+        with self._lock:
+            self._model = model
+        logger.info("[TickerScorer] Trained model %s on %d tickers, loss %.6f", model.version, len(samples), loss)
+        return loss
+
+    def score(self, tickers: Iterable[str]) -> Dict[str, TickerScores]:
+        """Scores every window of each ticker's history, reusing cached scores of unchanged windows."""
+        model = self.model
+        results = {}
+        reused = scored = 0
+        for ticker in tickers:
+            bars = self.prices.bars(ticker)
+            samples = ticker_windows(ticker, bars)
+            cached = self._read_scores(ticker)
+            keep = 0
+            if cached is not None and cached['model'] == model.version and cached['bars'] <= len(bars):
+                if _checksum(bars[:cached['bars']]) == cached['checksum']:
+                    keep = min(len(cached['scores']), len(samples.dates))
+            # A window's score only depends on bars up to its end, so cached windows stay valid.
+            new_scores = model.predict(samples.windows[keep:])
+            scores = np.concatenate([cached['scores'][:keep] if keep else np.empty(0, dtype=np.float32), new_scores])
+            reused, scored = reused + keep, scored + len(new_scores)
+            self._save_scores(ticker, model.version, bars, scores)
+            results[ticker] = TickerScores(samples.dates, scores)
+        logger.info("[TickerScorer] Scored %s new windows and reused %s across %d tickers", scored, reused, len(results))
+        return results
+
+    def latest_scores(self, tickers: Iterable[str]) -> Dict[str, Tuple[np.datetime64, float]]:
+        """Returns the score of each ticker's most recent window, with the date it ends on."""
+        return {
+            ticker: (scores.dates[-1], float(scores.scores[-1]))
+            for ticker, scores in self.score(tickers).items() if len(scores.scores)
+        }
+
+    def _scores_path(self, ticker: str) -> str:
+        return os.path.join(self.root, SCORES_DIRNAME, f'{ticker.upper()}.npz')
+
+    def _read_scores(self, ticker: str) -> Optional[dict]:
+        path = self._scores_path(ticker)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as cached:
+            return {
+                'model': str(cached['model']),
+                'bars': int(cached['bars']),
+                'checksum': int(cached['checksum']),
+                'scores': cached['scores'],
+            }
+
+    def _save_scores(self, ticker: str, model_version: str, bars: np.ndarray, scores: np.ndarray) -> None:
+        directory = os.path.dirname(self._scores_path(ticker))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.npz', delete=False) as f:
+            np.savez(f, model=model_version, bars=len(bars), checksum=_checksum(bars), scores=scores)
+        os.replace(f.name, self._scores_path(ticker))
+
+def _checksum(bars: np.ndarray) -> int:
+    return zlib.crc32(np.ascontiguousarray(bars).tobytes())
+
+def held_tickers(storage: Optional[TransactionStorage] = None) -> List[str]:
+    """Returns the tickers currently held in the investing and IRA accounts."""
+    engine = PositionEngine(storage)
+    return sorted({position['ticker'].upper() for account_type in SCORED_ACCOUNT_TYPES for position in engine.positions(account_type)})
+
+def score_held_tickers(scorer: Optional[TickerScorer] = None, storage: Optional[TransactionStorage] = None) -> Dict[str, TickerScores]:
+    """Nightly job: scores every held ticker that has price history."""
+    scorer = scorer if scorer is not None else TickerScorer()
+    known = set(scorer.prices.tickers())
+    return scorer.score([ticker for ticker in held_tickers(storage) if ticker in known])
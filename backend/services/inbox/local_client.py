@@ -0,0 +1,59 @@
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from backend.constants import DRIVE_CHUNK_SIZE
+from backend.utils.file_io import iter_csv_rows
+
+class LocalFileClient:
+    """Serves local files through the Drive methods ProcessTransactionData uses.
+
+    Each file is registered under a file ID and streamed straight from disk. Its
+    metadata carries no md5Checksum or headRevisionId, so DriveDownloadCache passes
+    the content through without keeping a second copy of it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+
+    def add_file(self, file_id: str, path: str, name: Optional[str] = None) -> str:
+        """Registers a local file under a file ID, reported with the given name (its base name by default)."""
+        with self._lock:
+            self._paths[file_id] = path
+            self._names[file_id] = name or os.path.basename(path)
+        return file_id
+
+    def remove_file(self, file_id: str) -> None:
+        with self._lock:
+            self._paths.pop(file_id, None)
+            self._names.pop(file_id, None)
+
+    def get_drive_file_metadata(self, file_id: str, fields: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        path = self._paths.get(file_id)
+        if path is None or not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        metadata = {
+            'id': file_id,
+            'name': self._names.get(file_id, os.path.basename(path)),
+            'modifiedTime': datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            'size': str(stat.st_size),
+        }
+        if not fields:
+            return metadata
+        return {field: metadata[field] for field in fields.split(',') if field in metadata}
+
+    def get_drive_file(self, file_id: str) -> str:
+        with open(self._paths[file_id], encoding='utf-8-sig') as f:
+            return f.read()
+
+    def iter_drive_file_chunks(self, file_id: str, chunksize: int = DRIVE_CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self._paths[file_id], 'rb') as f:
+            while chunk := f.read(chunksize):
+                yield chunk
+
+    def iter_drive_file_rows(self, file_id: str, chunksize: int = DRIVE_CHUNK_SIZE) -> Iterator[Dict[str, str]]:
+        return iter_csv_rows(self.iter_drive_file_chunks(file_id, chunksize))
@@ -0,0 +1,277 @@
+import argparse
+import hashlib
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Literal, NamedTuple, Optional, Sequence, Tuple, get_args
+
+import watchfiles
+
+from backend.constants import (
+    DRIVE_CHUNK_SIZE, INBOX_DEBOUNCE_MS, INBOX_PAYSTUB_EXTENSIONS, INBOX_RECEIPT_EXTENSIONS, INBOX_SETTLE_MS,
+    INBOX_TRANSACTION_EXTENSIONS, LOCAL_INBOX_DIR
+)
+from backend.database.paystubs import PaystubStore
+from backend.database.receipts import ReceiptStore
+from backend.logging_config import setup_logging
+from backend.models.instruments import ACCOUNT_OWNERS, ACCOUNT_TYPES, ACCOUNT_UPLOAD_KEY
+from backend.process_transaction_data import ProcessTransactionData, account_instrument, is_routable
+from backend.services.inbox.local_client import LocalFileClient
+from backend.services.paystubs.pdf_extraction import extract_paystubs
+from backend.services.receipts.matching import ReceiptMatcher
+from backend.services.receipts.receipt_ocr import ocr_receipts
+
+logger = logging.getLogger('numifocus.services')
+
+INBOX_FILE_KINDS = Literal['transactions', 'receipt', 'paystub']
+INBOX_EXTENSIONS = INBOX_TRANSACTION_EXTENSIONS + INBOX_RECEIPT_EXTENSIONS + INBOX_PAYSTUB_EXTENSIONS
+
+class InboxFile(NamedTuple):
+    """A file dropped into the inbox and the pipeline it's routed to."""
+
+    path: str
+    kind: INBOX_FILE_KINDS
+    account: Optional[Tuple[ACCOUNT_OWNERS, ACCOUNT_TYPES]]  # Only set for transaction exports.
+
+class InboxFilter(watchfiles.DefaultFilter):
+    """Passes additions and modifications of supported files, and new directories, so
+    deletions, partial downloads (.crdownload, .part) and editor swap files never wake
+    the inbox."""
+
+    def __call__(self, change: watchfiles.Change, path: str) -> bool:
+        if change == watchfiles.Change.deleted or not super().__call__(change, path):
+            return False
+        return os.path.splitext(path)[1].lower() in INBOX_EXTENSIONS or (change == watchfiles.Change.added and os.path.isdir(path))
+
+class LocalInbox:
+    """Ingests files dropped into a local directory, as an alternative to the upload form and Drive.
+
+    CSV exports go under <owner>/<account type>/ (e.g. Natalia/checking/), plus a
+    sub-account folder or file name for owners with several accounts of the type (e.g.
+    Foster/IRA/roth/, see SUB_ACCOUNT_INSTRUMENTS), and are handed to ProcessTransactionData through a LocalFileClient, so they're parsed, normalized,
+    validated, deduped and persisted exactly like Drive uploads. Receipt photos and
+    paystub PDFs can be dropped anywhere in the inbox and go to the OCR pipelines.
+
+    Files are identified by the SHA-256 of their content, so a file that was already
+    ingested (dropped twice, renamed or just touched) is skipped before it's parsed or
+    OCR'd. watch() scans the inbox once, then only handles the files the OS reports as
+    added or modified, in batches debounced until writes settle; there are no
+    periodic rescans and no network requests.
+    """
+
+    def __init__(
+            self,
+            root: str = LOCAL_INBOX_DIR,
+            pipeline: Optional[ProcessTransactionData] = None,
+            receipts: Optional[ReceiptStore] = None,
+            paystubs: Optional[PaystubStore] = None
+        ):
+        """
+        Args:
+            root: The inbox directory; created if it doesn't exist.
+            pipeline: Processes the transaction exports; it must have been created with a LocalFileClient.
+            receipts: Where OCR'd receipts are saved; defaults to RECEIPT_DATA.
+            paystubs: Where extracted paystubs are saved; defaults to PAYSTUB_DATA.
+        """
+        self.root = os.path.abspath(root)
+        self.pipeline = pipeline if pipeline is not None else ProcessTransactionData(client=LocalFileClient())
+        if not isinstance(self.pipeline.client, LocalFileClient):
+            raise TypeError("LocalInbox needs a ProcessTransactionData that reads through a LocalFileClient.")
+        self.receipts = receipts if receipts is not None else ReceiptStore()
+        self.paystubs = paystubs if paystubs is not None else PaystubStore()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def client(self) -> LocalFileClient:
+        return self.pipeline.client
+
+    def route(self, path: str) -> Optional[InboxFile]:
+        """Returns the pipeline a dropped file belongs to, or None if it isn't something the inbox ingests."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension in INBOX_RECEIPT_EXTENSIONS:
+            return InboxFile(path, 'receipt', None)
+        if extension in INBOX_PAYSTUB_EXTENSIONS:
+            return InboxFile(path, 'paystub', None)
+        if extension not in INBOX_TRANSACTION_EXTENSIONS:
+            return None
+
+        owners = {owner.lower(): owner for owner in get_args(ACCOUNT_OWNERS)}
+        account_types = {account_type.lower(): account_type for account_type in get_args(ACCOUNT_TYPES)}
+        relpath = os.path.relpath(path, self.root)
+        parts = relpath.split(os.sep)
+        if len(parts) >= 3:
+            account = (owners.get(parts[0].lower()), account_types.get(parts[1].lower()))
+            if is_routable(*account):
+                try:
+                    account_instrument(*account, relpath)
+                except ValueError as e:
+                    logger.error("[LocalInbox] Skipping %s: %s", path, e)
+                    return None
+                return InboxFile(path, 'transactions', account)
+        logger.warning("[LocalInbox] Skipping %s: transaction exports belong in a known <owner>/<account type>/ folder", path)
+        return None
+
+    def scan(self, root: Optional[str] = None) -> List[str]:
+        """Returns the paths of the supported files currently in the inbox, or in one of its directories."""
+        inbox_filter = InboxFilter()
+        paths = []
+        for directory, _, filenames in os.walk(root or self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if inbox_filter(watchfiles.Change.added, path):
+                    paths.append(path)
+        return sorted(paths)
+
+    def process(self, paths: Iterable[str]) -> None:
+        """Routes a batch of dropped files to their pipelines.
+
+        Transaction exports are processed (and synced to storage) together, then receipts
+        and paystubs are OCR'd; a pipeline that fails is logged without stopping the others.
+        """
+        batches: Dict[INBOX_FILE_KINDS, List[InboxFile]] = defaultdict(list)
+        for path in sorted(set(paths)):
+            inbox_file = self.route(path)
+            if inbox_file is not None and os.path.isfile(path):
+                batches[inbox_file.kind].append(inbox_file)
+
+        handlers = (
+            ('transactions', self._process_transactions),
+            ('receipt', self._process_receipts),
+            ('paystub', self._process_paystubs),
+        )
+        for kind, handler in handlers:
+            if not batches[kind]:
+                continue
+            try:
+                handler(batches[kind])
+            except Exception:
+                logger.exception("[LocalInbox] Failed to process %d dropped %s files", len(batches[kind]), kind)
+
+    def watch(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Processes the files already in the inbox, then every batch of files dropped into it
+        until stop_event is set."""
+        os.makedirs(self.root, exist_ok=True)
+        logger.info("[LocalInbox] Watching %s", self.root)
+        scanned = False
+        changes_iter = watchfiles.watch(
+            self.root,
+            watch_filter=InboxFilter(),
+            debounce=INBOX_DEBOUNCE_MS,
+            step=INBOX_SETTLE_MS,
+            stop_event=stop_event,
+            rust_timeout=INBOX_SETTLE_MS,
+            yield_on_timeout=True
+        )
+        for changes in changes_iter:
+            if not scanned:
+                # The watcher is already running by the time anything is yielded, so files
+                # dropped during this one-time scan still arrive as changes afterwards.
+                paths = self.scan()
+                scanned = True
+            else:
+                paths = []
+                for _, path in changes:
+                    # Files written into a directory before the OS watches it (e.g. a copied
+                    # folder) raise no events of their own, so new directories are scanned.
+                    paths.extend(self.scan(path) if os.path.isdir(path) else [path])
+            if paths:
+                self.process(paths)
+
+    def start(self) -> None:
+        """Watches the inbox on a background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.watch, args=(self._stop_event,), name='local-inbox', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the background watcher, letting the batch in progress finish."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _process_transactions(self, files: Sequence[InboxFile]) -> None:
+        transaction_files: List[ACCOUNT_UPLOAD_KEY] = []
+        for inbox_file in files:
+            file_ID = self.client.add_file(
+                f'local-{_hash_file(inbox_file.path)}', inbox_file.path, os.path.relpath(inbox_file.path, self.root)
+            )
+            transaction_files.append((*inbox_file.account, file_ID))
+        logger.info("[LocalInbox] Processing %d dropped transaction files", len(transaction_files))
+
+        # Several files are downloaded (read) and normalized in parallel, which also keeps
+        # one bad export from failing the others.
+        concurrency = min(len(transaction_files), os.cpu_count() or 1) if len(transaction_files) > 1 else None
+        try:
+            self.pipeline.process_retrieved_transactions_files(transaction_files, concurrency=concurrency)
+        finally:
+            self.pipeline.clear_session()
+            for transaction_file in transaction_files:
+                self.client.remove_file(transaction_file[2])
+
+    def _process_receipts(self, files: Sequence[InboxFile]) -> None:
+        images: Dict[str, Tuple[str, bytes]] = {}
+        for inbox_file in files:
+            with open(inbox_file.path, 'rb') as f:
+                image = f.read()
+            # Receipt IDs are the photo's SHA-256, so stored receipts are skipped without OCR.
+            receipt_id = hashlib.sha256(image).hexdigest()
+            if receipt_id not in self.receipts:
+                images[receipt_id] = (inbox_file.path, image)
+        if not images:
+            return
+
+        receipts = []
+        for (path, _), result in zip(images.values(), ocr_receipts([image for _, image in images.values()])):
+            if isinstance(result, Exception):
+                logger.error("[LocalInbox] Failed to read receipt %s: %s", path, result)
+                continue
+            self.receipts.save(result)
+            receipts.append(result)
+        matches = ReceiptMatcher(self.receipts, self.pipeline.storage).match_receipts(receipts)
+        logger.info("[LocalInbox] Stored %d dropped receipts, %d matched to transactions", len(receipts), len(matches))
+
+    def _process_paystubs(self, files: Sequence[InboxFile]) -> None:
+        pdfs = []
+        for inbox_file in files:
+            with open(inbox_file.path, 'rb') as f:
+                pdfs.append(f.read())
+        # Paystubs already in the store (by content hash) are returned without being read again.
+        results = extract_paystubs(pdfs, self.paystubs)
+        for inbox_file, result in zip(files, results):
+            if isinstance(result, Exception):
+                logger.error("[LocalInbox] Failed to read paystub %s: %s", inbox_file.path, result)
+        logger.info("[LocalInbox] Extracted %d dropped paystubs", sum(not isinstance(result, Exception) for result in results))
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(DRIVE_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Watches a local inbox until interrupted: python -m backend.services.inbox.watcher [--root DIR] [--once]"""
+    parser = argparse.ArgumentParser(description="Ingest files dropped into a local inbox.")
+    parser.add_argument('--root', default=LOCAL_INBOX_DIR, help="The inbox directory.")
+    parser.add_argument('--once', action='store_true', help="Process the files already in the inbox and exit.")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    inbox = LocalInbox(args.root)
+    if args.once:
+        inbox.process(inbox.scan())
+        return 0
+    try:
+        inbox.watch()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
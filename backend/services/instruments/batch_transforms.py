@@ -0,0 +1,296 @@
+import hashlib
+from typing import Callable, Dict, Mapping, NamedTuple, Type
+
+import numpy as np
+
+from backend.models.instruments import (
+    INSTRUMENT_TYPES, CheckingData, CreditData, CryptoData, DiscoverChecking, DiscoverCredit,
+    DiscoverSavings, InvestingData, IRAData, NormalizedTransactionSchema, RobinHoodCrypto, RobinHoodInvesting,
+    RobinHoodIRA, SavingsData, TransactionSchema, UCCUChecking, UCCUCredit, UCCUSavings, USAAChecking, USAACredit,
+    USAASavings
+)
+from backend.services.instruments.columnar_store import column_specs, encode_categories
+
+COLUMNS = Mapping[str, np.ndarray]
+BATCH_TRANSFORM_FUNC = Callable[[COLUMNS, str], Dict[str, np.ndarray]]
+
+class BatchTransform(NamedTuple):
+    """A registered column-wise transform from a raw export schema to a normalized schema."""
+
+    raw_schema: Type[TransactionSchema]
+    normalized_schema: Type[NormalizedTransactionSchema]
+    transform_func: BATCH_TRANSFORM_FUNC
+
+BATCH_TRANSFORMS: Dict[INSTRUMENT_TYPES, BatchTransform] = {}
+
+def register_batch_transform(
+    instrument_type: INSTRUMENT_TYPES,
+    raw_schema: Type[TransactionSchema],
+    normalized_schema: Type[NormalizedTransactionSchema]
+) -> Callable[[BATCH_TRANSFORM_FUNC], BATCH_TRANSFORM_FUNC]:
+    """Registers a batch transform for an instrument type.
+
+    The decorated function receives the raw export as typed column arrays (see
+    backend.utils.file_io.rows_to_columns) plus the normalized account name, and
+    returns the normalized schema's columns, excluding transaction_id.
+    """
+    def decorator(transform_func: BATCH_TRANSFORM_FUNC) -> BATCH_TRANSFORM_FUNC:
+        BATCH_TRANSFORMS[instrument_type] = BatchTransform(raw_schema, normalized_schema, transform_func)
+        return transform_func
+
+    return decorator
+
+def get_batch_transform(instrument_type: INSTRUMENT_TYPES) -> BatchTransform:
+    """Returns the batch transform registered for an instrument type.
+
+    Raises:
+        ValueError: If no transform is registered, e.g. for an export schema that hasn't been defined yet.
+    """
+    batch_transform = BATCH_TRANSFORMS.get(instrument_type)
+    if batch_transform is None:
+        raise ValueError(f"No batch transform is registered for {instrument_type} exports.")
+    return batch_transform
+
+#### Shared column helpers. ####
+def _length(columns: COLUMNS) -> int:
+    return len(next(iter(columns.values()))) if columns else 0
+
+def _account_codes(schema: Type[NormalizedTransactionSchema], account: str, length: int) -> np.ndarray:
+    spec = next(spec for spec in column_specs(schema) if spec.name == 'account')
+    if account not in spec.categories:
+        raise ValueError(f"'{account}' is not a valid {schema.__name__} account.")
+    return np.repeat(encode_categories(spec, [account]), length)
+
+def _category_codes(schema: Type[NormalizedTransactionSchema], name: str, values: np.ndarray) -> np.ndarray:
+    spec = next(spec for spec in column_specs(schema) if spec.name == name)
+    return encode_categories(spec, values)
+
+def _objects(length: int, value=None) -> np.ndarray:
+    column = np.empty(length, dtype=object)
+    column[:] = value
+    return column
+
+def _positive(values: np.ndarray) -> np.ndarray:
+    """Returns absolute amounts, keeping NaN for blanks and turning zeros into NaN."""
+    values = np.abs(values)
+    return np.where(values == 0, np.nan, values)
+
+def _split_signed(amount: np.ndarray) -> Dict[str, np.ndarray]:
+    """Splits a signed amount column into separate credit and debit columns."""
+    return {
+        'credit': np.where(amount > 0, amount, np.nan),
+        'debit': np.where(amount < 0, -amount, np.nan),
+    }
+
+def _is_posted(status: np.ndarray) -> np.ndarray:
+    return np.char.lower(status.astype(str)) != 'pending'
+
+def _cash_instrument(
+    schema: Type[NormalizedTransactionSchema],
+    account: str,
+    activity_date: np.ndarray,
+    credit: np.ndarray,
+    debit: np.ndarray,
+    description: np.ndarray,
+    old_classification: np.ndarray,
+    old_description: np.ndarray,
+    posted: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Builds the columns shared by CheckingData, CreditData and SavingsData."""
+    length = len(activity_date)
+    return {
+        'activity_date': activity_date,
+        'account': _account_codes(schema, account, length),
+        'credit': credit,
+        'debit': debit,
+        'classification': _category_codes(schema, 'classification', np.full(length, 'Other')),
+        'subclassification': _objects(length),
+        'old_classification': old_classification,
+        'description': description,
+        'old_description': old_description,
+        'posted': posted,
+    }
+
+#### Transaction IDs. ####
+def normalize_descriptions(descriptions: np.ndarray) -> np.ndarray:
+    """Lowercases descriptions and collapses whitespace, once per distinct description."""
+    uniques, inverse = np.unique(descriptions.astype(str), return_inverse=True)
+    normalized = np.array([' '.join(value.lower().split()) for value in uniques], dtype=str)
+    return normalized[inverse.reshape(-1)] if len(uniques) else np.empty(0, dtype=str)
+
+def signed_amount(columns: COLUMNS) -> np.ndarray:
+    """Returns the signed transaction amount (credit minus debit, or the amount column)."""
+    if 'credit' in columns and 'debit' in columns:
+        return np.nan_to_num(columns['credit']) - np.nan_to_num(columns['debit'])
+    return np.nan_to_num(columns['amount'])
+
+def transaction_ids(schema: Type[NormalizedTransactionSchema], columns: COLUMNS) -> np.ndarray:
+    """Derives stable transaction IDs from a fingerprint of each normalized row.
+
+    The fingerprint is (account, activity_date, amount in cents, normalized description)
+    plus the row's occurrence number among identical fingerprints in the batch, so two
+    identical purchases on the same day stay distinct while re-imports of an
+    overlapping statement reproduce the same IDs. The posted flag is deliberately not
+    part of the fingerprint.
+    """
+    length = len(columns['activity_date'])
+    if not length:
+        return _objects(0)
+
+    account_spec = next(spec for spec in column_specs(schema) if spec.name == 'account')
+    accounts = np.array(account_spec.categories + ('',), dtype=str)[columns['account']]
+    cents = np.round(signed_amount(columns) * 100).astype(np.int64).astype(str)
+    descriptions = normalize_descriptions(columns['description'])
+
+    keys = accounts
+    for part in (columns['activity_date'].astype(str), cents, descriptions):
+        keys = np.char.add(np.char.add(keys, '|'), part)
+
+    # Occurrence number within each group of identical keys, preserving file order.
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(length), 0))
+    occurrence = np.empty(length, dtype=np.int64)
+    occurrence[order] = np.arange(length) - group_start
+    keys = np.char.add(np.char.add(keys, '#'), occurrence.astype(str))
+
+    return np.array(
+        [hashlib.blake2b(key.encode('utf-8'), digest_size=10).hexdigest() for key in keys.tolist()],
+        dtype=object
+    )
+
+# ChaseCredit has no export schema yet, so no batch transform is registered for it.
+
+#### Discover. ####
+def _discover(schema: Type[NormalizedTransactionSchema], columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    length = _length(columns)
+    return _cash_instrument(
+        schema,
+        account,
+        activity_date=columns['transaction_date'],
+        credit=_positive(columns['credit']),
+        debit=_positive(columns['debit']),
+        description=columns['transaction_description'],
+        old_classification=columns['transaction_type'],
+        old_description=_objects(length),
+        posted=np.ones(length, dtype=np.bool_)
+    )
+
+@register_batch_transform('discover_checking', DiscoverChecking, CheckingData)
+def discover_checking(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _discover(CheckingData, columns, account)
+
+@register_batch_transform('discover_credit', DiscoverCredit, CreditData)
+def discover_credit(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _discover(CreditData, columns, account)
+
+@register_batch_transform('discover_savings', DiscoverSavings, SavingsData)
+def discover_savings(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _discover(SavingsData, columns, account)
+
+#### RobinHood. ####
+ROBINHOOD_TRANS_CODES = {'AHC': 'ACH', 'ACH': 'ACH', 'CDIV': 'CDIV', 'Buy': 'BUY', 'Sell': 'SELL'}
+
+@register_batch_transform('robinhood_crypto', RobinHoodCrypto, CryptoData)
+def robinhood_crypto(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    length = _length(columns)
+    # Debit/credit quantities carry the ticker as a unit, e.g. '0.5 BTC'.
+    credit_unit = columns.get('credit_unit', _objects(length))
+    debit_unit = columns.get('debit_unit', _objects(length))
+    ticker = np.where(credit_unit.astype(bool), credit_unit, debit_unit)
+
+    return {
+        'activity_date': columns['date'],
+        'account': _account_codes(CryptoData, account, length),
+        'description': columns['transaction_type'],
+        'ticker': ticker,
+        'credit_quantity': _positive(columns['credit']),
+        'debit_quantity': _positive(columns['debit']),
+        'price': columns['price'],
+        'amount': columns['value'],
+        'fee': columns['fee'],
+    }
+
+def _robinhood_brokerage(schema: Type[NormalizedTransactionSchema], columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    length = _length(columns)
+    transactions = columns['transaction'].astype(str)
+    codes, inverse = np.unique(transactions, return_inverse=True)
+    trans_code = np.array([ROBINHOOD_TRANS_CODES.get(code, code) for code in codes], dtype=object)
+
+    # The export only has a single date, so it doubles as the process and settle date.
+    return {
+        'activity_date': columns['date'],
+        'account': _account_codes(schema, account, length),
+        'process_date': columns['date'],
+        'settle_date': columns['date'],
+        'ticker': columns['symbol'],
+        'description': columns['description'],
+        'trans_code': _category_codes(schema, 'trans_code', trans_code[inverse.reshape(-1)]),
+        'quantity': columns['qty'],
+        'price': columns['price'],
+        'credit': _positive(columns['credit']),
+        'debit': _positive(columns['debit']),
+    }
+
+@register_batch_transform('robinhood_investing', RobinHoodInvesting, InvestingData)
+def robinhood_investing(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _robinhood_brokerage(InvestingData, columns, account)
+
+@register_batch_transform('robinhood_IRA', RobinHoodIRA, IRAData)
+def robinhood_ira(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _robinhood_brokerage(IRAData, columns, account)
+
+#### UCCU. ####
+def _uccu(schema: Type[NormalizedTransactionSchema], columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _cash_instrument(
+        schema,
+        account,
+        activity_date=columns['post_date'],
+        credit=_positive(columns['credit']),
+        debit=_positive(columns['debit']),
+        description=columns['description'],
+        old_classification=columns['classification'],
+        old_description=_objects(_length(columns)),
+        posted=_is_posted(columns['status'])
+    )
+
+@register_batch_transform('UCCU_checking', UCCUChecking, CheckingData)
+def uccu_checking(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _uccu(CheckingData, columns, account)
+
+@register_batch_transform('UCCU_credit', UCCUCredit, CreditData)
+def uccu_credit(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _uccu(CreditData, columns, account)
+
+@register_batch_transform('UCCU_savings', UCCUSavings, SavingsData)
+def uccu_savings(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _uccu(SavingsData, columns, account)
+
+#### USAA. ####
+def _usaa(schema: Type[NormalizedTransactionSchema], columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    # USAA exports a single signed amount: positive is money in, negative is money out.
+    amounts = _split_signed(columns['amount'])
+    return _cash_instrument(
+        schema,
+        account,
+        activity_date=columns['date'],
+        credit=amounts['credit'],
+        debit=amounts['debit'],
+        description=columns['description'],
+        old_classification=columns['category'],
+        old_description=columns['original_description'],
+        posted=_is_posted(columns['status'])
+    )
+
+@register_batch_transform('USAA_checking', USAAChecking, CheckingData)
+def usaa_checking(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _usaa(CheckingData, columns, account)
+
+@register_batch_transform('USAA_credit', USAACredit, CreditData)
+def usaa_credit(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _usaa(CreditData, columns, account)
+
+@register_batch_transform('USAA_savings', USAASavings, SavingsData)
+def usaa_savings(columns: COLUMNS, account: str) -> Dict[str, np.ndarray]:
+    return _usaa(SavingsData, columns, account)
@@ -1,40 +1,14 @@
-from datetime import date
-from typing import Any, Mapping, Optional
+from typing import Optional
 
-from normalized_transaction_instrument import NormalizedTransactionInstrument
-from backend.models.instruments import ACCOUNT_UPLOAD_KEY
+from backend.database.storage import TransactionStorage
+from backend.models.instruments import CheckingData
+from backend.services.instruments.normalized_transaction_instrument import INSTRUMENT_DATA, NormalizedTransactionInstrument
 
 class Checking(NormalizedTransactionInstrument):
     """"""
-    def __init__(self, data):
+    SCHEMA = CheckingData
+    ACCOUNT_TYPE = 'checking'
 
-        super().__init__(data)
+    def __init__(self, data: Optional[INSTRUMENT_DATA] = None, storage: Optional[TransactionStorage] = None):
 
-    def sync_transaction_data(self) -> None:
-        """Syncs instance specific transaction data with locally stored transaction data."""
-
-    @classmethod
-    def load_existing_transaction_data(cls, date_start: Optional[date] = None, date_end: Optional[date] = None) -> 'NormalizedTransactionInstrument':
-        """Loads existing locally stored financial instrument transaction data."""
-
-    @classmethod
-    def merge_transaction_data(
-        cls,
-        instance1: 'NormalizedTransactionInstrument',
-        instance2: 'NormalizedTransactionInstrument'
-    ) -> 'NormalizedTransactionInstrument':
-        """Merges transaction data from two instances of the NormalizedTransactionInstrument class"""
-
-    def dedupe(self) -> None:
-        """Removes duplicate transaction data."""
-
-    @staticmethod
-    def validate(data: Mapping[str, Any]) -> bool:
-        """Checks whether or not the normalized transaction data is valid."""
-
-
-    def delete_from_transaction_id(transaction_id: str) -> None:
-        """Deletes transaction data from a transaction ID."""
-
-    def delete_from_file_id(account_upload_tuple: ACCOUNT_UPLOAD_KEY) -> None:
-        """Deletes transaction data from an uploaded transaction file."""
+        super().__init__(data, storage)
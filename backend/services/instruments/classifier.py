@@ -0,0 +1,391 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.constants import CLASSIFIER_CACHE_PATH
+from backend.database.storage import SegmentEntry, TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_TYPES, CheckingData
+from backend.services.instruments.batch_transforms import normalize_descriptions
+from backend.services.instruments.columnar_store import ColumnarTransactionStore, column_specs
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+
+logger = logging.getLogger('numifocus.services')
+
+CLASSIFIED_ACCOUNT_TYPES: Tuple[ACCOUNT_TYPES, ...] = ('checking', 'credit', 'savings')
+CLASSIFICATIONS: Tuple[str, ...] = next(spec for spec in column_specs(CheckingData) if spec.name == 'classification').categories
+OTHER = CLASSIFICATIONS.index('Other')
+
+#### Rule table. ####
+# Each classification's merchant keywords (matched against the description) and bank
+# categories (matched against old_classification), matched as whole words; a trailing
+# '*' marks a keyword that is a word prefix (e.g. 'pharmac*' for pharmacy and
+# pharmaceutical). The earliest match in the text wins, with ties going to the
+# classification listed first.
+CLASSIFICATION_RULES: Tuple[Tuple[str, Tuple[str, ...], Tuple[str, ...]], ...] = (
+    (
+        'Food & Drinks',
+        ('restaurant*', 'cafe', 'coffee', 'starbucks', 'dutch bros', 'mcdonald*', 'wendy*', 'taco bell', 'chipotle',
+         'cafe rio', 'cafe zupas', 'in-n-out', 'chick-fil-a', 'subway', 'domino*', 'pizza*', 'crumbl', 'swig',
+         'smith\'s', 'smiths', 'harmons', 'winco', 'trader joe', 'whole foods', 'sprouts', 'doordash', 'grubhub',
+         'uber eats'),
+        ('restaurant*', 'dining', 'food', 'grocer*', 'supermarket*', 'fast food', 'coffee', 'alcohol', 'bar'),
+    ),
+    (
+        'Transport',
+        ('shell', 'chevron', 'exxon', 'maverik', 'sinclair', 'texaco', 'phillips 66', 'conoco', 'costco gas',
+         'uber', 'lyft', 'uta', 'frontrunner', 'parking', 'airline*', 'delta air*', 'southwest', 'jiffy lube',
+         'autozone', 'dmv'),
+        ('gas', 'fuel', 'auto', 'automotive', 'transport*', 'travel', 'parking', 'airline*', 'ride share'),
+    ),
+    (
+        'Households & Services',
+        ('rent', 'mortgage', 'rocky mountain power', 'dominion energy', 'enbridge', 'xfinity', 'comcast',
+         'google fi', 'verizon', 't-mobile', 'at&t', 'insurance', 'geico', 'state farm', 'progressive', 'utility',
+         'water', 'home depot', 'lowe\'s', 'lowes', 'ikea'),
+        ('utilities', 'utility', 'bill', 'bills', 'rent', 'mortgage', 'insurance', 'home', 'service', 'phone', 'internet',
+         'cable'),
+    ),
+    (
+        'Health & Beauty',
+        ('pharmacy', 'walgreens', 'cvs', 'intermountain', 'dental', 'dentist', 'clinic', 'hospital', 'optometr*',
+         'sephora', 'ulta', 'salon', 'barber*', 'gym', 'fitness', 'planet fitness'),
+        ('health*', 'medical', 'pharmac*', 'doctor', 'dentist', 'beauty', 'personal care', 'fitness', 'gym'),
+    ),
+    (
+        'Leisure',
+        ('netflix', 'spotify', 'hulu', 'disney+', 'disney plus', 'hbo', 'youtube', 'steam', 'playstation',
+         'nintendo', 'xbox', 'cinemark', 'megaplex', 'amc', 'ticketmaster', 'hotel*', 'airbnb', 'golf'),
+        ('entertainment', 'recreation', 'leisure', 'movies', 'music', 'hobbies', 'vacation', 'hotel*', 'lodging',
+         'subscription'),
+    ),
+    (
+        'Shopping',
+        ('amazon', 'amzn', 'walmart', 'wal-mart', 'target', 'costco', 'best buy', 'etsy', 'ebay', 'kohl*',
+         'ross', 'tj maxx', 'old navy', 'nordstrom', 'dillard*', 'apple.com', 'deseret industries'),
+        ('shopping', 'merchandise', 'general', 'clothing', 'electronics', 'department', 'retail'),
+    ),
+)
+
+#### Similarity fallback tuning. ####
+TOKEN_PATTERN = re.compile(r'[a-z][a-z&\']{2,}')  # Store numbers, dates and reference codes are ignored.
+MIN_SIMILARITY = 0.35  # Cosine similarity to the closest classification's token centroid.
+MIN_SIMILARITY_MARGIN = 0.05  # Required lead over the second closest classification.
+
+def _compile_rules(field: int) -> re.Pattern:
+    """Compiles one field of the rule table into a single alternation with a named group per classification."""
+    def keyword_pattern(keyword: str) -> str:
+        if keyword.endswith('*'):
+            return re.escape(keyword[:-1])
+        return re.escape(keyword) + r"(?![a-z])"
+
+    groups = [
+        f"(?P<c{CLASSIFICATIONS.index(rule[0])}>" + '|'.join(map(keyword_pattern, rule[field])) + ')'
+        for rule in CLASSIFICATION_RULES
+    ]
+    return re.compile(r"(?<![a-z])(?:" + '|'.join(groups) + ')')
+
+DESCRIPTION_RULES = _compile_rules(1)
+CATEGORY_RULES = _compile_rules(2)
+# Stored with the cache, so the model and predictions are dropped when the rules or thresholds change.
+RULES_VERSION = zlib.crc32(repr((CLASSIFICATION_RULES, TOKEN_PATTERN.pattern, MIN_SIMILARITY, MIN_SIMILARITY_MARGIN)).encode())
+
+class ClassifierModel(NamedTuple):
+    """What the classifier learned from already classified history."""
+
+    watermarks: Tuple[Tuple[int, int], ...]  # (next unseen segment seq, segments seen) of each of CLASSIFIED_ACCOUNT_TYPES.
+    memo: Dict[str, int]  # Normalized description -> row of counts.
+    counts: np.ndarray  # (descriptions, classifications) how often each description was stored with each classification.
+    vocabulary: Dict[str, int]  # Token -> row of token_counts, document_frequency, idf and centroids.
+    token_counts: np.ndarray  # (tokens, classifications) summed counts of the descriptions containing each token.
+    document_frequency: np.ndarray  # (tokens,) number of memo descriptions containing each token.
+    idf: np.ndarray  # (tokens,) inverse document frequency of each token.
+    centroids: np.ndarray  # (tokens, classifications) L2-normalized tf-idf centroid of each classification.
+
+class TransactionClassifier:
+    """Assigns NumiFocus classifications to newly imported cash transactions.
+
+    Each distinct normalized description is classified once, trying in order:
+
+    1. An exact lookup of the classification the description already has most often in stored history.
+    2. The precompiled merchant keyword rules, then the bank category rules on old_classification.
+    3. Cosine similarity between the description's tokens and each classification's
+       tf-idf token centroid, learned from stored history and scored for all
+       descriptions at once with NumPy.
+
+    Descriptions nothing matches confidently stay 'Other'. The learned model, along
+    with every description it has classified, is cached on disk. The model keeps its
+    counts rather than only their result, so when checking/credit/savings data is
+    synced it learns from just the segments written since, and is only retrained from
+    scratch when the rules change or a month it learned from is compacted.
+    """
+
+    def __init__(self, storage: Optional[TransactionStorage] = None, cache_path: str = CLASSIFIER_CACHE_PATH):
+        self.storage = storage if storage is not None else get_transaction_storage()
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._model: Optional[ClassifierModel] = None
+        self._predictions: Dict[str, int] = {}
+
+    def classify(self, data: ColumnarTransactionStore) -> int:
+        """Classifies the rows of a normalized store still classified as 'Other', in place.
+
+        Returns:
+            int: The number of rows given a classification.
+        """
+        if 'classification' not in data.columns or not len(data):
+            return 0
+        pending = np.flatnonzero(data['classification'] == OTHER)
+        if not len(pending):
+            return 0
+
+        descriptions = normalize_descriptions(data['description'][pending])
+        categories = data['old_classification'][pending].astype(str)
+        keys = np.char.add(np.char.add(descriptions, '|'), np.char.lower(categories))
+        uniques, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        with self._lock:
+            model, learned = self._load_model()
+            predicted = np.array([self._predictions.get(key, -1) for key in uniques.tolist()], dtype=np.int16)
+            missing = np.flatnonzero(predicted < 0)
+            if len(missing):
+                predicted[missing] = self._predict(model, descriptions[first[missing]], categories[first[missing]])
+                self._predictions.update(zip(uniques[missing].tolist(), predicted[missing].tolist()))
+            if len(missing) or learned:
+                self._save_model(model)
+
+        codes = predicted[inverse.reshape(-1)]
+        data['classification'][pending] = codes
+        classified = int(np.count_nonzero(codes != OTHER))
+        logger.info("[TransactionClassifier] Classified %s of %d transactions (%d new descriptions)", classified, len(pending), len(missing))
+        return classified
+
+    def _predict(self, model: ClassifierModel, descriptions: np.ndarray, categories: np.ndarray) -> np.ndarray:
+        """Classifies distinct (description, bank category) pairs through the memo, rules and similarity fallback."""
+        codes = np.full(len(descriptions), OTHER, dtype=np.int16)
+        unresolved = []
+        for index, (description, category) in enumerate(zip(descriptions.tolist(), categories.tolist())):
+            row = model.memo.get(description)
+            if row is not None:
+                code = int(model.counts[row].argmax())
+            else:
+                match = DESCRIPTION_RULES.search(description) or CATEGORY_RULES.search(category.lower())
+                code = int(match.lastgroup[1:]) if match else None
+            if code is None:
+                unresolved.append(index)
+            else:
+                codes[index] = code
+
+        if unresolved and len(model.vocabulary):
+            unresolved = np.array(unresolved)
+            codes[unresolved] = _similar_classifications(model, descriptions[unresolved])
+        return codes
+
+    def _load_model(self) -> Tuple[ClassifierModel, bool]:
+        """Returns the model, first teaching it any classified rows stored since it last learned.
+
+        Returns:
+            Tuple[ClassifierModel, bool]: The model, and whether it learned anything.
+        """
+        self.storage.refresh()
+        segments = [self.storage.segments(account_type) for account_type in CLASSIFIED_ACCOUNT_TYPES]
+        if self._model is None:
+            self._model, self._predictions = _read_cache(self.cache_path)
+
+        # Compaction replaces segments the model has already learned from with one it has not.
+        model = self._model
+        if model is not None and any(
+            sum(segment['seq'] < next_seq for segment in entries) != seen
+            for entries, (next_seq, seen) in zip(segments, model.watermarks)
+        ):
+            model = None
+
+        if model is None:
+            self._model, self._predictions = self._train(_watermarks(segments, (0,) * len(segments))), {}
+            logger.info("[TransactionClassifier] Trained on %d classified descriptions", len(self._model.memo))
+            return self._model, True
+
+        watermarks = _watermarks(segments, tuple(next_seq for next_seq, _ in model.watermarks))
+        if watermarks == model.watermarks:
+            return model, False
+
+        descriptions, codes = [], []
+        for account_type, entries, (next_seq, _) in zip(CLASSIFIED_ACCOUNT_TYPES, segments, model.watermarks):
+            specs = [spec for spec in column_specs(INSTRUMENT_CLASSES[account_type].SCHEMA) if spec.name in ('description', 'classification')]
+            for segment in entries:
+                if segment['seq'] >= next_seq and segment['kind'] == 'data':
+                    columns = self.storage.read_segment(segment, specs)
+                    labeled = _labeled(columns['classification'])
+                    descriptions.append(normalize_descriptions(columns['description'][labeled]))
+                    codes.append(columns['classification'][labeled])
+        self._model = _learn(model._replace(watermarks=watermarks), descriptions, codes)
+
+        # Descriptions with new labels are memo hits now, so drop what was predicted for them before.
+        relabeled = set(np.concatenate(descriptions).tolist()) if descriptions else set()
+        if relabeled:
+            self._predictions = {
+                key: code for key, code in self._predictions.items()
+                if not any(key[:index] in relabeled for index, char in enumerate(key) if char == '|')
+            }
+        logger.info("[TransactionClassifier] Learned %d newly stored classified descriptions", len(relabeled))
+        return self._model, True
+
+    def _train(self, watermarks: Tuple[Tuple[int, int], ...]) -> ClassifierModel:
+        """Learns the description memo and token centroids from every stored classified transaction."""
+        descriptions, codes = [], []
+        for account_type in CLASSIFIED_ACCOUNT_TYPES:
+            data = INSTRUMENT_CLASSES[account_type].load_existing_transaction_data(storage=self.storage).data
+            labeled = _labeled(data['classification'])
+            descriptions.append(normalize_descriptions(data['description'][labeled]))
+            codes.append(data['classification'][labeled])
+        return _learn(_empty_model(watermarks), descriptions, codes)
+
+    def _save_model(self, model: ClassifierModel) -> None:
+        directory = os.path.dirname(self.cache_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        descriptions = np.array(list(model.memo), dtype=str)
+        tokens = np.array(list(model.vocabulary), dtype=str)
+        predictions = np.array(list(self._predictions), dtype=str)
+        with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.npz', delete=False) as f:
+            np.savez(
+                f,
+                rules_version=np.array(RULES_VERSION, dtype=np.int64),
+                watermarks=np.array(model.watermarks, dtype=np.int64).reshape(-1, 2),
+                memo_descriptions=descriptions,
+                counts=model.counts,
+                tokens=tokens,
+                token_counts=model.token_counts,
+                document_frequency=model.document_frequency,
+                prediction_keys=predictions,
+                prediction_codes=np.array(list(self._predictions.values()), dtype=np.int16)
+            )
+        os.replace(f.name, self.cache_path)
+
+def _labeled(classifications: np.ndarray) -> np.ndarray:
+    """Returns the indices of rows with a classification other than 'Other'."""
+    return np.flatnonzero((classifications >= 0) & (classifications != OTHER))
+
+def _watermarks(segments: List[List[SegmentEntry]], next_seqs: Tuple[int, ...]) -> Tuple[Tuple[int, int], ...]:
+    """Returns the watermark of each account type once all of its listed segments are learned from."""
+    return tuple(
+        (max([next_seq] + [segment['seq'] + 1 for segment in entries]), len(entries))
+        for entries, next_seq in zip(segments, next_seqs)
+    )
+
+def _empty_model(watermarks: Tuple[Tuple[int, int], ...]) -> ClassifierModel:
+    return ClassifierModel(
+        watermarks, {}, np.zeros((0, len(CLASSIFICATIONS))), {}, np.zeros((0, len(CLASSIFICATIONS))),
+        np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros((0, len(CLASSIFICATIONS)))
+    )
+
+def _learn(model: ClassifierModel, descriptions: List[np.ndarray], codes: List[np.ndarray]) -> ClassifierModel:
+    """Adds classified descriptions to the model's counts and recomputes its centroids.
+
+    Only the new rows are tokenized; the memo and vocabulary grow in place and the
+    centroids are recomputed from the per-token counts, which is cheap next to
+    reading history.
+    """
+    if not descriptions:
+        return model
+    descriptions, codes = np.concatenate(descriptions), np.concatenate(codes).astype(np.int64)
+    uniques, inverse = np.unique(descriptions, return_inverse=True)
+    if not len(uniques):
+        return model
+
+    # Classification counts per distinct description.
+    batch_counts = np.zeros((len(uniques), len(CLASSIFICATIONS)), dtype=np.float64)
+    np.add.at(batch_counts, (inverse.reshape(-1), codes), 1)
+    known = len(model.memo)
+    rows = np.array([model.memo.setdefault(description, len(model.memo)) for description in uniques.tolist()], dtype=np.int64)
+    counts = np.concatenate([model.counts, np.zeros((len(model.memo) - known, len(CLASSIFICATIONS)))])
+    counts[rows] += batch_counts
+
+    # Token -> classification counts, weighted by how often each description occurs.
+    token_ids, owners = _tokenize(uniques, model.vocabulary, grow=True)
+    grown = len(model.vocabulary) - len(model.token_counts)
+    token_counts = np.concatenate([model.token_counts, np.zeros((grown, len(CLASSIFICATIONS)))])
+    np.add.at(token_counts, token_ids, batch_counts[owners])
+    document_frequency = np.concatenate([model.document_frequency, np.zeros(grown, dtype=np.int64)])
+    np.add.at(document_frequency, token_ids[rows[owners] >= known], 1)
+
+    idf, centroids = _centroids(token_counts, document_frequency, len(model.memo))
+    return model._replace(counts=counts, token_counts=token_counts, document_frequency=document_frequency, idf=idf, centroids=centroids)
+
+def _centroids(token_counts: np.ndarray, document_frequency: np.ndarray, descriptions: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the idf of each token and the L2-normalized tf-idf centroid of each classification."""
+    idf = np.log((1 + descriptions) / (1 + document_frequency)) + 1
+    centroids = token_counts * idf[:, None]
+    norms = np.linalg.norm(centroids, axis=0)
+    return idf, centroids / np.where(norms > 0, norms, 1)
+
+def _tokenize(descriptions: np.ndarray, vocabulary: Dict[str, int], grow: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the vocabulary ID of every distinct token in each description, with the index of its description.
+
+    Tokens outside the vocabulary are added when grow is set and dropped otherwise.
+    """
+    token_ids: List[int] = []
+    owners: List[int] = []
+    for index, description in enumerate(descriptions.tolist()):
+        for token in set(TOKEN_PATTERN.findall(description)):
+            token_id = vocabulary.setdefault(token, len(vocabulary)) if grow else vocabulary.get(token)
+            if token_id is not None:
+                token_ids.append(token_id)
+                owners.append(index)
+    return np.array(token_ids, dtype=np.int64), np.array(owners, dtype=np.int64)
+
+def _similar_classifications(model: ClassifierModel, descriptions: np.ndarray) -> np.ndarray:
+    """Scores every description against every classification centroid at once.
+
+    A description's tf-idf vector only has weight on its own tokens, so its cosine
+    similarity to each centroid is the idf-weighted sum of the centroid rows of those
+    tokens, divided by the vector's norm; the per-description sums are a single
+    np.add.at over the flattened token IDs.
+    """
+    codes = np.full(len(descriptions), OTHER, dtype=np.int16)
+    token_ids, owners = _tokenize(descriptions, model.vocabulary)
+    if not len(token_ids):
+        return codes
+
+    weights = model.idf[token_ids]
+    scores = np.zeros((len(descriptions), len(CLASSIFICATIONS)), dtype=np.float64)
+    np.add.at(scores, owners, model.centroids[token_ids] * weights[:, None])
+    norms = np.sqrt(np.bincount(owners, weights=weights ** 2, minlength=len(descriptions)))
+    scores /= np.where(norms > 0, norms, 1)[:, None]
+
+    ranked = np.sort(scores, axis=1)
+    best, runner_up = ranked[:, -1], ranked[:, -2]
+    confident = (best >= MIN_SIMILARITY) & (best - runner_up >= MIN_SIMILARITY_MARGIN)
+    codes[confident] = scores[confident].argmax(axis=1)
+    return codes
+
+def _read_cache(path: str) -> Tuple[Optional[ClassifierModel], Dict[str, int]]:
+    """Reads the cached model and predictions, if they were made with the current rules."""
+    if not os.path.exists(path):
+        return None, {}
+    try:
+        with np.load(path) as cache:
+            if int(cache['rules_version']) != RULES_VERSION:
+                return None, {}
+            descriptions, tokens = cache['memo_descriptions'].tolist(), cache['tokens'].tolist()
+            token_counts, document_frequency = cache['token_counts'], cache['document_frequency']
+            watermarks = tuple(map(tuple, cache['watermarks'].tolist()))
+            if len(watermarks) != len(CLASSIFIED_ACCOUNT_TYPES):
+                return None, {}
+            model = ClassifierModel(
+                watermarks,
+                dict(zip(descriptions, range(len(descriptions)))),
+                cache['counts'],
+                dict(zip(tokens, range(len(tokens)))),
+                token_counts,
+                document_frequency,
+                *_centroids(token_counts, document_frequency, len(descriptions))
+            )
+            return model, dict(zip(cache['prediction_keys'].tolist(), cache['prediction_codes'].tolist()))
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("[TransactionClassifier] Ignoring unreadable cache %s: %s", path, e)
+        return None, {}
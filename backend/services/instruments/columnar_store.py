@@ -0,0 +1,283 @@
+from datetime import date
+from functools import lru_cache
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Literal, Mapping, NamedTuple, Optional, Sequence, Tuple, Type, Union,
+    get_args, get_origin, get_type_hints
+)
+
+import numpy as np
+
+from backend.models.instruments import NormalizedTransactionSchema
+
+COLUMN_KINDS = Literal['date', 'float', 'category', 'bool', 'str']
+
+# Extra column, outside the schema, recording the Drive file ID each row was imported from.
+SOURCE_COLUMN = 'source_file_id'
+
+class ColumnSpec(NamedTuple):
+    """Describes how a single TypedDict field is laid out in a columnar store."""
+
+    name: str
+    kind: COLUMN_KINDS
+    categories: Tuple[str, ...] = ()
+
+@lru_cache(maxsize=None)
+def column_specs(schema: Type[NormalizedTransactionSchema]) -> Tuple[ColumnSpec, ...]:
+    """Derives the column layout of a normalized schema from its TypedDict annotations.
+
+    Literal fields become categorical int codes, dates become datetime64[D], floats
+    become float64 (NaN for None), bools stay bools and everything else is kept as
+    Python objects.
+    """
+    specs = []
+    for name, annotation in get_type_hints(schema).items():
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if get_origin(annotation) is Union and len(args) == 1:
+            annotation = args[0]
+
+        if get_origin(annotation) is Literal:
+            specs.append(ColumnSpec(name, 'category', tuple(get_args(annotation))))
+        elif annotation is date:
+            specs.append(ColumnSpec(name, 'date'))
+        elif annotation is float:
+            specs.append(ColumnSpec(name, 'float'))
+        elif annotation is bool:
+            specs.append(ColumnSpec(name, 'bool'))
+        else:
+            specs.append(ColumnSpec(name, 'str'))
+    return tuple(specs)
+
+def _empty_column(spec: ColumnSpec, length: int = 0) -> np.ndarray:
+    if spec.kind == 'date':
+        return np.full(length, np.datetime64('NaT'), dtype='datetime64[D]')
+    if spec.kind == 'float':
+        return np.full(length, np.nan, dtype=np.float64)
+    if spec.kind == 'category':
+        return np.full(length, -1, dtype=np.int16)
+    if spec.kind == 'bool':
+        return np.zeros(length, dtype=np.bool_)
+    return np.full(length, None, dtype=object)
+
+def _encode_column(spec: ColumnSpec, values: Sequence[Any]) -> np.ndarray:
+    """Converts a sequence of Python values into the array type used for a column."""
+    if spec.kind == 'date':
+        return np.array([np.datetime64('NaT') if v is None else v for v in values], dtype='datetime64[D]')
+    if spec.kind == 'float':
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if spec.kind == 'category':
+        return encode_categories(spec, values)
+    if spec.kind == 'bool':
+        return np.array(values, dtype=np.bool_)
+    column = np.empty(len(values), dtype=object)
+    column[:] = list(values)
+    return column
+
+def encode_categories(spec: ColumnSpec, values: Union[Sequence[Any], np.ndarray]) -> np.ndarray:
+    """Maps category labels to their int16 codes, with -1 for None or unknown labels."""
+    lookup = {label: code for code, label in enumerate(spec.categories)}
+    labels, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    label_codes = np.array([lookup.get(label, -1) for label in labels], dtype=np.int16)
+    return label_codes[inverse.reshape(-1)] if len(labels) else np.empty(0, dtype=np.int16)
+
+def extend_column(buffer: Optional[np.ndarray], column: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Appends values to a column kept as the leading view of a larger buffer.
+
+    When column is still the view of buffer handed out last time and the buffer has
+    room, values are written into the spare capacity. Otherwise the column is copied
+    into a new buffer twice its length. Repeated appends therefore cost amortized
+    O(len(values)) rather than copying the whole column every time.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The buffer and the extended column, a view of it.
+    """
+    length, needed = len(column), len(column) + len(values)
+    if buffer is None or column.base is not buffer or len(buffer) < needed or column.ctypes.data != buffer.ctypes.data:
+        buffer = np.empty(max(needed, 2 * length), dtype=column.dtype)
+        buffer[:length] = column
+    buffer[length:needed] = values
+    return buffer, buffer[:needed]
+
+def _decode_value(spec: ColumnSpec, value: Any) -> Any:
+    """Converts a single stored array value back into its TypedDict representation."""
+    if spec.kind == 'date':
+        return None if np.isnat(value) else value.astype(date)
+    if spec.kind == 'float':
+        return None if np.isnan(value) else float(value)
+    if spec.kind == 'category':
+        return None if value < 0 else spec.categories[value]
+    if spec.kind == 'bool':
+        return bool(value)
+    return value
+
+class ColumnarTransactionStore:
+    """Struct-of-arrays container for normalized transaction data.
+
+    Every field of the normalized schema is held in one NumPy array, so date range
+    filters and per-category aggregations run vectorized instead of looping over
+    per-row TypedDicts. Individual rows can still be viewed as the original TypedDict.
+    """
+
+    def __init__(
+        self,
+        schema: Type[NormalizedTransactionSchema],
+        columns: Optional[Mapping[str, np.ndarray]] = None
+    ):
+        self.schema = schema
+        self.specs = column_specs(schema)
+        self.columns: Dict[str, np.ndarray] = {}
+
+        columns = columns or {}
+        length = len(next(iter(columns.values()))) if columns else 0
+        for spec in self.specs:
+            column = columns.get(spec.name)
+            if column is None:
+                column = _empty_column(spec, length)
+            elif len(column) != length:
+                raise ValueError(f"Column '{spec.name}' has {len(column)} rows, expected {length}.")
+            self.columns[spec.name] = column
+
+        source = columns.get(SOURCE_COLUMN)
+        self.columns[SOURCE_COLUMN] = source if source is not None else _empty_column(ColumnSpec(SOURCE_COLUMN, 'str'), length)
+        # Spare capacity behind columns grown by append().
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_records(
+        cls,
+        schema: Type[NormalizedTransactionSchema],
+        records: Iterable[Mapping[str, Any]]
+    ) -> 'ColumnarTransactionStore':
+        """Builds a store from an iterable of normalized TypedDict records."""
+        records = list(records)
+        specs = column_specs(schema)
+        columns = {
+            spec.name: _encode_column(spec, [record.get(spec.name) for record in records])
+            for spec in specs
+        }
+        return cls(schema, columns)
+
+    def __len__(self) -> int:
+        return len(self.columns[self.specs[0].name]) if self.specs else 0
+
+    def __iter__(self) -> Iterator[NormalizedTransactionSchema]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the column arrays (object columns count pointers only)."""
+        return sum(column.nbytes for column in self.columns.values())
+
+    def tag_source(self, file_id: str) -> None:
+        """Records the uploaded file every row of this store was imported from."""
+        self.columns[SOURCE_COLUMN][:] = file_id
+
+    def spec(self, name: str) -> ColumnSpec:
+        """Returns the column spec for a field name."""
+        for spec in self.specs:
+            if spec.name == name:
+                return spec
+        raise KeyError(name)
+
+    def decoded(self, name: str) -> np.ndarray:
+        """Returns the labels of a categorical column (None for missing)."""
+        spec = self.spec(name)
+        if spec.kind != 'category':
+            return self.columns[name]
+        labels = np.array(spec.categories + (None,), dtype=object)
+        return labels[self.columns[name]]
+
+    def row(self, index: int) -> NormalizedTransactionSchema:
+        """Returns a single row as its normalized TypedDict."""
+        return self.schema(**{
+            spec.name: _decode_value(spec, self.columns[spec.name][index]) for spec in self.specs
+        })
+
+    def to_records(self) -> List[NormalizedTransactionSchema]:
+        """Returns every row as a list of normalized TypedDicts."""
+        return list(self)
+
+    def take(self, indices: Union[Sequence[int], np.ndarray]) -> 'ColumnarTransactionStore':
+        """Returns a new store containing the rows selected by an index or boolean mask array."""
+        indices = np.asarray(indices)
+        return type(self)(self.schema, {name: column[indices] for name, column in self.columns.items()})
+
+    def concat(self, *others: 'ColumnarTransactionStore') -> 'ColumnarTransactionStore':
+        """Returns a new store with the rows of the other stores appended to this one."""
+        for other in others:
+            if other.schema is not self.schema:
+                raise TypeError(f"Cannot concatenate {other.schema.__name__} rows into {self.schema.__name__}.")
+        return type(self)(self.schema, {
+            name: np.concatenate([column] + [other.columns[name] for other in others])
+            for name, column in self.columns.items()
+        })
+
+    def append(self, other: 'ColumnarTransactionStore') -> None:
+        """Appends the rows of another store to this one in place, in amortized O(len(other)).
+
+        Columns grow into spare capacity like a list, so views of them taken before the
+        append keep their old length.
+        """
+        if other.schema is not self.schema:
+            raise TypeError(f"Cannot append {other.schema.__name__} rows to {self.schema.__name__}.")
+        if not len(other):
+            return
+        for name, column in self.columns.items():
+            self._buffers[name], self.columns[name] = extend_column(self._buffers.get(name), column, other.columns[name])
+
+    def date_mask(
+        self,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        column: str = 'activity_date'
+    ) -> np.ndarray:
+        """Returns a boolean mask of rows whose date falls within [date_start, date_end]."""
+        dates = self.columns[column]
+        mask = ~np.isnat(dates)
+        if date_start is not None:
+            mask &= dates >= np.datetime64(date_start, 'D')
+        if date_end is not None:
+            mask &= dates <= np.datetime64(date_end, 'D')
+        return mask
+
+    def between(self, date_start: Optional[date] = None, date_end: Optional[date] = None) -> 'ColumnarTransactionStore':
+        """Returns the rows whose activity date falls within [date_start, date_end]."""
+        return self.take(self.date_mask(date_start, date_end))
+
+    def totals_by(
+        self,
+        key: str,
+        value: str,
+        mask: Optional[np.ndarray] = None
+    ) -> Dict[Any, float]:
+        """Sums a float column grouped by a categorical column or by 'month'.
+
+        Args:
+            key: Name of a categorical column, or 'month' to group by activity month.
+            value: Name of the float column to sum; NaN values count as zero.
+            mask: Optional boolean row mask applied before aggregating.
+
+        Returns:
+            Dict[Any, float]: Totals keyed by category label or 'YYYY-MM' month.
+        """
+        values = np.nan_to_num(self.columns[value])
+        if key == 'month':
+            months = self.columns['activity_date'].astype('datetime64[M]')
+            if mask is not None:
+                months, values = months[mask], values[mask]
+            labels, codes = np.unique(months, return_inverse=True)
+            sums = np.bincount(codes.reshape(-1), weights=values, minlength=len(labels))
+            return {str(label): float(total) for label, total in zip(labels, sums) if not np.isnat(label)}
+
+        spec = self.spec(key)
+        if spec.kind != 'category':
+            raise ValueError(f"Column '{key}' is not categorical.")
+        codes = self.columns[key]
+        if mask is not None:
+            codes, values = codes[mask], values[mask]
+        valid = codes >= 0
+        sums = np.bincount(codes[valid], weights=values[valid], minlength=len(spec.categories))
+        return {label: float(total) for label, total in zip(spec.categories, sums) if total}
@@ -1,7 +1,14 @@
-from normalized_transaction_instrument import NormalizedTransactionInstrument
+from typing import Optional
+
+from backend.database.storage import TransactionStorage
+from backend.models.instruments import IRAData
+from backend.services.instruments.normalized_transaction_instrument import INSTRUMENT_DATA, NormalizedTransactionInstrument
 
 class IRA(NormalizedTransactionInstrument):
     """"""
-    def __init__(self, data):
+    SCHEMA = IRAData
+    ACCOUNT_TYPE = 'IRA'
+
+    def __init__(self, data: Optional[INSTRUMENT_DATA] = None, storage: Optional[TransactionStorage] = None):
 
-        super().__init__(data)
+        super().__init__(data, storage)
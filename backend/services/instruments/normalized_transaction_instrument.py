@@ -1,45 +1,195 @@
-from abc import ABC, abstractmethod
+import logging
+from abc import ABC
 from datetime import date
-from typing import Any, Mapping, Optional 
+from typing import Any, ClassVar, Iterable, List, Mapping, Optional, Tuple, Type, Union
 
-from backend.models.instruments import ACCOUNT_UPLOAD_KEY, NormalizedTransactionSchema
+import numpy as np
+
+from backend.database.rollups import get_transaction_rollups
+from backend.database.storage import TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_TYPES, ACCOUNT_UPLOAD_KEY, NormalizedTransactionSchema
+from backend.services.instruments.columnar_store import SOURCE_COLUMN, ColumnarTransactionStore, column_specs, extend_column
+from backend.services.instruments.transaction_index import TransactionIndex
+from backend.services.instruments.transaction_merge import dedupe_rows, merge_stores
+from backend.utils.validation import ValidationResult, get_validator
+
+logger = logging.getLogger('numifocus.services')
+
+INSTRUMENT_DATA = Union[ColumnarTransactionStore, NormalizedTransactionSchema, Iterable[NormalizedTransactionSchema]]
 
 class NormalizedTransactionInstrument(ABC):
-    """Abstract base class for normalized financial transaction instruments."""
-    
-    def __init__(self, data: NormalizedTransactionSchema):
-        self.data = data
-    
-    @abstractmethod
+    """Abstract base class for normalized financial transaction instruments.
+
+    Transaction data is held in a ColumnarTransactionStore laid out from the concrete
+    instrument's SCHEMA, rather than as one TypedDict per row, and is persisted under
+    the instrument's ACCOUNT_TYPE in a TransactionStorage.
+    """
+
+    SCHEMA: ClassVar[Type[NormalizedTransactionSchema]]
+    ACCOUNT_TYPE: ClassVar[ACCOUNT_TYPES]
+
+    def __init__(self, data: Optional[INSTRUMENT_DATA] = None, storage: Optional[TransactionStorage] = None):
+        if isinstance(data, ColumnarTransactionStore):
+            if data.schema is not self.SCHEMA:
+                raise TypeError(f"{type(self).__name__} expects {self.SCHEMA.__name__} data, got {data.schema.__name__}.")
+            self.data = data
+        elif data is None:
+            self.data = ColumnarTransactionStore(self.SCHEMA)
+        elif isinstance(data, Mapping):
+            self.data = ColumnarTransactionStore.from_records(self.SCHEMA, [data])
+        else:
+            self.data = ColumnarTransactionStore.from_records(self.SCHEMA, data)
+        self.storage = storage if storage is not None else get_transaction_storage()
+        self._index: Optional[TransactionIndex] = None
+        # Rows not yet written to storage, and deleted rows not yet tombstoned.
+        self._unsynced = np.ones(len(self.data), dtype=np.bool_)
+        self._unsynced_buffer: Optional[np.ndarray] = None
+        self._unsynced_deletes: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    @property
+    def index(self) -> TransactionIndex:
+        """Date, transaction ID and source file indexes over self.data, built on first use
+        and kept current through merges and deletes."""
+        if self._index is None:
+            self._index = TransactionIndex(self.data)
+        return self._index
+
+    def transactions_between(self, date_start: Optional[date] = None, date_end: Optional[date] = None) -> ColumnarTransactionStore:
+        """Returns the transactions within [date_start, date_end] using the date index."""
+        return self.data.take(self.index.date_range(date_start, date_end))
+
     def sync_transaction_data(self) -> None:
-        """Syncs instance specific transaction data with locally stored transaction data."""
+        """Syncs instance specific transaction data with locally stored transaction data.
+
+        Only rows added or updated since the last sync are appended to storage, as new
+        versions of their transactions, followed by tombstones for deleted rows. The
+        monthly rollups of just the months those rows fall in are then refreshed.
+        """
+        changed = np.flatnonzero(self._unsynced)
+        touched_months = [self.data['activity_date'][changed]]
+        if len(changed):
+            self.storage.append(self.ACCOUNT_TYPE, self.data.take(changed))
+        for transaction_ids, activity_dates in self._unsynced_deletes:
+            self.storage.delete(self.ACCOUNT_TYPE, transaction_ids, activity_dates)
+            touched_months.append(activity_dates)
+        get_transaction_rollups(self.storage).update(self.ACCOUNT_TYPE, self.SCHEMA, np.concatenate(touched_months))
+
+        logger.info("[%s] Synced %d changed and %d deleted transactions", type(self).__name__, len(changed), sum(len(ids) for ids, _ in self._unsynced_deletes))
+        self._unsynced[:] = False
+        self._unsynced_deletes = []
 
     @classmethod
-    @abstractmethod
-    def load_existing_transaction_data(cls, date_start: Optional[date] = None, date_end: Optional[date] = None) -> 'NormalizedTransactionInstrument':
-        """Loads existing locally stored financial instrument transaction data."""
+    def load_existing_transaction_data(
+        cls,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        storage: Optional[TransactionStorage] = None
+    ) -> 'NormalizedTransactionInstrument':
+        """Loads existing locally stored financial instrument transaction data.
+
+        Only the storage segments of months overlapping [date_start, date_end] are read.
+        """
+        storage = storage if storage is not None else get_transaction_storage()
+        instance = cls(storage.load(cls.ACCOUNT_TYPE, cls.SCHEMA, date_start, date_end), storage)
+        instance._unsynced[:] = False
+        return instance
 
     @classmethod
-    @abstractmethod
     def merge_transaction_data(
         cls,
         instance1: 'NormalizedTransactionInstrument',
         instance2: 'NormalizedTransactionInstrument'
     ) -> 'NormalizedTransactionInstrument':
-        """Merges transaction data from two instances of the NormalizedTransactionInstrument class"""
+        """Merges transaction data from two instances of the NormalizedTransactionInstrument class
+
+        instance2's transactions are deduplicated and hash-joined onto instance1 by
+        transaction ID, so only instance2's rows are looked up or copied. Matching
+        transactions are updated in place (e.g. pending -> posted) and the rest appended
+        in place. instance1 is updated and returned; instance2 is left as it was.
+        """
+        keep = dedupe_rows(instance2.data)
+        incoming = instance2.data if len(keep) == len(instance2.data) else instance2.data.take(keep)
+        merged = merge_stores(instance1.data, instance1.index, incoming)
+        instance1.data = merged.data
+        instance1._unsynced_buffer, instance1._unsynced = extend_column(
+            instance1._unsynced_buffer, instance1._unsynced, np.ones(len(merged.appended_rows), dtype=np.bool_)
+        )
+        instance1._unsynced[merged.updated_rows] = True
+        return instance1
 
-    @abstractmethod
     def dedupe(self) -> None:
-        """Removes duplicate transaction data."""
+        """Removes duplicate transaction data.
+
+        Transactions are matched on their fingerprint-derived transaction ID. Of each set
+        of duplicates the posted, most recently added row is kept.
+        """
+        keep = dedupe_rows(self.data)
+        if len(keep) < len(self.data):
+            self.data = self.data.take(keep)
+            self._unsynced = self._unsynced[keep]
+            self._index = None
 
-    @staticmethod
-    @abstractmethod
-    def validate(data: Mapping[str, Any]) -> bool:
-        """Checks whether or not the normalized transaction data is valid."""
+    def update_rows(self, positions: np.ndarray, **columns: np.ndarray) -> None:
+        """Overwrites column values of existing rows in place and marks them for the next sync.
 
+        Args:
+            positions: Row positions to update.
+            **columns: New (already encoded) values for each updated column, aligned with positions.
+        """
+        for name, values in columns.items():
+            if name == 'transaction_id':
+                raise ValueError("Transaction IDs can't be updated in place.")
+            self.data[name][positions] = values
+        if 'activity_date' in columns or SOURCE_COLUMN in columns:
+            self._index = None
+        self._unsynced[positions] = True
 
-    def delete_from_transaction_id(transaction_id: str) -> None:
+    @classmethod
+    def validate(cls, data: Mapping[str, Any]) -> bool:
+        """Checks whether or not the normalized transaction data is valid.
+
+        Fields must have their annotated type and Literal fields one of their allowed
+        values; the rules on values (required fields, credit/debit exclusivity, date
+        range) are the batch validator's, applied to the record as a one-row batch.
+        """
+        for spec in column_specs(cls.SCHEMA):
+            value = data.get(spec.name)
+            if value is None:
+                continue
+            elif spec.kind == 'category' and value not in spec.categories:
+                return False
+            elif spec.kind == 'date' and not isinstance(value, date):
+                return False
+            elif spec.kind == 'float' and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                return False
+            elif spec.kind == 'bool' and not isinstance(value, bool):
+                return False
+            elif spec.kind == 'str' and not isinstance(value, str):
+                return False
+        return bool(cls.validate_batch(ColumnarTransactionStore.from_records(cls.SCHEMA, [data])).valid[0])
+
+    @classmethod
+    def validate_batch(cls, data: ColumnarTransactionStore) -> ValidationResult:
+        """Validates every row of a store of SCHEMA data at once (see backend.utils.validation)."""
+        return get_validator(cls.SCHEMA).validate(data)
+
+    def delete_from_transaction_id(self, transaction_id: str) -> None:
         """Deletes transaction data from a transaction ID."""
+        position = self.index.position_of(transaction_id)
+        if position is not None:
+            self._delete_rows(np.array([position]))
 
-    def delete_from_file_id(account_upload_tuple: ACCOUNT_UPLOAD_KEY) -> None:
+    def delete_from_file_id(self, account_upload_tuple: ACCOUNT_UPLOAD_KEY) -> None:
         """Deletes transaction data from an uploaded transaction file."""
+        self._delete_rows(self.index.source_rows(account_upload_tuple[2]))
+
+    def _delete_rows(self, positions: np.ndarray) -> None:
+        """Removes rows from self.data, dropping only their own index entries."""
+        if not len(positions):
+            return
+        self.index.remove(positions, self.data['transaction_id'][positions].tolist(), self.data[SOURCE_COLUMN][positions].tolist())
+        self._unsynced_deletes.append((self.data['transaction_id'][positions], self.data['activity_date'][positions]))
+        keep = np.ones(len(self.data), dtype=np.bool_)
+        keep[positions] = False
+        self.data = self.data.take(keep)
+        self._unsynced = self._unsynced[keep]
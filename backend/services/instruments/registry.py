@@ -0,0 +1,15 @@
+from typing import Dict, Type
+
+from backend.models.instruments import ACCOUNT_TYPES
+from backend.services.instruments.checking import Checking
+from backend.services.instruments.credit import Credit
+from backend.services.instruments.crypto import Crypto
+from backend.services.instruments.investing import Investing
+from backend.services.instruments.ira import IRA
+from backend.services.instruments.normalized_transaction_instrument import NormalizedTransactionInstrument
+from backend.services.instruments.savings import Savings
+
+# Normalized instrument class holding each uploaded account type's transactions.
+INSTRUMENT_CLASSES: Dict[ACCOUNT_TYPES, Type[NormalizedTransactionInstrument]] = {
+    instrument.ACCOUNT_TYPE: instrument for instrument in (Checking, Credit, Crypto, Investing, IRA, Savings)
+}
@@ -0,0 +1,136 @@
+from datetime import date
+from typing import Dict, Iterable, Optional, Sequence, Set, Union
+
+import numpy as np
+
+from backend.services.instruments.columnar_store import SOURCE_COLUMN, ColumnarTransactionStore, extend_column
+
+NAT_DAY = np.iinfo(np.int64).min  # datetime64[D] NaT viewed as int64.
+
+class TransactionIndex:
+    """Secondary indexes over the rows of a ColumnarTransactionStore.
+
+    Every row gets a stable, monotonically increasing row ID. The indexes refer to row
+    IDs rather than positions, so deleting rows only removes the affected index
+    entries; positions are recovered with a binary search over the row ID array,
+    which stays sorted because rows are only ever appended or removed.
+
+    Indexes:
+        by_id: transaction_id -> row ID.
+        by_source: source file ID -> set of row IDs.
+        date index: row IDs sorted by activity date, range-queried with bisection.
+    """
+
+    def __init__(self, data: ColumnarTransactionStore):
+        self.rowids = np.arange(len(data), dtype=np.int64)
+        self._next_rowid = len(data)
+        self.by_id: Dict[str, int] = {}
+        self.by_source: Dict[str, Set[int]] = {}
+        self._date_keys = np.empty(0, dtype=np.int64)
+        self._date_rowids = np.empty(0, dtype=np.int64)
+        self._stale_dates = 0
+        # Spare capacity behind rowids and the date index, so appends don't copy them.
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._add(data, self.rowids)
+
+    def __len__(self) -> int:
+        return len(self.rowids)
+
+    def positions(self, rowids: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """Translates row IDs into current row positions, dropping IDs of deleted rows."""
+        rowids = np.asarray(rowids, dtype=np.int64)
+        positions = np.searchsorted(self.rowids, rowids)
+        found = positions < len(self.rowids)
+        found[found] = self.rowids[positions[found]] == rowids[found]
+        return positions[found]
+
+    def lookup(self, transaction_ids: Sequence[str]) -> np.ndarray:
+        """Returns the row position of each transaction ID, or -1 where it isn't indexed."""
+        rowids = np.fromiter((self.by_id.get(transaction_id, -1) for transaction_id in transaction_ids), dtype=np.int64, count=len(transaction_ids))
+        positions = np.full(len(rowids), -1, dtype=np.int64)
+        known = rowids >= 0
+        positions[known] = np.searchsorted(self.rowids, rowids[known])
+        return positions
+
+    def position_of(self, transaction_id: str) -> Optional[int]:
+        """Returns the row position of a transaction ID, if it's indexed."""
+        position = self.lookup([transaction_id])[0]
+        return int(position) if position >= 0 else None
+
+    def date_range(self, date_start: Optional[date] = None, date_end: Optional[date] = None) -> np.ndarray:
+        """Returns the sorted row positions whose activity date falls within [date_start, date_end]."""
+        valid_start = np.searchsorted(self._date_keys, NAT_DAY, side='right')
+        start = valid_start if date_start is None else max(valid_start, np.searchsorted(self._date_keys, _day(date_start), side='left'))
+        end = len(self._date_keys) if date_end is None else np.searchsorted(self._date_keys, _day(date_end), side='right')
+        return np.sort(self.positions(self._date_rowids[start:end]))
+
+    def source_rows(self, file_id: str) -> np.ndarray:
+        """Returns the sorted row positions imported from an uploaded file."""
+        return np.sort(self.positions(list(self.by_source.get(file_id, ()))))
+
+    def append(self, data: ColumnarTransactionStore) -> None:
+        """Indexes rows that were appended to the end of the store."""
+        rowids = np.arange(self._next_rowid, self._next_rowid + len(data), dtype=np.int64)
+        self._next_rowid += len(data)
+        self._buffers['rowids'], self.rowids = extend_column(self._buffers.get('rowids'), self.rowids, rowids)
+        self._add(data, rowids)
+
+    def update_sources(self, positions: np.ndarray, old_sources: Sequence[Optional[str]], new_sources: Sequence[Optional[str]]) -> None:
+        """Moves rows that were overwritten in place from their old source file to their new one."""
+        for rowid, old_source, new_source in zip(self.rowids[positions].tolist(), old_sources, new_sources):
+            if old_source != new_source:
+                self.by_source.get(old_source, set()).discard(rowid)
+                if new_source is not None:
+                    self.by_source.setdefault(new_source, set()).add(rowid)
+
+    def remove(self, positions: np.ndarray, transaction_ids: Iterable[str], sources: Iterable[Optional[str]]) -> None:
+        """Drops the index entries of rows that are about to be deleted from the store.
+
+        Args:
+            positions: Current row positions being deleted.
+            transaction_ids: Transaction IDs of those rows.
+            sources: Source file IDs of those rows.
+        """
+        rowids = self.rowids[positions]
+        for rowid, transaction_id, source in zip(rowids.tolist(), transaction_ids, sources):
+            if self.by_id.get(transaction_id) == rowid:
+                del self.by_id[transaction_id]
+            rows = self.by_source.get(source)
+            if rows is not None:
+                rows.discard(rowid)
+                if not rows:
+                    del self.by_source[source]
+
+        self.rowids = np.delete(self.rowids, positions)
+
+        # Deleted rows are filtered out of date queries by positions(); only compact the
+        # date index once a good share of it is stale.
+        self._stale_dates += len(rowids)
+        if self._stale_dates > len(self._date_rowids) // 2:
+            live = np.isin(self._date_rowids, self.rowids, assume_unique=True)
+            self._date_keys, self._date_rowids = self._date_keys[live], self._date_rowids[live]
+            self._stale_dates = 0
+
+    def _add(self, data: ColumnarTransactionStore, rowids: np.ndarray) -> None:
+        self.by_id.update(zip(data['transaction_id'].tolist(), rowids.tolist()))
+
+        sources = data[SOURCE_COLUMN]
+        known = np.flatnonzero(sources.astype(bool))
+        labels, inverse = np.unique(sources[known].astype(str), return_inverse=True)
+        for code, label in enumerate(labels.tolist()):
+            self.by_source.setdefault(label, set()).update(rowids[known][inverse.reshape(-1) == code].tolist())
+
+        keys = data['activity_date'].view(np.int64)
+        order = np.argsort(keys, kind='stable')
+        keys, rowids = keys[order], rowids[order]
+        if not len(self._date_keys) or not len(keys) or keys[0] >= self._date_keys[-1]:
+            # Common case: new statements only add later dates.
+            self._buffers['date_keys'], self._date_keys = extend_column(self._buffers.get('date_keys'), self._date_keys, keys)
+            self._buffers['date_rowids'], self._date_rowids = extend_column(self._buffers.get('date_rowids'), self._date_rowids, rowids)
+        else:
+            insert_at = np.searchsorted(self._date_keys, keys, side='right')
+            self._date_keys = np.insert(self._date_keys, insert_at, keys)
+            self._date_rowids = np.insert(self._date_rowids, insert_at, rowids)
+
+def _day(value: date) -> int:
+    return int(np.datetime64(value, 'D').astype(np.int64))
@@ -1,13 +1,16 @@
-from typing import Callable, Literal, Mapping, Optional, Tuple
+from typing import Callable, Iterable, Literal, Mapping, Optional, Tuple
 
-from normalized_transaction_instrument import NormalizedTransactionInstrument
-from backend.models.instruments import ACCOUNT_UPLOAD_KEY, NormalizedTransactionSchema, TransactionSchema
+from backend.constants import NORMALIZE_BATCH_SIZE
+from backend.models.instruments import ACCOUNT_UPLOAD_KEY, INSTRUMENT_TYPES, NormalizedTransactionSchema, TransactionSchema
+from backend.services.instruments.batch_transforms import BatchTransform, get_batch_transform, transaction_ids
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.utils.file_io import iter_batches, rows_to_columns
 
 TRANSFORM_FUNC = Callable[[TransactionSchema], NormalizedTransactionSchema]
 
 class TransactionInstrument:
     """Represents a financial transaction instrument with customizable data normalization."""
-    
+
     @staticmethod
     def normalize(
         data: TransactionSchema,
@@ -25,3 +28,68 @@ class TransactionInstrument:
             NormalizedTransactionSchema: The normalized transaction data.
         """
         return transform_func(data)
+
+    @staticmethod
+    def normalize_batch(
+        rows: Iterable[Mapping[str, str]],
+        instrument_type: INSTRUMENT_TYPES,
+        account: str
+    ) -> ColumnarTransactionStore:
+        """
+        Normalizes a whole parsed export file column-wise using the instrument's registered
+        batch transform, instead of applying a transform function one row at a time.
+
+        Args:
+            rows: Parsed CSV rows of the export, keyed by the bank's column headers.
+            instrument_type: Instrument the export came from, e.g. 'USAA_checking'.
+            account: Normalized account the rows belong to, e.g. 'natalia_checking'.
+
+        Returns:
+            ColumnarTransactionStore: The normalized transaction data, with transaction IDs assigned.
+        """
+        batch_transform = get_batch_transform(instrument_type)
+        store = TransactionInstrument._transform_rows(rows, batch_transform, account)
+        store.columns['transaction_id'] = transaction_ids(batch_transform.normalized_schema, store.columns)
+        return store
+
+    @staticmethod
+    def normalize_stream(
+        rows: Iterable[Mapping[str, str]],
+        instrument_type: INSTRUMENT_TYPES,
+        account: str,
+        batch_size: int = NORMALIZE_BATCH_SIZE
+    ) -> ColumnarTransactionStore:
+        """
+        Normalizes an incrementally parsed export file, holding at most batch_size raw rows
+        in memory at a time.
+
+        Each batch is transformed column-wise as soon as it is parsed. Transaction IDs are
+        assigned once over the combined result so they match normalize_batch exactly.
+
+        Args:
+            rows: Iterator of parsed CSV rows, e.g. GoogleAPIClient.iter_drive_file_rows.
+            instrument_type: Instrument the export came from, e.g. 'robinhood_investing'.
+            account: Normalized account the rows belong to, e.g. 'foster_investing'.
+            batch_size: Maximum number of raw rows normalized at once.
+
+        Returns:
+            ColumnarTransactionStore: The normalized transaction data, with transaction IDs assigned.
+        """
+        batch_transform = get_batch_transform(instrument_type)
+        stores = [
+            TransactionInstrument._transform_rows(batch, batch_transform, account)
+            for batch in iter_batches(rows, batch_size)
+        ] or [TransactionInstrument._transform_rows([], batch_transform, account)]
+        store = stores[0].concat(*stores[1:])
+        store.columns['transaction_id'] = transaction_ids(batch_transform.normalized_schema, store.columns)
+        return store
+
+    @staticmethod
+    def _transform_rows(
+        rows: Iterable[Mapping[str, str]],
+        batch_transform: BatchTransform,
+        account: str
+    ) -> ColumnarTransactionStore:
+        """Applies a registered batch transform to parsed rows, leaving transaction IDs unset."""
+        columns = batch_transform.transform_func(rows_to_columns(rows, batch_transform.raw_schema), account)
+        return ColumnarTransactionStore(batch_transform.normalized_schema, columns)
@@ -0,0 +1,89 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from backend.services.instruments.columnar_store import SOURCE_COLUMN, ColumnarTransactionStore
+from backend.services.instruments.transaction_index import TransactionIndex
+
+class MergeResult(NamedTuple):
+    """Outcome of merging incoming transactions into an existing store."""
+
+    data: ColumnarTransactionStore
+    updated_rows: np.ndarray  # Rows of the existing store that were overwritten in place.
+    appended_rows: np.ndarray  # Rows of the merged store that were newly appended.
+
+def supersedes(
+    existing: ColumnarTransactionStore,
+    existing_rows: np.ndarray,
+    incoming: ColumnarTransactionStore,
+    incoming_rows: np.ndarray
+) -> np.ndarray:
+    """Returns a mask of incoming rows that should replace the existing row with the same ID.
+
+    Newer data wins, except that a pending transaction never overwrites one that has
+    already posted, so pending -> posted transitions only ever move forward.
+    """
+    if 'posted' not in existing.columns:
+        return np.ones(len(incoming_rows), dtype=np.bool_)
+    return incoming['posted'][incoming_rows] | ~existing['posted'][existing_rows]
+
+def dedupe_rows(data: ColumnarTransactionStore) -> np.ndarray:
+    """Returns the sorted row indices to keep so each transaction ID appears once.
+
+    Among rows sharing an ID a posted row is preferred, then the latest row.
+    """
+    length = len(data)
+    if not length:
+        return np.arange(0)
+
+    _, id_codes = np.unique(data['transaction_id'].astype(str), return_inverse=True)
+    id_codes = id_codes.reshape(-1)
+    posted = data['posted'] if 'posted' in data.columns else np.zeros(length, dtype=np.bool_)
+
+    # Sort by ID, then posted, then position, and keep the last row of each ID group.
+    order = np.lexsort((np.arange(length), posted, id_codes))
+    last = np.r_[id_codes[order][1:] != id_codes[order][:-1], True]
+    return np.sort(order[last])
+
+def merge_stores(
+    data: ColumnarTransactionStore,
+    index: TransactionIndex,
+    incoming: ColumnarTransactionStore
+) -> MergeResult:
+    """Hash-joins incoming transactions onto an existing store by transaction ID.
+
+    Rows whose ID already exists are updated in place when they supersede the stored
+    row; all other rows are appended in place into the store's spare capacity. Only
+    the incoming rows are looked up or copied, so a merge costs amortized O(new). The
+    index is updated to match.
+
+    Args:
+        data: Existing transaction data; it is updated and appended to in place.
+        index: Secondary indexes over data.
+        incoming: Deduplicated transaction data to merge in.
+
+    Returns:
+        MergeResult: The merged store and the rows that were updated or appended.
+    """
+    existing_rows = index.lookup(incoming['transaction_id'].tolist())
+    is_new = existing_rows < 0
+
+    matched = np.flatnonzero(~is_new)
+    replace = supersedes(data, existing_rows[matched], incoming, matched)
+    updated_rows, replacement_rows = existing_rows[matched][replace], matched[replace]
+    index.update_sources(
+        updated_rows,
+        data[SOURCE_COLUMN][updated_rows].tolist(),
+        incoming[SOURCE_COLUMN][replacement_rows].tolist()
+    )
+    for name, column in data.columns.items():
+        column[updated_rows] = incoming[name][replacement_rows]
+
+    new_rows = np.flatnonzero(is_new)
+    appended_rows = np.arange(len(data), len(data) + len(new_rows))
+    if len(new_rows):
+        appended = incoming.take(new_rows)
+        data.append(appended)
+        index.append(appended)
+
+    return MergeResult(data, updated_rows, appended_rows)
@@ -0,0 +1,272 @@
+import base64
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.constants import QUERY_CACHED_MONTHS
+from backend.database.rollups import get_transaction_rollups
+from backend.database.storage import TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_TYPES, NormalizedTransactionSchema
+from backend.services.instruments.columnar_store import ColumnarTransactionStore, column_specs, encode_categories
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+
+class TransactionPage(NamedTuple):
+    """One keyset-paginated page of transactions."""
+
+    records: List[NormalizedTransactionSchema]
+    next_cursor: Optional[str]  # Pass back as cursor to fetch the following page; None on the last page.
+
+class MonthData(NamedTuple):
+    """One month of an instrument's transactions in keyset order, as cached by TransactionQueries."""
+
+    version: Tuple[int, ...]  # Seqs of the storage segments the month was read from.
+    data: ColumnarTransactionStore
+    transaction_ids: np.ndarray  # str; the second sort key, for binary searches within a day.
+
+class TransactionQueries:
+    """Read-side queries over stored instrument data for the API.
+
+    Storage partitions every instrument by activity month, and queries read it one
+    month at a time. Each month is sorted into keyset order, (activity_date,
+    transaction_id), when it's loaded, and reused until its segments change, so a
+    sync only reloads the months it wrote to and concurrent requests share one
+    in-memory copy. A page starts at the cursor's month and position, found by binary
+    search, and is sliced from there. Every query filters the columns vectorized and
+    only materializes the rows it returns.
+    """
+
+    def __init__(self, storage: Optional[TransactionStorage] = None, cached_months: int = QUERY_CACHED_MONTHS):
+        """
+        Args:
+            storage: Storage the transactions are read from; defaults to INSTRUMENT_DATA.
+            cached_months: Instrument months kept in memory, least recently used evicted first.
+        """
+        self.storage = storage if storage is not None else get_transaction_storage()
+        self.cached_months = cached_months
+        self._lock = threading.Lock()
+        self._months: 'OrderedDict[Tuple[ACCOUNT_TYPES, str], MonthData]' = OrderedDict()
+
+    def month(self, account_type: ACCOUNT_TYPES, month: str) -> MonthData:
+        """Returns one month ('YYYY-MM') of an instrument's transactions in keyset order, reloading it if its segments changed."""
+        month_start = np.datetime64(month, 'M')
+        date_start = month_start.astype('datetime64[D]').astype(date)
+        date_end = ((month_start + 1).astype('datetime64[D]') - 1).astype(date)
+        version = tuple(segment['seq'] for segment in self.storage.segments(account_type, date_start, date_end))
+        key = (account_type, month)
+        with self._lock:
+            cached = self._months.get(key)
+            if cached is None or cached.version != version:
+                data = self.storage.load(account_type, INSTRUMENT_CLASSES[account_type].SCHEMA, date_start, date_end)
+                transaction_ids = data['transaction_id'].astype(str)
+                order = np.lexsort((transaction_ids, data['activity_date']))
+                cached = self._months[key] = MonthData(version, data.take(order), transaction_ids[order])
+            self._months.move_to_end(key)
+            while len(self._months) > self.cached_months:
+                self._months.popitem(last=False)
+        return cached
+
+    def select(
+        self,
+        account_type: ACCOUNT_TYPES,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        accounts: Optional[Sequence[str]] = None,
+        classifications: Optional[Sequence[str]] = None
+    ) -> Tuple[ColumnarTransactionStore, np.ndarray]:
+        """Returns the rows matching the filters, in keyset order, and their positions.
+
+        Rows are ordered by (activity_date, transaction_id), which is also the order
+        cursors refer to.
+        """
+        parts = [data.take(positions) for data, positions in self._iter_months(account_type, date_start, date_end, accounts, classifications)]
+        data = parts[0].concat(*parts[1:]) if parts else ColumnarTransactionStore(INSTRUMENT_CLASSES[account_type].SCHEMA)
+        return data, np.arange(len(data))
+
+    def _iter_months(
+        self,
+        account_type: ACCOUNT_TYPES,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        accounts: Optional[Sequence[str]] = None,
+        classifications: Optional[Sequence[str]] = None,
+        after: Optional[Tuple[np.datetime64, str]] = None
+    ) -> Iterator[Tuple[ColumnarTransactionStore, np.ndarray]]:
+        """Yields each month's data and the positions of its rows matching the filters, in keyset order.
+
+        Months before date_start or the `after` keyset position aren't read at all;
+        within a month, both bounds are found by binary search.
+        """
+        self.check_filters(account_type, accounts, classifications)
+        first_month = str(np.datetime64(date_start, 'M')) if date_start else ''
+        if after is not None:
+            first_month = max(first_month, str(after[0].astype('datetime64[M]')))
+        last_month = str(np.datetime64(date_end, 'M')) if date_end else None
+
+        for month in self.storage.months(account_type):
+            if month < first_month or (last_month and month > last_month):
+                continue
+            cached = self.month(account_type, month)
+            data, dates = cached.data, cached.data['activity_date']
+            start = np.searchsorted(dates, np.datetime64(date_start, 'D'), side='left') if date_start else 0
+            end = np.searchsorted(dates, np.datetime64(date_end, 'D'), side='right') if date_end else len(data)
+            if after is not None:
+                day_start, day_end = np.searchsorted(dates, after[0], side='left'), np.searchsorted(dates, after[0], side='right')
+                start = max(start, day_start + np.searchsorted(cached.transaction_ids[day_start:day_end], after[1], side='right'))
+
+            positions = np.arange(start, max(start, end))
+            for name, labels in (('account', accounts), ('classification', classifications)):
+                if labels:
+                    codes = encode_categories(data.spec(name), labels)
+                    positions = positions[np.isin(data[name][positions], codes[codes >= 0])]
+            if len(positions):
+                yield data, positions
+
+    def check_filters(
+        self,
+        account_type: ACCOUNT_TYPES,
+        accounts: Optional[Sequence[str]] = None,
+        classifications: Optional[Sequence[str]] = None
+    ) -> None:
+        """Raises ValueError for a filter on a column the instrument's schema doesn't have."""
+        names = {spec.name for spec in column_specs(INSTRUMENT_CLASSES[account_type].SCHEMA)}
+        for name, labels in (('account', accounts), ('classification', classifications)):
+            if labels and name not in names:
+                raise ValueError(f"{account_type} transactions have no {name} to filter by.")
+
+    def page(
+        self,
+        account_type: ACCOUNT_TYPES,
+        limit: int,
+        cursor: Optional[str] = None,
+        **filters: Any
+    ) -> TransactionPage:
+        """Returns up to limit matching transactions following the cursor.
+
+        Only the months from the cursor's onwards are read, and only until the page is full.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        parts, remaining = [], limit + 1  # One row past the page tells whether another page follows.
+        for data, positions in self._iter_months(account_type, after=after, **filters):
+            parts.append(data.take(positions[:remaining]))
+            remaining -= len(parts[-1])
+            if not remaining:
+                break
+
+        page = parts[0].concat(*parts[1:]) if parts else ColumnarTransactionStore(INSTRUMENT_CLASSES[account_type].SCHEMA)
+        next_cursor = None
+        if len(page) > limit:
+            page = page.take(np.arange(limit))
+            next_cursor = encode_cursor(page['activity_date'][-1], page['transaction_id'][-1])
+        return TransactionPage(page.to_records(), next_cursor)
+
+    def iter_batches(self, account_type: ACCOUNT_TYPES, batch_size: int = 1000, **filters: Any) -> Iterator[List[NormalizedTransactionSchema]]:
+        """Yields every matching transaction in keyset order, up to batch_size records at a time.
+
+        Months are read one at a time as the batches are consumed, and batches don't span months.
+        """
+        for data, positions in self._iter_months(account_type, **filters):
+            for start in range(0, len(positions), batch_size):
+                yield data.take(positions[start:start + batch_size]).to_records()
+
+    def totals(
+        self,
+        account_type: ACCOUNT_TYPES,
+        group_by: Optional[str] = None,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        accounts: Optional[Sequence[str]] = None,
+        classifications: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Sums amounts per category label or per 'month' over the matching transactions.
+
+        group_by defaults to 'classification', or 'month' for instruments without
+        classifications; any other category column of the schema also works.
+
+        Groupings by month, account or classification over whole months (no date
+        bounds, or bounds on the first and last day of a month) are read from the
+        materialized monthly rollups without touching the transactions.
+
+        Returns:
+            Dict[str, Dict[str, float]]: For each group, the sum of every amount column the
+            instrument has (credit/debit plus their net, or amount for crypto).
+        """
+        schema = INSTRUMENT_CLASSES[account_type].SCHEMA
+        kinds = {spec.name: spec.kind for spec in column_specs(schema)}
+        if group_by is None:
+            group_by = 'classification' if 'classification' in kinds else 'month'
+        elif group_by != 'month' and kinds.get(group_by) != 'category':
+            raise ValueError(f"{account_type} transactions can't be grouped by {group_by}.")
+        self.check_filters(account_type, accounts, classifications)
+        if (
+            group_by in ('month', 'account', 'classification')
+            and (date_start is None or date_start.day == 1)
+            and (date_end is None or (date_end + timedelta(days=1)).day == 1)
+        ):
+            return get_transaction_rollups(self.storage).totals(
+                account_type, schema, group_by, date_start, date_end, accounts, classifications
+            )
+
+        data, positions = self.select(account_type, date_start, date_end, accounts, classifications)
+        mask = np.zeros(len(data), dtype=np.bool_)
+        mask[positions] = True
+
+        value_columns = [name for name in ('credit', 'debit', 'amount') if name in data.columns]
+        totals: Dict[str, Dict[str, float]] = {}
+        for name in value_columns:
+            for group, total in data.totals_by(group_by, name, mask).items():
+                totals.setdefault(group, dict.fromkeys(value_columns, 0.0))[name] = total
+        if 'credit' in value_columns and 'debit' in value_columns:
+            for group_totals in totals.values():
+                group_totals['net'] = group_totals['credit'] - group_totals['debit']
+        return totals
+
+    def running_balances(
+        self,
+        account_type: ACCOUNT_TYPES,
+        account: Optional[str] = None,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns the end-of-day running balance (cumulative credit - debit) of an instrument.
+
+        The running total starts from the first stored transaction, so balances within
+        [date_start, date_end] include everything before date_start.
+        """
+        data, positions = self.select(account_type, date_end=date_end, accounts=[account] if account else None)
+        if 'credit' not in data.columns or 'debit' not in data.columns:
+            raise ValueError(f"{account_type} transactions have no credit/debit amounts to balance.")
+
+        dates = data['activity_date'][positions]
+        net = np.nan_to_num(data['credit'][positions]) - np.nan_to_num(data['debit'][positions])
+        days, first = np.unique(dates, return_index=True)
+        balances = np.cumsum(net)[np.r_[first[1:] - 1, len(net) - 1]] if len(days) else np.empty(0)
+
+        keep = days >= np.datetime64(date_start, 'D') if date_start else np.ones(len(days), dtype=np.bool_)
+        return [
+            {'date': day, 'balance': round(balance, 2)}
+            for day, balance in zip(days[keep].astype(date).tolist(), balances[keep].tolist())
+        ]
+
+def encode_cursor(activity_date: np.datetime64, transaction_id: str) -> str:
+    """Encodes a (date, transaction ID) keyset position as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(f'{activity_date}|{transaction_id}'.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[np.datetime64, str]:
+    """Decodes a cursor made by encode_cursor, raising ValueError if it's malformed."""
+    try:
+        activity_date, transaction_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+        return np.datetime64(activity_date, 'D'), transaction_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+_default_queries: Optional[TransactionQueries] = None
+
+def get_transaction_queries() -> TransactionQueries:
+    """Returns the process-wide TransactionQueries."""
+    global _default_queries
+    if _default_queries is None:
+        _default_queries = TransactionQueries()
+    return _default_queries
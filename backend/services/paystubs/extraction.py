@@ -0,0 +1,89 @@
+import re
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from backend.models.paystubs import PaystubData
+from backend.utils.file_io import parse_date
+
+AMOUNT_PATTERN = re.compile(r'-?\$?\(?(\d{1,3}(?:,\d{3})*\.\d{2})\)?')
+DATE_PATTERN = re.compile(r'\b(\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2})\b')
+
+# Label variants used by common payroll providers, matched case-insensitively at the start of a line.
+FIELD_LABELS = {
+    'gross_pay': ('gross pay', 'total gross', 'gross earnings', 'current gross'),
+    'net_pay': ('net pay', 'net check', 'take home'),
+    'federal_tax': ('federal income tax', 'fed income tax', 'federal withholding', 'fit', 'fed withholding'),
+    'state_tax': ('state income tax', 'state withholding', 'sit'),
+    'social_security': ('social security', 'oasdi', 'fica - social security', 'ss tax'),
+    'medicare': ('medicare', 'fica - medicare', 'med tax'),
+}
+PAY_DATE_LABELS = ('pay date', 'check date', 'payment date', 'advice date')
+PERIOD_LABELS = ('pay period', 'period beginning', 'period start', 'period')
+
+def extract_paystub_fields(paystub_id: str, pages: Sequence[str], ocr_pages: int) -> PaystubData:
+    """Extracts pay dates and amounts from the text of a paystub's pages.
+
+    For amount lines that print both this period's and the year-to-date value, the
+    first amount is taken as the current value and the last as year to date.
+    """
+    text = '\n'.join(pages)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+    amounts = {name: _find_amounts(lines, labels) for name, labels in FIELD_LABELS.items()}
+    pay_dates = _find_dates(lines, PAY_DATE_LABELS)
+    period_start, period_end = _find_period(lines)
+    return PaystubData(
+        paystub_id=paystub_id,
+        employer=lines[0] if lines else None,
+        pay_date=pay_dates[0] if pay_dates else None,
+        period_start=period_start,
+        period_end=period_end,
+        gross_pay=amounts['gross_pay'][0] if amounts['gross_pay'] else None,
+        net_pay=amounts['net_pay'][0] if amounts['net_pay'] else None,
+        federal_tax=amounts['federal_tax'][0] if amounts['federal_tax'] else None,
+        state_tax=amounts['state_tax'][0] if amounts['state_tax'] else None,
+        social_security=amounts['social_security'][0] if amounts['social_security'] else None,
+        medicare=amounts['medicare'][0] if amounts['medicare'] else None,
+        ytd_gross_pay=amounts['gross_pay'][-1] if len(amounts['gross_pay']) > 1 else None,
+        page_count=len(pages),
+        ocr_pages=ocr_pages,
+        raw_text=text
+    )
+
+def _label_lines(lines: List[str], labels: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    """Returns each line starting with one of the labels, paired with the line after it
+    (PDF text layers often put a label and its values on separate lines)."""
+    pattern = re.compile(r'^(?:' + '|'.join(re.escape(label) for label in labels) + r')\b', re.IGNORECASE)
+    return [
+        (line, lines[index + 1] if index + 1 < len(lines) else '')
+        for index, line in enumerate(lines) if pattern.match(line)
+    ]
+
+def _find_amounts(lines: List[str], labels: Tuple[str, ...]) -> List[float]:
+    for line, next_line in _label_lines(lines, labels):
+        for candidate in (line, next_line):
+            amounts = [float(amount.replace(',', '')) for amount in AMOUNT_PATTERN.findall(candidate)]
+            if amounts:
+                return amounts
+    return []
+
+def _find_dates(lines: List[str], labels: Tuple[str, ...]) -> List[date]:
+    for line, next_line in _label_lines(lines, labels):
+        for candidate in (line, next_line):
+            dates = []
+            for value in DATE_PATTERN.findall(candidate):
+                try:
+                    dates.append(parse_date(value))
+                except ValueError:
+                    continue
+            if dates:
+                return dates
+    return []
+
+def _find_period(lines: List[str]) -> Tuple[Optional[date], Optional[date]]:
+    dates = _find_dates(lines, PERIOD_LABELS)
+    if len(dates) >= 2:
+        return dates[0], dates[1]
+    start = _find_dates(lines, ('period beginning', 'period start'))
+    end = _find_dates(lines, ('period ending', 'period end'))
+    return (start[0] if start else None), (end[0] if end else None)
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.database.paystubs import PaystubStore
+from backend.models.paystubs import PaystubData
+from backend.services.paystubs.extraction import extract_paystub_fields
+from backend.utils.ocr import get_ocr_executor, ocr_image, run_ocr_task
+
+logger = logging.getLogger('numifocus.services')
+
+MIN_TEXT_LAYER_CHARS = 20  # Pages with less embedded text than this are treated as scans.
+OCR_DPI = 300
+
+def read_text_layers(pdf_bytes: bytes) -> List[Optional[str]]:
+    """Returns the embedded text of every page of a PDF, or None for pages that need OCR."""
+    import pymupdf  # Loaded by the OCR workers that read PDFs, not at server startup.
+
+    with pymupdf.open(stream=pdf_bytes, filetype='pdf') as document:
+        pages = []
+        for page in document:
+            text = page.get_text('text', sort=True)
+            pages.append(text if len(text.strip()) >= MIN_TEXT_LAYER_CHARS else None)
+        return pages
+
+def ocr_pdf_page(pdf_bytes: bytes, page_number: int, dpi: int = OCR_DPI) -> str:
+    """Renders one PDF page to grayscale and OCRs it."""
+    import pymupdf
+
+    with pymupdf.open(stream=pdf_bytes, filetype='pdf') as document:
+        pixmap = document[page_number].get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+    image = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+    return ocr_image(image)
+
+def extract_paystubs(
+    pdfs: Sequence[bytes],
+    store: Optional[PaystubStore] = None
+) -> List[Union[PaystubData, Exception]]:
+    """Extracts a batch of paystub PDFs, returning each paystub or the error it raised, in input order.
+
+    PDFs already in the store (by content hash) aren't read again. For the rest, text
+    layers are read on the OCR process pool, one task per file, and then every page
+    without a text layer is rendered and OCR'd as its own task, so a scanned
+    multi-page stub is spread across cores just like a batch of files. Newly
+    extracted paystubs are saved to the store.
+    """
+    store = store if store is not None else PaystubStore()
+    executor = get_ocr_executor()
+    paystub_ids = [hashlib.sha256(pdf).hexdigest() for pdf in pdfs]
+    results: Dict[int, Union[PaystubData, Exception]] = {}
+
+    text_layers: Dict[int, Future] = {}
+    for index, (pdf, paystub_id) in enumerate(zip(pdfs, paystub_ids)):
+        cached = store.get(paystub_id)
+        if cached is not None:
+            results[index] = PaystubData(**cached)
+        else:
+            text_layers[index] = executor.submit(run_ocr_task, read_text_layers, pdf)
+
+    pages: Dict[int, List[Optional[str]]] = {}
+    ocr_pages: Dict[Tuple[int, int], Future] = {}
+    for index, future in text_layers.items():
+        try:
+            pages[index] = future.result()
+        except Exception as e:
+            results[index] = e
+            continue
+        for page_number, text in enumerate(pages[index]):
+            if text is None:
+                ocr_pages[(index, page_number)] = executor.submit(run_ocr_task, ocr_pdf_page, pdfs[index], page_number)
+
+    for (index, page_number), future in ocr_pages.items():
+        try:
+            pages[index][page_number] = future.result()
+        except Exception as e:
+            results.setdefault(index, e)
+
+    for index, page_texts in pages.items():
+        if index in results:
+            continue
+        ocr_count = sum(1 for key in ocr_pages if key[0] == index)
+        paystub = extract_paystub_fields(paystub_ids[index], page_texts, ocr_count)
+        store.save(paystub)
+        results[index] = paystub
+
+    logger.info("[PaystubExtraction] Extracted %d paystubs (%d OCR'd pages), %s from cache", len(text_layers), len(ocr_pages), len(pdfs) - len(text_layers))
+    return [results[index] for index in range(len(pdfs))]
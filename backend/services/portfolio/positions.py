@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import date
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple, TypedDict
+
+import numpy as np
+
+from backend.database.storage import UNDATED_MONTH, TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_TYPES
+from backend.models.portfolio import Lot, Position
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+
+logger = logging.getLogger('numifocus.services')
+
+PORTFOLIO_ACCOUNT_TYPES: Tuple[ACCOUNT_TYPES, ...] = ('crypto', 'investing', 'IRA')
+CHECKPOINT_DIRNAME = 'positions'
+BUY, SELL, DIVIDEND = 0, 1, 2
+
+class PositionState(TypedDict):
+    """A position after some prefix of its trades, as kept in a checkpoint."""
+
+    lots: List[Tuple[str, float, float]]  # (acquired ISO date, quantity, cost) of each open lot, oldest first.
+    realized_pnl: float
+    dividend_income: float
+    last_price: Optional[float]
+
+class Trades(NamedTuple):
+    """Buys, sells and dividends of an instrument as parallel arrays."""
+
+    key: np.ndarray  # 'account|ticker' of each trade.
+    date: np.ndarray  # datetime64[D]
+    kind: np.ndarray  # BUY, SELL or DIVIDEND.
+    quantity: np.ndarray
+    amount: np.ndarray  # Cost of a buy and proceeds of a sale, fees included; income of a dividend.
+    price: np.ndarray
+
+    def take(self, positions: np.ndarray) -> 'Trades':
+        return Trades(*(column[positions] for column in self))
+
+def extract_trades(data: ColumnarTransactionStore) -> Trades:
+    """Reads the trades out of InvestingData/IRAData (trans_code) or CryptoData (credit/debit quantities).
+
+    Crypto fees are added to a buy's cost and taken off a sale's proceeds. Rows that
+    aren't trades (ACH transfers, rows without a ticker, date or amount) are dropped.
+    """
+    accounts = np.array(data.spec('account').categories + ('',), dtype=object)[data['account']]
+    if 'trans_code' in data.columns:
+        codes = np.array(data.spec('trans_code').categories + ('',), dtype=object)[data['trans_code']]
+        kind = np.select([codes == 'BUY', codes == 'SELL', codes == 'CDIV'], [BUY, SELL, DIVIDEND], -1)
+        quantity = np.abs(data['quantity'])
+        amount = np.where(kind == BUY, data['debit'], data['credit'])
+        amount = np.where(np.isnan(amount) & (kind != DIVIDEND), quantity * data['price'], amount)
+    else:
+        received, sent = np.nan_to_num(data['credit_quantity']), np.nan_to_num(data['debit_quantity'])
+        kind = np.where(received > 0, BUY, np.where(sent > 0, SELL, -1))
+        quantity = np.where(kind == BUY, received, sent)
+        fee = np.nan_to_num(data['fee'])
+        amount = np.where(kind == BUY, np.abs(data['amount']) + fee, np.abs(data['amount']) - fee)
+
+    tickers = data['ticker']
+    has_ticker = np.array([bool(ticker) for ticker in tickers.tolist()], dtype=np.bool_)
+    valid = np.flatnonzero(
+        (kind >= 0) & has_ticker & ~np.isnat(data['activity_date']) & ~np.isnan(amount)
+        & ((kind == DIVIDEND) | (quantity > 0))
+    )
+    return Trades(
+        (accounts[valid] + '|' + tickers[valid]).astype(str),
+        data['activity_date'][valid],
+        kind[valid].astype(np.int8),
+        np.nan_to_num(quantity[valid]),
+        np.abs(amount[valid]),
+        data['price'][valid].astype(np.float64)
+    )
+
+def replay(
+    trades: Trades,
+    start: Mapping[str, PositionState]
+) -> Tuple[Dict[str, PositionState], Dict[str, Dict[str, PositionState]]]:
+    """Applies trades to starting position states with FIFO lot matching.
+
+    Every ticker is processed at once. Each ticker's buys (its carried-over lots
+    first) are laid end to end on one cumulative quantity axis, with cumulative
+    cost as a piecewise-linear function of it, so the FIFO cost of the units a
+    ticker has sold so far is a single np.interp at its offset on that axis. A sale
+    can't consume units bought after it: units sold beyond the ticker's holdings at
+    the time are treated as having no cost basis.
+
+    Returns:
+        The state of every position after all trades, and for each 'YYYY-MM' month
+        with trades, the month-end state of the positions traded in it.
+    """
+    keys = np.unique(np.concatenate([np.array(list(start), dtype=str), trades.key]))
+    group_count = len(keys)
+    gid = np.searchsorted(keys, trades.key)
+    order = np.lexsort((np.arange(len(gid)), trades.date, gid))
+    trades, gid = trades.take(order), gid[order]
+    sequence = np.arange(len(gid)) + 1  # Carried lots are sequence 0, before every trade.
+
+    # Buys: lots carried from the start state, then this window's buys in trade order.
+    carried = [(key, acquired, quantity, cost) for key, state in start.items() for acquired, quantity, cost in state['lots']]
+    is_buy = trades.kind == BUY
+    buy_gid = np.concatenate([np.searchsorted(keys, np.array([lot[0] for lot in carried], dtype=str)), gid[is_buy]])
+    buy_order = np.argsort(buy_gid, kind='stable')
+    buy_gid = buy_gid[buy_order]
+    buy_date = np.concatenate([np.array([lot[1] for lot in carried], dtype='datetime64[D]'), trades.date[is_buy]])[buy_order]
+    buy_quantity = np.concatenate([[lot[2] for lot in carried], trades.quantity[is_buy]])[buy_order]
+    buy_cost = np.concatenate([[lot[3] for lot in carried], trades.amount[is_buy]])[buy_order]
+    buy_sequence = np.concatenate([np.zeros(len(carried), dtype=np.int64), sequence[is_buy]])[buy_order]
+
+    quantity_axis = np.r_[0.0, np.cumsum(buy_quantity)]
+    cost_axis = np.r_[0.0, np.cumsum(buy_cost)]
+    group_first_buy = np.searchsorted(buy_gid, np.arange(group_count))
+    quantity_offset, cost_offset = quantity_axis[group_first_buy], cost_axis[group_first_buy]
+    bought_through = quantity_axis[1:] - quantity_offset[buy_gid]  # Group's cumulative quantity after each buy.
+
+    def fifo_cost(groups: np.ndarray, sold: np.ndarray) -> np.ndarray:
+        return np.interp(quantity_offset[groups] + sold, quantity_axis, cost_axis) - cost_offset[groups]
+
+    # Sells: cumulative quantity sold per group, capped by what had been bought before each sale.
+    is_sell = trades.kind == SELL
+    sell_gid, sell_quantity = gid[is_sell], trades.quantity[is_sell]
+    buy_rank = buy_gid * (len(gid) + 1) + buy_sequence
+    bought_before = quantity_axis[np.searchsorted(buy_rank, sell_gid * (len(gid) + 1) + sequence[is_sell])] - quantity_offset[sell_gid]
+    sold_raw = grouped_cumsum(sell_quantity, sell_gid)
+    # With S_k = min(S_(k-1) + q_k, available_k), S_k = cumsum_k + min(0, running min of available_j - cumsum_j).
+    sold_after = sold_raw + np.minimum(0.0, grouped_running_min(bought_before - sold_raw, sell_gid))
+    first_sale = np.r_[True, sell_gid[1:] != sell_gid[:-1]][:len(sell_gid)]
+    sold_before = np.where(first_sale, 0.0, np.r_[0.0, sold_after[:-1]][:len(sell_gid)])
+    realized = trades.amount[is_sell] - (fifo_cost(sell_gid, sold_after) - fifo_cost(sell_gid, sold_before))
+
+    is_dividend = trades.kind == DIVIDEND
+    sell_date, dividend_date = trades.date[is_sell], trades.date[is_dividend]
+
+    def states_at(month_end: Optional[np.datetime64], groups: np.ndarray) -> Dict[str, PositionState]:
+        sells = sell_date <= month_end if month_end is not None else np.ones(len(sell_gid), dtype=np.bool_)
+        buys = buy_date <= month_end if month_end is not None else np.ones(len(buy_gid), dtype=np.bool_)
+        dividends = dividend_date <= month_end if month_end is not None else np.ones(len(dividend_date), dtype=np.bool_)
+        traded = trades.date <= month_end if month_end is not None else np.ones(len(gid), dtype=np.bool_)
+
+        sold = np.zeros(group_count)
+        np.maximum.at(sold, sell_gid[sells], sold_after[sells])
+        realized_pnl = np.bincount(sell_gid[sells], weights=realized[sells], minlength=group_count)
+        dividend_income = np.bincount(gid[is_dividend][dividends], weights=trades.amount[is_dividend][dividends], minlength=group_count)
+        priced = np.flatnonzero(traded & ~np.isnan(trades.price))
+        last_price = np.full(group_count, np.nan)
+        last_price[gid[priced]] = trades.price[priced]  # Trades are date ordered, so the last write wins.
+
+        remaining = np.where(buys, np.clip(bought_through - sold[buy_gid], 0.0, buy_quantity), 0.0)
+        open_lots = np.flatnonzero(remaining > 1e-12)
+        lots: Dict[int, List[Tuple[str, float, float]]] = {}
+        for index in open_lots.tolist():
+            cost = buy_cost[index] * remaining[index] / buy_quantity[index]
+            lots.setdefault(int(buy_gid[index]), []).append((str(buy_date[index]), float(remaining[index]), float(cost)))
+
+        states = {}
+        for group in groups.tolist():
+            previous = start.get(keys[group])
+            price = last_price[group]
+            states[str(keys[group])] = PositionState(
+                lots=lots.get(group, []),
+                realized_pnl=(previous['realized_pnl'] if previous else 0.0) + float(realized_pnl[group]),
+                dividend_income=(previous['dividend_income'] if previous else 0.0) + float(dividend_income[group]),
+                last_price=float(price) if not np.isnan(price) else (previous['last_price'] if previous else None)
+            )
+        return states
+
+    months = trades.date.astype('datetime64[M]')
+    snapshots = {
+        str(month): states_at((month + 1).astype('datetime64[D]') - 1, np.unique(gid[months == month]))
+        for month in np.unique(months)
+    }
+    return states_at(None, np.arange(group_count)), snapshots
+
+def grouped_cumsum(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """Cumulative sum restarting at each group of a group-sorted array."""
+    totals = np.cumsum(values)
+    starts = np.searchsorted(groups, groups)
+    return totals - np.r_[0.0, totals][starts]
+
+def grouped_running_min(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """Running minimum restarting at each group of a group-sorted array."""
+    if not len(values):
+        return values
+    # Shift every group below all earlier ones so a running min never carries across groups.
+    span = float(values.max() - values.min()) + 1.0
+    shift = groups * span
+    return np.minimum.accumulate(values - shift) + shift
+
+class PositionEngine:
+    """Computes holdings, FIFO cost basis and P&L of the brokerage and crypto accounts.
+
+    Checkpoints of every position's state at the end of each month it was traded
+    in are kept on disk next to the instrument's storage, along with the storage
+    version they reflect. When the stored trades change, only the months from the
+    earliest month written since then are replayed, starting from the checkpoints
+    before it, instead of the full trade history.
+    """
+
+    def __init__(self, storage: Optional[TransactionStorage] = None, root: Optional[str] = None):
+        self.storage = storage if storage is not None else get_transaction_storage()
+        self.root = root if root is not None else os.path.join(self.storage.root, CHECKPOINT_DIRNAME)
+        self._lock = threading.Lock()
+
+    def states(self, account_type: ACCOUNT_TYPES) -> Dict[str, PositionState]:
+        """Returns the current state of every position of an account type, keyed by 'account|ticker'."""
+        if account_type not in PORTFOLIO_ACCOUNT_TYPES:
+            raise ValueError(f"{account_type} accounts don't hold positions.")
+
+        with self._lock:
+            version = self.storage.version(account_type)
+            checkpoint = self._read(account_type)
+            if checkpoint is not None and checkpoint['version'] == version:
+                return _latest(checkpoint['months'])
+
+            months: Dict[str, Dict[str, PositionState]] = {}
+            replay_from = None
+            if checkpoint is not None:
+                written = [
+                    segment['month'] for segment in self.storage.segments(account_type)
+                    if segment['seq'] >= checkpoint['version'] and segment['month'] != UNDATED_MONTH
+                ]
+                replay_from = min(written, default=None)
+                months = {month: states for month, states in checkpoint['months'].items() if replay_from is None or month < replay_from}
+
+            if checkpoint is None or replay_from is not None:
+                date_start = date.fromisoformat(f'{replay_from}-01') if replay_from else None
+                data = self.storage.load(account_type, INSTRUMENT_CLASSES[account_type].SCHEMA, date_start)
+                trades = extract_trades(data)
+                _, snapshots = replay(trades, _latest(months))
+                months.update(snapshots)
+                logger.info("[PositionEngine] Replayed %d %s trades from %s", len(trades.key), account_type, replay_from or 'the beginning')
+
+            self._save(account_type, {'version': version, 'months': months})
+            return _latest(months)
+
+    def positions(
+        self,
+        account_type: ACCOUNT_TYPES,
+        prices: Optional[Mapping[str, float]] = None,
+        include_closed: bool = False
+    ) -> List[Position]:
+        """Returns the positions of an account type.
+
+        Args:
+            account_type: 'investing', 'IRA' or 'crypto'.
+            prices: Current price per ticker for unrealized P&L; the last trade price is used otherwise.
+            include_closed: Whether to include tickers that are no longer held.
+        """
+        positions = []
+        for key, state in sorted(self.states(account_type).items()):
+            account, ticker = key.split('|', 1)
+            quantity = sum(lot[1] for lot in state['lots'])
+            if not quantity and not include_closed:
+                continue
+            cost_basis = sum(lot[2] for lot in state['lots'])
+            price = prices.get(ticker) if prices and ticker in prices else state['last_price']
+            market_value = quantity * price if price is not None else None
+            positions.append(Position(
+                account=account,
+                ticker=ticker,
+                quantity=quantity,
+                cost_basis=cost_basis,
+                average_cost=cost_basis / quantity if quantity else None,
+                realized_pnl=state['realized_pnl'],
+                dividend_income=state['dividend_income'],
+                market_price=price,
+                market_value=market_value,
+                unrealized_pnl=market_value - cost_basis if market_value is not None else None,
+                lots=[Lot(acquired=date.fromisoformat(acquired), quantity=lot_quantity, cost_basis=cost) for acquired, lot_quantity, cost in state['lots']]
+            ))
+        return positions
+
+    def _path(self, account_type: ACCOUNT_TYPES) -> str:
+        return os.path.join(self.root, f'{account_type}.json')
+
+    def _read(self, account_type: ACCOUNT_TYPES) -> Optional[dict]:
+        path = self._path(account_type)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save(self, account_type: ACCOUNT_TYPES, checkpoint: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=self.root, suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(f.name, self._path(account_type))
+
+def _latest(months: Mapping[str, Mapping[str, PositionState]]) -> Dict[str, PositionState]:
+    """Folds monthly checkpoints into the latest state of every position."""
+    states: Dict[str, PositionState] = {}
+    for month in sorted(months):
+        states.update(months[month])
+    return states
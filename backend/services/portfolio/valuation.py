@@ -0,0 +1,68 @@
+from datetime import date
+from typing import NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from backend.database.prices import PriceHistoryStore, get_price_store
+from backend.database.storage import TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_TYPES
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+from backend.services.portfolio.positions import (
+    BUY, DIVIDEND, PORTFOLIO_ACCOUNT_TYPES, SELL, extract_trades, grouped_cumsum, grouped_running_min
+)
+
+class HoldingsValuation(NamedTuple):
+    """Quantity held and market value of every position of an account type on every requested date."""
+
+    keys: np.ndarray  # 'account|ticker' of each row.
+    tickers: np.ndarray
+    dates: np.ndarray  # datetime64[D] of each column.
+    quantity: np.ndarray  # (positions, dates)
+    price: np.ndarray  # (positions, dates) close as of each date; NaN without price history.
+    value: np.ndarray  # (positions, dates)
+
+def value_holdings(
+    account_type: ACCOUNT_TYPES,
+    dates: Union[Sequence[date], np.ndarray],
+    storage: Optional[TransactionStorage] = None,
+    prices: Optional[PriceHistoryStore] = None
+) -> HoldingsValuation:
+    """Values every historical position of an account type on each of the given dates.
+
+    Holdings come from each position's running quantity (buys minus sells), and
+    prices from the price history's latest close on or before each date. Both are
+    looked up for the whole position x date grid at once with composite-key binary
+    searches, so no per-row lookups are made.
+    """
+    if account_type not in PORTFOLIO_ACCOUNT_TYPES:
+        raise ValueError(f"{account_type} accounts don't hold positions.")
+    storage = storage if storage is not None else get_transaction_storage()
+    prices = prices if prices is not None else get_price_store()
+
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    data = storage.load(account_type, INSTRUMENT_CLASSES[account_type].SCHEMA, date_end=dates.max().astype(date) if len(dates) else None)
+    trades = extract_trades(data)
+    trades = trades.take(np.flatnonzero(trades.kind != DIVIDEND))
+
+    keys, gid = np.unique(trades.key, return_inverse=True)
+    gid = gid.reshape(-1)
+    order = np.lexsort((np.arange(len(gid)), trades.date, gid))
+    gid, trade_dates = gid[order], trades.date[order]
+    signed = np.where(trades.kind[order] == BUY, trades.quantity[order], np.where(trades.kind[order] == SELL, -trades.quantity[order], 0.0))
+    # Like the FIFO engine, sales beyond the quantity held don't take a position negative:
+    # with H_k = max(H_(k-1) + s_k, 0), H_k = cumsum_k - min(0, running min of cumsum_j).
+    net = grouped_cumsum(signed, gid)
+    held = net - np.minimum(0.0, grouped_running_min(net, gid))
+
+    # Last trade of each position on or before each date, found on (position, day) composite keys.
+    stride = np.int64(1 << 32)
+    trade_keys = gid.astype(np.int64) * stride + trade_dates.astype(np.int64) + (1 << 31)
+    grid_keys = np.arange(len(keys), dtype=np.int64)[:, None] * stride + dates.astype(np.int64)[None, :] + (1 << 31)
+    last = np.searchsorted(trade_keys, grid_keys, side='right') - 1
+    in_position = (last >= 0) & (gid[np.maximum(last, 0)] == np.arange(len(keys))[:, None])
+    quantity = np.where(in_position, held[np.maximum(last, 0)], 0.0)
+    quantity[np.abs(quantity) < 1e-9] = 0.0
+
+    tickers = np.array([key.split('|', 1)[1] for key in keys.tolist()], dtype=str)
+    price = prices.as_of(tickers[:, None], dates[None, :])
+    return HoldingsValuation(keys, tickers, dates, quantity, price, np.where(quantity == 0, 0.0, quantity * price))
@@ -0,0 +1,78 @@
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+from backend.models.receipts import ReceiptData, ReceiptLineItem
+from backend.utils.file_io import parse_date
+
+# A line ending in a price, e.g. "2 @ BANANAS     1.98" or "MILK 2% $3.49 F".
+AMOUNT_LINE = re.compile(r'^(?P<label>.*?)\s+-?\$?(?P<amount>\d{1,6}[.,]\d{2})-?(?:\s+[A-Z]{1,2})?\s*$')
+QUANTITY_PREFIX = re.compile(r'^(?P<quantity>\d+(?:\.\d+)?)\s*(?:@|x|X)\s+')
+DATE_PATTERN = re.compile(r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2})\b')
+
+TOTAL_LABELS = ('total', 'amount due', 'balance due', 'grand total')
+SUBTOTAL_LABELS = ('subtotal', 'sub total', 'sub-total')
+TAX_LABELS = ('tax', 'sales tax')
+# Lines that carry an amount but aren't purchased items.
+NON_ITEM_LABELS = TOTAL_LABELS + SUBTOTAL_LABELS + TAX_LABELS + ('change', 'cash', 'visa', 'mastercard', 'debit', 'credit', 'tend', 'savings', 'discount')
+
+def extract_receipt_fields(receipt_id: str, text: str) -> ReceiptData:
+    """Extracts the merchant, date, line items and totals from a receipt's OCR text."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+    line_items: List[ReceiptLineItem] = []
+    subtotal = tax = total = None
+    for line in lines:
+        match = AMOUNT_LINE.match(line)
+        if not match:
+            continue
+        label = match['label'].strip()
+        amount = float(match['amount'].replace(',', '.'))
+        lowered = label.lower()
+        if lowered.startswith(SUBTOTAL_LABELS):
+            subtotal = amount
+        elif lowered.startswith(TAX_LABELS):
+            tax = amount
+        elif lowered.startswith(TOTAL_LABELS):
+            total = amount
+        elif label and not lowered.startswith(NON_ITEM_LABELS):
+            description, quantity = _split_quantity(label)
+            line_items.append(ReceiptLineItem(description=description, quantity=quantity, amount=amount))
+
+    if total is None and subtotal is not None:
+        total = round(subtotal + (tax or 0), 2)
+
+    return ReceiptData(
+        receipt_id=receipt_id,
+        merchant=_find_merchant(lines),
+        purchase_date=_find_date(lines),
+        line_items=line_items,
+        subtotal=subtotal,
+        tax=tax,
+        total=total,
+        raw_text=text,
+        account_type=None,
+        transaction_id=None
+    )
+
+def _split_quantity(label: str) -> Tuple[str, Optional[float]]:
+    match = QUANTITY_PREFIX.match(label)
+    if not match:
+        return label, None
+    return label[match.end():].strip(), float(match['quantity'])
+
+def _find_merchant(lines: List[str]) -> Optional[str]:
+    """The merchant name is usually the first line with several letters in it."""
+    for line in lines[:5]:
+        if sum(character.isalpha() for character in line) >= 3 and not AMOUNT_LINE.match(line):
+            return line
+    return None
+
+def _find_date(lines: List[str]) -> Optional[date]:
+    for line in lines:
+        for candidate in DATE_PATTERN.findall(line):
+            try:
+                return parse_date(candidate)
+            except ValueError:
+                continue
+    return None
@@ -0,0 +1,199 @@
+import logging
+import re
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, utils
+
+from backend.database.receipts import ReceiptStore
+from backend.database.storage import TransactionStorage, get_transaction_storage
+from backend.models.instruments import ACCOUNT_TYPES
+from backend.models.receipts import ReceiptData
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.normalized_transaction_instrument import NormalizedTransactionInstrument
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+
+logger = logging.getLogger('numifocus.services')
+
+MATCHED_ACCOUNT_TYPES: Tuple[ACCOUNT_TYPES, ...] = ('checking', 'credit')
+# Card transactions usually post on the purchase date or a few days after it.
+DATE_WINDOW_BEFORE = 1
+DATE_WINDOW_AFTER = 5
+DAY_PENALTY = 4  # Score points lost per day between the receipt and the transaction.
+MIN_MATCH_SCORE = 50
+
+class ReceiptMatch(NamedTuple):
+    """A receipt linked to the transaction that paid for it."""
+
+    receipt_id: str
+    account_type: ACCOUNT_TYPES
+    transaction_id: str
+    score: float
+
+class TransactionMatchIndex:
+    """Groups debit transactions by (account, amount in cents), each group sorted by date.
+
+    A receipt's candidates are then one dictionary lookup per account plus a binary
+    search for its date window, instead of a scan over every transaction.
+    """
+
+    def __init__(self, data: ColumnarTransactionStore):
+        self.data = data
+        cents = np.rint(np.nan_to_num(data['debit'], nan=0.0) * 100).astype(np.int64)
+        dates = data['activity_date']
+        positions = np.flatnonzero((cents > 0) & ~np.isnat(dates))
+
+        accounts = data['account'][positions].astype(np.int64)
+        order = np.lexsort((dates[positions], cents[positions], accounts))
+        self.positions = positions[order]
+        self.dates = dates[self.positions]
+
+        keys = np.stack([accounts[order], cents[positions][order]], axis=1)
+        unique_keys, starts, counts = np.unique(keys, axis=0, return_index=True, return_counts=True)
+        self.groups: Dict[Tuple[int, int], Tuple[int, int]] = {
+            (account, amount): (start, start + count)
+            for (account, amount), start, count in zip(unique_keys.tolist(), starts.tolist(), counts.tolist())
+        }
+        self.account_codes = range(len(data.spec('account').categories))
+
+    def candidates(self, cents: int, purchase_date: date) -> np.ndarray:
+        """Returns the positions of transactions for exactly this amount within the receipt's date window."""
+        window_start = np.datetime64(purchase_date - timedelta(days=DATE_WINDOW_BEFORE), 'D')
+        window_end = np.datetime64(purchase_date + timedelta(days=DATE_WINDOW_AFTER), 'D')
+        matches = []
+        for account in self.account_codes:
+            group = self.groups.get((account, cents))
+            if group is None:
+                continue
+            start, end = group
+            low = start + np.searchsorted(self.dates[start:end], window_start, side='left')
+            high = start + np.searchsorted(self.dates[start:end], window_end, side='right')
+            matches.append(self.positions[low:high])
+        return np.concatenate(matches) if matches else np.empty(0, dtype=np.int64)
+
+class ReceiptMatcher:
+    """Links receipts to the checking/credit transactions that paid for them.
+
+    Matching is incremental in both directions: new receipts are matched against the
+    stored transactions around their purchase dates, and newly imported statements
+    against the receipts that are still unmatched. Each link is written to the
+    receipt, and the transaction's empty subclassification is filled with the
+    receipt's merchant, which only appends that updated row to storage.
+    """
+
+    def __init__(self, receipts: Optional[ReceiptStore] = None, storage: Optional[TransactionStorage] = None):
+        self.receipts = receipts if receipts is not None else ReceiptStore()
+        self.storage = storage if storage is not None else get_transaction_storage()
+
+    def match_receipts(self, receipts: Sequence[ReceiptData]) -> List[ReceiptMatch]:
+        """Matches new receipts against the stored transactions around their purchase dates."""
+        receipts = [receipt for receipt in receipts if _is_matchable(receipt)]
+        if not receipts:
+            return []
+
+        purchase_dates = [receipt['purchase_date'] for receipt in receipts]
+        date_start = min(purchase_dates) - timedelta(days=DATE_WINDOW_BEFORE)
+        date_end = max(purchase_dates) + timedelta(days=DATE_WINDOW_AFTER)
+
+        instruments = [
+            (account_type, INSTRUMENT_CLASSES[account_type].load_existing_transaction_data(date_start, date_end, self.storage))
+            for account_type in MATCHED_ACCOUNT_TYPES
+        ]
+        return self._match(instruments, receipts)
+
+    def match_transactions(self, account_type: ACCOUNT_TYPES, instrument: NormalizedTransactionInstrument) -> List[ReceiptMatch]:
+        """Matches an instrument's newly imported transactions against the unmatched receipts."""
+        if account_type not in MATCHED_ACCOUNT_TYPES:
+            return []
+        receipts = [receipt for receipt in self.receipts if _is_matchable(receipt)]
+        return self._match([(account_type, instrument)], receipts) if receipts else []
+
+    def _match(
+        self,
+        instruments: Sequence[Tuple[ACCOUNT_TYPES, NormalizedTransactionInstrument]],
+        receipts: Iterable[ReceiptData]
+    ) -> List[ReceiptMatch]:
+        receipts_by_id = {receipt['receipt_id']: receipt for receipt in receipts}
+        linked = self._linked_transaction_ids()
+
+        # Score every receipt's candidates in every instrument, then assign greedily from
+        # the best score so each receipt and transaction is linked at most once, even when
+        # the same amount was paid from both checking and a card.
+        scored: List[Tuple[float, str, int, int]] = []  # (score, receipt ID, instrument, position)
+        for which, (_, instrument) in enumerate(instruments):
+            data = instrument.data
+            if not len(data):
+                continue
+            index = TransactionMatchIndex(data)
+            for receipt_id, receipt in receipts_by_id.items():
+                cents = int(round(receipt['total'] * 100))
+                for position in index.candidates(cents, receipt['purchase_date']).tolist():
+                    score = _score(receipt, data, position)
+                    if score >= MIN_MATCH_SCORE:
+                        scored.append((score, receipt_id, which, position))
+
+        matches: Dict[int, List[ReceiptMatch]] = {}
+        taken_receipts: Set[str] = set()
+        for score, receipt_id, which, position in sorted(scored, reverse=True):
+            account_type, instrument = instruments[which]
+            transaction_id = instrument.data['transaction_id'][position]
+            if receipt_id in taken_receipts or transaction_id in linked:
+                continue
+            taken_receipts.add(receipt_id)
+            linked.add(transaction_id)
+            matches.setdefault(which, []).append(ReceiptMatch(receipt_id, account_type, transaction_id, score))
+
+        for which, instrument_matches in matches.items():
+            account_type, instrument = instruments[which]
+            self._write_links(instrument, receipts_by_id, instrument_matches)
+            logger.info("[ReceiptMatcher] Linked %d receipts to %s transactions", len(instrument_matches), account_type)
+        return [match for which in sorted(matches) for match in matches[which]]
+
+    def _write_links(
+        self,
+        instrument: NormalizedTransactionInstrument,
+        receipts_by_id: Dict[str, ReceiptData],
+        matches: List[ReceiptMatch]
+    ) -> None:
+        positions = instrument.index.lookup([match.transaction_id for match in matches])
+        enrich = [
+            (position, receipts_by_id[match.receipt_id]['merchant'])
+            for position, match in zip(positions.tolist(), matches)
+            if instrument.data['subclassification'][position] is None and receipts_by_id[match.receipt_id]['merchant']
+        ]
+        if enrich:
+            rows, merchants = zip(*enrich)
+            instrument.update_rows(np.array(rows), subclassification=np.array(merchants, dtype=object))
+            instrument.sync_transaction_data()
+
+        for match in matches:
+            receipt = receipts_by_id[match.receipt_id]
+            receipt['account_type'], receipt['transaction_id'] = match.account_type, match.transaction_id
+            self.receipts.save(receipt)
+
+    def _linked_transaction_ids(self) -> Set[str]:
+        return {receipt['transaction_id'] for receipt in self.receipts if receipt.get('transaction_id')}
+
+def _is_matchable(receipt: ReceiptData) -> bool:
+    return not receipt.get('transaction_id') and receipt['total'] is not None and receipt['purchase_date'] is not None
+
+def merchant_similarity(merchant: str, description: str) -> float:
+    """Scores (0-100) how well a receipt's merchant name matches a statement description.
+
+    Statement descriptors mangle names ("WAL-MART #1234 OREM UT" for "Walmart
+    Supercenter"), so besides comparing the token sets this looks for the merchant's
+    leading brand word inside the description with punctuation and spaces removed.
+    """
+    similarity = fuzz.token_set_ratio(merchant, description, processor=utils.default_process)
+    brand = next((word for word in re.findall(r'[a-z]+', merchant.lower()) if len(word) >= 4), None)
+    if brand:
+        squashed = re.sub(r'[^a-z]', '', description.lower())
+        similarity = max(similarity, fuzz.partial_ratio(brand, squashed))
+    return similarity
+
+def _score(receipt: ReceiptData, data: ColumnarTransactionStore, position: int) -> float:
+    """Scores a same-amount candidate on merchant vs description similarity and date distance."""
+    similarity = merchant_similarity(receipt['merchant'] or '', data['description'][position] or '')
+    days = abs(int((data['activity_date'][position] - np.datetime64(receipt['purchase_date'], 'D')).astype(np.int64)))
+    return similarity - DAY_PENALTY * days
@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+
+from backend.constants import OCR_MAX_DIMENSION
+
+def preprocess_receipt_image(image_bytes: bytes, max_dimension: int = OCR_MAX_DIMENSION) -> np.ndarray:
+    """Prepares a receipt photo for OCR.
+
+    The photo is decoded as grayscale, downscaled so its longest side is at most
+    max_dimension, binarized with an adaptive threshold (receipts are rarely lit
+    evenly), rotated upright and cropped to the printed area. Every step runs on
+    whole arrays in OpenCV/NumPy rather than per pixel.
+
+    Args:
+        image_bytes: Encoded image file content (JPEG, PNG, ...).
+        max_dimension: Longest side, in pixels, of the returned image.
+
+    Returns:
+        np.ndarray: Black text on a white background, as a uint8 image.
+    """
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Could not decode receipt image.")
+
+    scale = max_dimension / max(image.shape)
+    if scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    image = cv2.GaussianBlur(image, (3, 3), 0)
+    binary = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+    return crop_to_content(deskew(binary))
+
+def deskew(binary: np.ndarray) -> np.ndarray:
+    """Rotates a binarized image so its text lines are horizontal."""
+    ink = cv2.findNonZero(255 - binary)
+    if ink is None:
+        return binary
+
+    angle = cv2.minAreaRect(ink)[-1]
+    # minAreaRect reports angles in [0, 90); map to the smallest correction.
+    if angle > 45:
+        angle -= 90
+    if abs(angle) < 0.5:
+        return binary
+
+    height, width = binary.shape
+    rotation = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(binary, rotation, (width, height), flags=cv2.INTER_NEAREST, borderValue=255)
+
+def crop_to_content(binary: np.ndarray, margin: int = 10) -> np.ndarray:
+    """Crops a binarized image to the bounding box of its dark pixels plus a margin."""
+    rows = np.flatnonzero((binary < 128).any(axis=1))
+    columns = np.flatnonzero((binary < 128).any(axis=0))
+    if not len(rows) or not len(columns):
+        return binary
+    top, bottom = max(rows[0] - margin, 0), min(rows[-1] + margin + 1, binary.shape[0])
+    left, right = max(columns[0] - margin, 0), min(columns[-1] + margin + 1, binary.shape[1])
+    return binary[top:bottom, left:right]
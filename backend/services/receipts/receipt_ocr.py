@@ -0,0 +1,32 @@
+import asyncio
+import hashlib
+from typing import List, Sequence, Union
+
+from backend.models.receipts import ReceiptData
+from backend.services.receipts.extraction import extract_receipt_fields
+from backend.utils.ocr import get_ocr_executor, ocr_image, run_ocr_task
+
+def ocr_receipt(image_bytes: bytes) -> ReceiptData:
+    """Preprocesses, OCRs and parses a single receipt photo."""
+    # OpenCV is only needed in the OCR workers that run this; keeps it out of server startup.
+    from backend.services.receipts.preprocessing import preprocess_receipt_image
+
+    receipt_id = hashlib.sha256(image_bytes).hexdigest()
+    text = ocr_image(preprocess_receipt_image(image_bytes))
+    return extract_receipt_fields(receipt_id, text)
+
+def ocr_receipts(images: Sequence[bytes]) -> List[Union[ReceiptData, Exception]]:
+    """OCRs a batch of receipt photos in parallel, returning each receipt or the error it raised, in input order."""
+    futures = [get_ocr_executor().submit(run_ocr_task, ocr_receipt, image) for image in images]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+async def ocr_receipts_async(images: Sequence[bytes]) -> List[Union[ReceiptData, Exception]]:
+    """Like ocr_receipts(), but awaits the workers without blocking the event loop."""
+    futures = [asyncio.wrap_future(get_ocr_executor().submit(run_ocr_task, ocr_receipt, image)) for image in images]
+    return list(await asyncio.gather(*futures, return_exceptions=True))
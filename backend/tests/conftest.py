@@ -0,0 +1,58 @@
+from datetime import date
+from typing import Any, Callable, Dict
+
+import pytest
+
+from backend.benchmarks.fake_drive import FakeDriveClient
+from backend.database.download_cache import DriveDownloadCache
+from backend.database.manifest import ProcessedFilesManifest
+from backend.database.quarantine import QuarantineStore
+from backend.database.storage import TransactionStorage
+from backend.process_transaction_data import ProcessTransactionData
+from backend.services.instruments.classifier import TransactionClassifier
+
+@pytest.fixture
+def storage(tmp_path) -> TransactionStorage:
+    """An empty transaction storage in a temporary directory."""
+    return TransactionStorage(str(tmp_path / 'instrument_data'))
+
+@pytest.fixture
+def drive() -> FakeDriveClient:
+    return FakeDriveClient()
+
+@pytest.fixture
+def make_pipeline(tmp_path, drive) -> Callable[[], ProcessTransactionData]:
+    """Creates ProcessTransactionData instances that share one temporary manifest, storage and cache,
+    like successive runs of the same server."""
+    def make() -> ProcessTransactionData:
+        storage = TransactionStorage(str(tmp_path / 'instrument_data'))
+        return ProcessTransactionData(
+            client=drive,
+            manifest=ProcessedFilesManifest(str(tmp_path / 'process_history.csv')),
+            storage=storage,
+            download_cache=DriveDownloadCache(str(tmp_path / 'drive_cache')),
+            classifier=TransactionClassifier(storage, str(tmp_path / 'classifier_cache.npz')),
+            quarantine=QuarantineStore(str(tmp_path / 'quarantine_data'))
+        )
+    return make
+
+@pytest.fixture
+def cash_record() -> Callable[..., Dict[str, Any]]:
+    """Builds a CheckingData/CreditData record, overriding any of its fields."""
+    def make(**fields: Any) -> Dict[str, Any]:
+        record = dict(
+            transaction_id='t1',
+            activity_date=date(2024, 5, 2),
+            account='shared_checking',
+            credit=None,
+            debit=42.17,
+            classification='Shopping',
+            subclassification=None,
+            old_classification=None,
+            description='TARGET #123',
+            old_description='TARGET #123',
+            posted=True
+        )
+        record.update(fields)
+        return record
+    return make
@@ -0,0 +1,38 @@
+import pytest
+
+from backend.benchmarks.fake_drive import FakeDriveClient
+from backend.benchmarks.ingestion import STAGES, compare_results, run_case
+from backend.benchmarks.synthetic import benchmark_instruments, generate_export
+
+def test_exports_are_deterministic():
+    export = generate_export('USAA_checking', 100, seed=7)
+    assert export.to_csv() == generate_export('USAA_checking', 100, seed=7).to_csv()
+    assert export.to_csv() != generate_export('USAA_savings', 100, seed=7).to_csv()
+    assert export.to_csv() != generate_export('USAA_checking', 100, seed=8).to_csv()
+
+def test_overlapping_exports_share_their_lines():
+    export = generate_export('discover_checking', 10)
+    first, second = export.to_csv(0, 6).decode().splitlines(), export.to_csv(4).decode().splitlines()
+    assert first[0] == second[0] == export.header
+    assert first[5:] == second[1:3]
+    assert len(first) == 7 and len(second) == 7
+
+def test_fake_drive_serves_new_revisions():
+    drive = FakeDriveClient()
+    drive.add_file('f', b'a,b\n1,2\n')
+    drive.add_file('f', b'a,b\n3,4\n')
+    assert drive.get_drive_file_metadata('f', 'headRevisionId,size') == {'headRevisionId': '2', 'size': '8'}
+    assert list(drive.iter_drive_file_rows('f')) == [{'a': '3', 'b': '4'}]
+
+def test_compare_flags_slower_stages():
+    base = {'cases': {'USAA_checking/1k': {'seconds': {'parse': 0.10, 'persist': 0.001}}}}
+    new = {'cases': {'USAA_checking/1k': {'seconds': {'parse': 0.12, 'persist': 0.003}}}}
+    rows = {row['stage']: row['regression'] for row in compare_results(base, new)}
+    assert rows == {'parse': True, 'persist': False}
+
+@pytest.mark.parametrize('instrument_type', benchmark_instruments())
+def test_every_instrument_runs_end_to_end(instrument_type):
+    case = run_case(instrument_type, 40)
+    assert set(case['seconds']) <= set(STAGES)
+    assert {'download', 'normalize', 'persist', 'merge'} <= set(case['seconds'])
+    assert 0 < case['range_rows'] <= 60
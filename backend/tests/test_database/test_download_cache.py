@@ -0,0 +1,46 @@
+import hashlib
+
+import pytest
+
+from backend.database.download_cache import DriveDownloadCache
+
+CONTENT = b'date,amount\n2024-05-01,1.00\n'
+
+@pytest.fixture
+def cache(tmp_path) -> DriveDownloadCache:
+    return DriveDownloadCache(str(tmp_path / 'drive_cache'))
+
+def _read(cache, metadata, downloads):
+    def download():
+        downloads.append(1)
+        yield CONTENT
+    return b''.join(cache.iter_chunks('file-1', metadata, download))
+
+@pytest.mark.parametrize('metadata', [
+    {'headRevisionId': 'rev-1'},
+    {'md5Checksum': hashlib.md5(CONTENT).hexdigest()},
+    {'headRevisionId': 'rev-1', 'md5Checksum': hashlib.md5(CONTENT).hexdigest()},
+])
+def test_cached_copy_is_served_for_the_same_metadata(cache, metadata):
+    downloads = []
+    assert _read(cache, metadata, downloads) == CONTENT
+    assert _read(cache, dict(metadata), downloads) == CONTENT
+    assert len(downloads) == 1
+
+def test_new_revision_is_downloaded_again(cache):
+    downloads = []
+    _read(cache, {'headRevisionId': 'rev-1'}, downloads)
+    _read(cache, {'headRevisionId': 'rev-2'}, downloads)
+    assert len(downloads) == 2
+
+def test_mismatched_checksum_is_not_cached(cache):
+    downloads = []
+    for _ in range(2):
+        _read(cache, {'headRevisionId': 'rev-1', 'md5Checksum': 'not-the-md5'}, downloads)
+    assert len(downloads) == 2
+
+def test_cache_survives_reopening(cache):
+    downloads = []
+    _read(cache, {'headRevisionId': 'rev-1'}, downloads)
+    assert _read(DriveDownloadCache(cache.root), {'headRevisionId': 'rev-1'}, downloads) == CONTENT
+    assert len(downloads) == 1
@@ -0,0 +1,37 @@
+from datetime import date
+
+from backend.database.manifest import ProcessedFilesManifest
+from backend.models.instruments import CheckingData
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+
+def _stage(manifest, file_id, content_hash, records):
+    data = ColumnarTransactionStore.from_records(CheckingData, records)
+    return manifest.stage(('Natalia', 'checking', file_id), 'USAA_checking', content_hash, data, {'md5Checksum': 'md5'})
+
+def test_staged_entries_are_recorded_on_commit(tmp_path, cash_record):
+    path = str(tmp_path / 'process_history.csv')
+    manifest = ProcessedFilesManifest(path)
+    record = _stage(manifest, 'a', 'hash-a', [cash_record(activity_date=date(2024, 5, 2)), cash_record(activity_date=date(2024, 6, 9))])
+
+    assert 'a' not in manifest
+    assert manifest.find_by_hash('hash-a') == record  # Identical files later in the same run are still caught.
+    manifest.commit()
+
+    reloaded = ProcessedFilesManifest(path)
+    assert 'a' in manifest and 'a' in reloaded
+    assert reloaded.date_range('a') == (date(2024, 5, 2), date(2024, 6, 9))
+    assert reloaded.get('a')['row_count'] == 2
+    assert reloaded.is_unchanged('a', {'md5Checksum': 'md5'})
+
+def test_discarded_entries_are_never_recorded(tmp_path, cash_record):
+    path = str(tmp_path / 'process_history.csv')
+    manifest = ProcessedFilesManifest(path)
+    _stage(manifest, 'a', 'hash-a', [cash_record()])
+    _stage(manifest, 'b', 'hash-b', [cash_record()])
+
+    manifest.discard(['a'])
+    manifest.commit()
+
+    reloaded = ProcessedFilesManifest(path)
+    assert 'a' not in reloaded and reloaded.find_by_hash('hash-a') is None
+    assert 'b' in reloaded
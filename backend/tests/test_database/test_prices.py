@@ -0,0 +1,38 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backend.database.prices import BAR_DTYPE, PriceHistoryStore
+
+def _bars(*closes_by_day):
+    bars = np.zeros(len(closes_by_day), dtype=BAR_DTYPE)
+    bars['date'] = [np.datetime64(day, 'D') for day, _ in closes_by_day]
+    bars['close'] = [close for _, close in closes_by_day]
+    return bars
+
+@pytest.fixture
+def prices(tmp_path) -> PriceHistoryStore:
+    store = PriceHistoryStore(str(tmp_path / 'price_data'))
+    store.append('VTI', _bars((date(2024, 1, 2), 10.0), (date(2024, 1, 3), 11.0)))
+    return store
+
+def test_as_of_uses_the_latest_bar_on_or_before_each_date(prices):
+    values = prices.as_of(['VTI', 'vti', 'VOO'], [date(2024, 1, 1), date(2024, 1, 5), date(2024, 1, 5)])
+    np.testing.assert_array_equal(values, [np.nan, 11.0, np.nan])
+
+def test_appended_bars_are_visible_to_cached_panels(prices):
+    assert prices.as_of(['VTI'], [date(2024, 1, 5)])[0] == 11.0
+    prices.append('VTI', _bars((date(2024, 1, 4), 12.0)))
+    assert prices.as_of(['VTI'], [date(2024, 1, 5)])[0] == 12.0
+
+def test_a_corrected_bar_of_the_same_size_replaces_the_cached_one(prices, tmp_path):
+    other_process = PriceHistoryStore(prices.root)
+    assert prices.as_of(['VTI'], [date(2024, 1, 3)])[0] == other_process.as_of(['VTI'], [date(2024, 1, 3)])[0] == 11.0
+    other_process.bars('VTI')
+
+    prices.append('VTI', _bars((date(2024, 1, 3), 99.0)))
+
+    assert prices.as_of(['VTI'], [date(2024, 1, 3)])[0] == 99.0
+    assert other_process.as_of(['VTI'], [date(2024, 1, 3)])[0] == 99.0
+    assert other_process.bars('VTI')['close'].tolist() == [10.0, 99.0]
@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from backend.database.storage import TransactionStorage
+from backend.models.instruments import CheckingData
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+
+def _append(storage, *records):
+    storage.append('checking', ColumnarTransactionStore.from_records(CheckingData, records))
+
+def _load(storage, **kwargs):
+    return storage.load('checking', CheckingData, **kwargs)
+
+def test_latest_version_wins(storage, cash_record):
+    _append(storage, cash_record(transaction_id='a', description='old'))
+    _append(storage, cash_record(transaction_id='a', description='new'))
+    assert _load(storage)['description'].tolist() == ['new']
+
+def test_pending_version_never_replaces_posted(storage, cash_record):
+    _append(storage, cash_record(transaction_id='a', posted=False, description='pending'))
+    _append(storage, cash_record(transaction_id='a', posted=True, description='posted'))
+    _append(storage, cash_record(transaction_id='a', posted=False, description='stale pending'))
+
+    data = _load(storage)
+    assert data['description'].tolist() == ['posted']
+    assert data['posted'].tolist() == [True]
+
+def test_tombstone_drops_only_earlier_versions(storage, cash_record):
+    _append(storage, cash_record(transaction_id='a'), cash_record(transaction_id='b'))
+    storage.delete('checking', ['a', 'b'], np.array(['2024-05-02', '2024-05-02'], dtype='datetime64[D]'))
+    _append(storage, cash_record(transaction_id='b', description='re-added'))
+
+    data = _load(storage)
+    assert data['transaction_id'].tolist() == ['b']
+    assert data['description'].tolist() == ['re-added']
+
+def test_date_range_reads_only_overlapping_months(storage, cash_record):
+    _append(storage, *(cash_record(transaction_id=f't{month}', activity_date=date(2024, month, 15)) for month in range(1, 7)))
+
+    assert {segment['month'] for segment in storage.segments('checking', date(2024, 3, 1), date(2024, 4, 30))} == {'2024-03', '2024-04'}
+    data = _load(storage, date_start=date(2024, 3, 20), date_end=date(2024, 4, 30))
+    assert data['transaction_id'].tolist() == ['t4']
+
+def test_compaction_preserves_resolved_rows(storage, cash_record):
+    _append(storage, cash_record(transaction_id='a', posted=False), cash_record(transaction_id='b'))
+    _append(storage, cash_record(transaction_id='a', posted=True, description='posted'))
+    storage.delete('checking', ['b'], np.array(['2024-05-02'], dtype='datetime64[D]'))
+    before = _load(storage)
+
+    assert storage.compact('checking', CheckingData, '2024-05') is not None
+    assert len(storage.segments('checking')) == 1
+    after = _load(storage)
+    assert after['transaction_id'].tolist() == before['transaction_id'].tolist() == ['a']
+    assert after['description'].tolist() == ['posted']
+
+def test_other_instances_see_new_segments(storage, cash_record):
+    version = storage.version('checking')
+    reader = TransactionStorage(storage.root)
+    _append(storage, cash_record())
+
+    assert reader.version('checking') != version  # Re-reads the catalog another instance wrote.
+    assert len(reader.load('checking', CheckingData)) == 1
+
+def test_strings_of_surviving_rows_line_up_across_segments(storage, cash_record):
+    _append(storage, *(cash_record(transaction_id=f't{day}', activity_date=date(2024, 5, day), description=f'first {day}') for day in range(1, 8)))
+    _append(storage, cash_record(transaction_id='t3', activity_date=date(2024, 5, 3), description=None))
+    _append(storage, cash_record(transaction_id='t6', activity_date=date(2024, 5, 6), description='second 6'))
+    storage.delete('checking', ['t4'], np.array(['2024-05-04'], dtype='datetime64[D]'))
+
+    data = _load(storage, date_start=date(2024, 5, 2), date_end=date(2024, 5, 6))
+    descriptions = dict(zip(data['transaction_id'].tolist(), data['description'].tolist()))
+    assert descriptions == {'t2': 'first 2', 't3': None, 't5': 'first 5', 't6': 'second 6'}
+
+def test_writers_with_stale_catalogs_never_reuse_segments(storage, cash_record):
+    other_process = TransactionStorage(storage.root)
+    _append(storage, cash_record(transaction_id='a'))
+    _append(other_process, cash_record(transaction_id='b'))  # Its catalog hasn't seen a's segment.
+    _append(storage, cash_record(transaction_id='c'))
+
+    segments = TransactionStorage(storage.root).segments('checking')
+    assert [segment['seq'] for segment in segments] == [0, 1, 2]
+    assert sorted(_load(TransactionStorage(storage.root))['transaction_id'].tolist()) == ['a', 'b', 'c']
+
+def test_concurrent_writers_keep_every_segment(storage, cash_record):
+    writers = [storage, TransactionStorage(storage.root), TransactionStorage(storage.root)]
+
+    def write(index):
+        writer = writers[index % len(writers)]
+        _append(writer, cash_record(transaction_id=f't{index}', activity_date=date(2024, 1 + index % 12, 1)))
+
+    with ThreadPoolExecutor(max_workers=len(writers)) as pool:
+        list(pool.map(write, range(30)))
+
+    reader = TransactionStorage(storage.root)
+    assert sorted(segment['seq'] for segment in reader.segments('checking')) == list(range(30))
+    assert len(_load(reader)) == 30
@@ -0,0 +1,12 @@
+from fastapi.testclient import TestClient
+
+from backend import logging_config, main
+
+def test_importing_the_app_does_not_start_logging():
+    assert logging_config._listener is None
+
+def test_logging_runs_for_the_lifetime_of_the_server():
+    with TestClient(main.app) as client:
+        assert logging_config._listener is not None
+        assert client.get('/health').status_code == 200
+    assert logging_config._listener is None
@@ -0,0 +1,102 @@
+import pytest
+
+from backend.benchmarks.synthetic import generate_export
+from backend.database.manifest import ProcessedFilesManifest
+from backend.database.storage import TransactionStorage
+from backend.models.instruments import CheckingData, IRAData
+from backend.process_transaction_data import ProcessTransactionData, account_instrument
+
+def _stored_rows(pipeline):
+    return len(pipeline.storage.load('checking', CheckingData))
+
+def test_files_are_only_recorded_once_synced(make_pipeline, drive, monkeypatch):
+    drive.add_file('a', generate_export('USAA_checking', 200, 1).to_csv())
+    files = [('Natalia', 'checking', 'a')]
+
+    def disk_full(*args):
+        raise OSError('disk full')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(TransactionStorage, 'append', disk_full)
+        with pytest.raises(OSError):
+            make_pipeline().process_retrieved_transactions_files(files)
+
+    rerun = make_pipeline()
+    assert 'a' not in rerun.manifest
+    assert list(rerun._select_files(files)) == files
+    assert rerun.process_retrieved_transactions_files(files) == {}
+    assert 'a' in make_pipeline().manifest
+    assert _stored_rows(rerun) == make_pipeline().manifest.get('a')['row_count'] > 0
+
+def test_a_failing_file_does_not_stop_the_others(make_pipeline, drive, monkeypatch):
+    drive.add_file('b', generate_export('USAA_checking', 50, 2).to_csv())
+    drive.add_file('c', generate_export('USAA_checking', 50, 3).to_csv())
+    pipeline = make_pipeline()
+    add_transaction_data = pipeline._add_transaction_data
+
+    def fail_on_b(account_type, data, file_ID=None):
+        if file_ID == 'b':
+            raise ValueError('bad export')
+        return add_transaction_data(account_type, data, file_ID)
+
+    monkeypatch.setattr(pipeline, '_add_transaction_data', fail_on_b)
+    failed = pipeline.process_retrieved_transactions_files([('Natalia', 'checking', 'b'), ('Natalia', 'checking', 'c')])
+
+    assert list(failed) == [('Natalia', 'checking', 'b')]
+    manifest = make_pipeline().manifest
+    assert 'b' not in manifest and 'c' in manifest
+    assert _stored_rows(pipeline) == manifest.get('c')['row_count']
+
+def test_a_failing_download_does_not_stop_concurrent_files(make_pipeline, drive):
+    drive.add_file('good', generate_export('USAA_checking', 50, 4).to_csv())
+    files = [('Natalia', 'checking', 'good'), ('Natalia', 'checking', 'missing')]
+
+    failed = make_pipeline().process_retrieved_transactions_files(files, concurrency=2)
+
+    assert list(failed) == [('Natalia', 'checking', 'missing')]
+    manifest = make_pipeline().manifest
+    assert 'good' in manifest and 'missing' not in manifest
+
+def test_concurrent_and_serial_runs_store_the_same_transactions(tmp_path, make_pipeline, drive):
+    files = []
+    for index, instrument_type in enumerate(['USAA_checking', 'discover_checking', 'USAA_checking']):
+        drive.add_file(f'f{index}', generate_export(instrument_type, 80, index).to_csv())
+        files.append(('Natalia' if instrument_type == 'USAA_checking' else 'shared', 'checking', f'f{index}'))
+
+    concurrent = make_pipeline()
+    assert concurrent.process_retrieved_transactions_files(files, concurrency=3) == {}
+    serial = make_pipeline()
+    serial.storage = TransactionStorage(str(tmp_path / 'serial_data'))
+    serial.manifest = ProcessedFilesManifest(str(tmp_path / 'serial_history.csv'))
+    assert serial.process_retrieved_transactions_files(files) == {}
+
+    assert _stored_rows(concurrent) == _stored_rows(serial) > 0
+    assert [concurrent.manifest.get(file[2])['content_hash'] for file in files] == [serial.manifest.get(file[2])['content_hash'] for file in files]
+
+@pytest.mark.parametrize('file_name, routed', [
+    ('foster_ira_roth_04-25-2025_to_06-01-2025.csv', ('robinhood_IRA', 'foster_rothIRA')),
+    ('Foster_RothIRA.csv', ('robinhood_IRA', 'foster_rothIRA')),
+    ('foster_ira_traditional_04-25-2025_to_06-01-2025.csv', ('robinhood_IRA', 'foster_traditionalIRA')),
+    ('Foster/IRA/traditional/export.csv', ('robinhood_IRA', 'foster_traditionalIRA')),
+])
+def test_sub_accounts_are_named_by_the_file(file_name, routed):
+    assert account_instrument('Foster', 'IRA', file_name) == routed
+    assert account_instrument('Natalia', 'checking', file_name) == ('USAA_checking', 'natalia_checking')
+
+@pytest.mark.parametrize('file_name', [None, 'foster_ira_04-25-2025_to_06-01-2025.csv', 'brother_ira.csv', 'roth_and_traditional.csv'])
+def test_files_naming_no_single_sub_account_are_rejected(file_name):
+    with pytest.raises(ValueError, match='roth, traditional'):
+        account_instrument('Foster', 'IRA', file_name)
+
+def test_sub_account_uploads_are_routed_by_their_drive_name(make_pipeline, drive):
+    drive.add_file('roth', generate_export('robinhood_IRA', 30, 5).to_csv(), 'natalia_ira_roth_01-01-2024_to_02-01-2024.csv')
+    drive.add_file('unnamed', generate_export('robinhood_IRA', 30, 6).to_csv(), 'natalia_ira.csv')
+    link = 'https://drive.google.com/open?id={}'
+    files = ProcessTransactionData._parse_upload_row(2, ['', 'Natalia', 'IRA', ', '.join([link.format('roth'), link.format('unnamed')])])
+
+    failed = make_pipeline().process_retrieved_transactions_files(files)
+
+    assert list(failed) == [('Natalia', 'IRA', 'unnamed')]
+    stored = make_pipeline().storage.load('IRA', IRAData)
+    assert len(stored) > 0 and {record['account'] for record in stored.to_records()} == {'natalia_rothIRA'}
+    assert make_pipeline().manifest.get('roth')['instrument'] == 'robinhood_IRA'
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.models.instruments import CheckingData
+from backend.routes.transactions import router
+from backend.services.instruments import transaction_queries
+from backend.services.instruments.checking import Checking
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.transaction_queries import TransactionQueries
+
+@pytest.fixture
+def client(storage, monkeypatch, cash_record):
+    Checking(ColumnarTransactionStore.from_records(CheckingData, [
+        cash_record(transaction_id='a', debit=10.0),
+        cash_record(transaction_id='b', debit=None, credit=25.0, classification='Other'),
+    ]), storage).sync_transaction_data()
+    monkeypatch.setattr(transaction_queries, '_default_queries', TransactionQueries(storage))
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def test_totals_group_by_classification_by_default(client):
+    response = client.get('/api/transactions/checking/totals')
+    assert response.status_code == 200
+    assert response.json() == {
+        'Other': {'credit': 25.0, 'debit': 0.0, 'net': 25.0},
+        'Shopping': {'credit': 0.0, 'debit': 10.0, 'net': -10.0},
+    }
+
+@pytest.mark.parametrize('account_type', ['crypto', 'investing', 'IRA'])
+def test_totals_of_unclassified_instruments_group_by_month(client, account_type):
+    response = client.get(f'/api/transactions/{account_type}/totals')
+    assert response.status_code == 200
+    assert response.json() == {}
+
+@pytest.mark.parametrize('url', [
+    '/api/transactions/crypto/totals?group_by=classification',
+    '/api/transactions/crypto/totals?classification=Shopping',
+    '/api/transactions/crypto?classification=Shopping',
+    '/api/transactions/crypto/export?classification=Shopping',
+])
+def test_filters_the_schema_lacks_are_rejected(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
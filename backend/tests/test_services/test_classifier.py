@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from backend.models.instruments import CheckingData
+from backend.services.instruments.checking import Checking
+from backend.services.instruments.classifier import TransactionClassifier
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+
+@pytest.fixture
+def classify(storage, tmp_path, cash_record):
+    classifier = TransactionClassifier(storage, str(tmp_path / 'classifier_cache.npz'))
+
+    def classify(description, category=None):
+        data = ColumnarTransactionStore.from_records(CheckingData, [
+            cash_record(classification='Other', description=description, old_classification=category)
+        ])
+        classifier.classify(data)
+        return data.to_records()[0]['classification']
+    return classify
+
+@pytest.mark.parametrize('description, classification', [
+    ("MCDONALD'S #123", 'Food & Drinks'),
+    ('DOMINOS PIZZA', 'Food & Drinks'),
+    ('WALGREENS PHARMACY', 'Health & Beauty'),
+    ('BARBER SHOP', 'Health & Beauty'),
+    ('SHELL OIL 123', 'Transport'),
+    ('DELTA AIRLINES', 'Transport'),
+    ('UTA FARE', 'Transport'),
+    ('TARGET #12', 'Shopping'),
+    ('KOHLS', 'Shopping'),
+    ('AMC 16', 'Leisure'),
+])
+def test_keywords_and_marked_prefixes_match(classify, description, classification):
+    assert classify(description) == classification
+
+@pytest.mark.parametrize('description', ['AUTOMATIC PAYMENT', 'HERTZ RENTAL', 'SHELLY S BAKERY', 'TARGETED ADS LLC', 'UTAH POWER'])
+def test_keywords_only_match_whole_words(classify, description):
+    assert classify(description) == 'Other'
+
+@pytest.mark.parametrize('category, classification', [
+    ('Groceries', 'Food & Drinks'),
+    ('Auto & Transport', 'Transport'),
+    ('Healthcare', 'Health & Beauty'),
+    ('Bills', 'Households & Services'),
+    ('Automatic', 'Other'),
+])
+def test_export_categories(classify, category, classification):
+    assert classify('XYZZY 00042', category) == classification
+
+def _sync(storage, *records):
+    Checking(ColumnarTransactionStore.from_records(CheckingData, list(records)), storage).sync_transaction_data()
+
+def test_syncs_are_learned_without_retraining(storage, tmp_path, cash_record, monkeypatch):
+    path = str(tmp_path / 'classifier_cache.npz')
+    _sync(storage, cash_record(transaction_id='a', description='XYZZY 00042', classification='Leisure'))
+    classifier = TransactionClassifier(storage, path)
+    classifier.classify(ColumnarTransactionStore.from_records(CheckingData, [cash_record(classification='Other')]))
+
+    trainings = []
+    monkeypatch.setattr(TransactionClassifier, '_train', lambda self, watermarks: trainings.append(watermarks))
+    _sync(storage, cash_record(transaction_id='b', description='PLUGH 7', classification='Transport'))
+    new = ColumnarTransactionStore.from_records(CheckingData, [
+        cash_record(transaction_id=transaction_id, classification='Other', description=description)
+        for transaction_id, description in [('c', 'PLUGH 7'), ('d', 'XYZZY 00042')]
+    ])
+    classifier.classify(new)
+    # A fresh process picks the learned model up from the cache.
+    reloaded = ColumnarTransactionStore.from_records(CheckingData, [cash_record(classification='Other', description='PLUGH 7')])
+    TransactionClassifier(storage, path).classify(reloaded)
+
+    assert trainings == []
+    assert [record['classification'] for record in new.to_records() + reloaded.to_records()] == ['Transport', 'Leisure', 'Transport']
+
+def test_learning_incrementally_matches_training_from_scratch(storage, tmp_path, cash_record):
+    classifier = TransactionClassifier(storage, str(tmp_path / 'classifier_cache.npz'))
+    _sync(storage, cash_record(transaction_id='a', description='ACME HARDWARE 1', classification='Households & Services'))
+    classifier._load_model()
+    _sync(storage, *[
+        cash_record(transaction_id=transaction_id, description=description, classification=classification)
+        for transaction_id, description, classification in [
+            ('b', 'ACME CINEMA', 'Leisure'), ('c', 'ACME HARDWARE 2', 'Households & Services'), ('d', 'ACME CINEMA', 'Leisure')
+        ]
+    ])
+
+    learned, _ = classifier._load_model()
+    trained = TransactionClassifier(storage, str(tmp_path / 'other_cache.npz'))._load_model()[0]
+
+    assert learned.watermarks == trained.watermarks
+    assert {description: learned.counts[row].tolist() for description, row in learned.memo.items()} == {
+        description: trained.counts[row].tolist() for description, row in trained.memo.items()
+    }
+    assert set(learned.vocabulary) == set(trained.vocabulary)
+    for token, row in learned.vocabulary.items():
+        np.testing.assert_allclose(learned.centroids[row], trained.centroids[trained.vocabulary[token]])
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from backend.benchmarks.synthetic import generate_export
+from backend.database.download_cache import DriveDownloadCache
+from backend.database.manifest import ProcessedFilesManifest
+from backend.database.paystubs import PaystubStore
+from backend.database.quarantine import QuarantineStore
+from backend.database.receipts import ReceiptStore
+from backend.models.instruments import CreditData
+from backend.process_transaction_data import ProcessTransactionData
+from backend.services.inbox.local_client import LocalFileClient
+from backend.services.inbox.watcher import InboxFile, LocalInbox
+from backend.services.instruments.classifier import TransactionClassifier
+
+@pytest.fixture
+def inbox(tmp_path, storage) -> LocalInbox:
+    pipeline = ProcessTransactionData(
+        client=LocalFileClient(),
+        manifest=ProcessedFilesManifest(str(tmp_path / 'process_history.csv')),
+        storage=storage,
+        download_cache=DriveDownloadCache(str(tmp_path / 'drive_cache')),
+        classifier=TransactionClassifier(storage, str(tmp_path / 'classifier_cache.npz')),
+        quarantine=QuarantineStore(str(tmp_path / 'quarantine_data'))
+    )
+    return LocalInbox(
+        str(tmp_path / 'inbox'), pipeline, ReceiptStore(str(tmp_path / 'receipt_data')), PaystubStore(str(tmp_path / 'paystub_data'))
+    )
+
+def _path(inbox, *parts):
+    return os.path.join(inbox.root, *parts)
+
+def test_exports_are_routed_by_folder(inbox):
+    path = _path(inbox, 'natalia', 'Checking', 'export.CSV')
+    assert inbox.route(path) == InboxFile(path, 'transactions', ('Natalia', 'checking'))
+    assert inbox.route(_path(inbox, 'receipt.jpg')).kind == 'receipt'
+    assert inbox.route(_path(inbox, 'Foster', 'paystub.pdf')).kind == 'paystub'
+    assert inbox.route(_path(inbox, 'notes.txt')) is None
+
+def test_sub_accounts_are_routed_by_folder_or_file_name(inbox):
+    for parts in [('Foster', 'IRA', 'roth', 'export.csv'), ('foster', 'credit', 'foster_credit_chase_01-01-2025.csv')]:
+        assert inbox.route(_path(inbox, *parts)).account == (parts[0].title(), parts[1])
+
+@pytest.mark.parametrize('parts', [
+    ('Foster', 'credit', 'export.csv'),
+    ('Natalia', 'IRA', 'roth', 'traditional.csv'),
+    ('export.csv',),
+    ('Nobody', 'checking', 'export.csv'),
+])
+def test_unroutable_exports_are_skipped(inbox, parts):
+    assert inbox.route(_path(inbox, *parts)) is None
+
+def test_dropped_sub_account_exports_are_stored_under_their_account(inbox):
+    path = _path(inbox, 'Foster', 'credit', 'uccu', 'export.csv')
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(generate_export('UCCU_credit', 20).to_csv())
+
+    inbox.process([path])
+
+    stored = inbox.pipeline.storage.load('credit', CreditData)
+    assert len(stored) > 0 and {record['account'] for record in stored.to_records()} == {'foster_credit_UCCU'}
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from backend.services.portfolio.positions import BUY, DIVIDEND, SELL, Trades, grouped_cumsum, grouped_running_min, replay
+
+def _trades(*trades):
+    """Builds Trades from (key, 'YYYY-MM-DD', kind, quantity, amount) tuples."""
+    key, day, kind, quantity, amount = zip(*trades)
+    return Trades(
+        np.array(key, dtype=str),
+        np.array(day, dtype='datetime64[D]'),
+        np.array(kind, dtype=np.int8),
+        np.array(quantity, dtype=np.float64),
+        np.array(amount, dtype=np.float64),
+        np.array([amount / quantity if quantity else np.nan for quantity, amount in zip(quantity, amount)])
+    )
+
+def _naive(values, groups, accumulate):
+    result = np.empty(len(values))
+    for group in np.unique(groups):
+        rows = groups == group
+        result[rows] = accumulate(values[rows])
+    return result
+
+def test_grouped_running_min_restarts_per_group():
+    rng = np.random.default_rng(0)
+    groups = np.sort(rng.integers(0, 20, 500))
+    values = rng.normal(0, 1000, 500)
+    assert np.allclose(grouped_running_min(values, groups), _naive(values, groups, np.minimum.accumulate))
+    assert not len(grouped_running_min(np.array([]), np.array([], dtype=np.int64)))
+
+def test_grouped_cumsum_restarts_per_group():
+    rng = np.random.default_rng(1)
+    groups = np.sort(rng.integers(0, 20, 500))
+    values = rng.normal(0, 10, 500)
+    assert np.allclose(grouped_cumsum(values, groups), _naive(values, groups, np.cumsum))
+
+def test_sales_consume_oldest_lots_first():
+    states, _ = replay(_trades(
+        ('a|X', '2024-01-02', BUY, 10, 1000),
+        ('a|X', '2024-01-03', BUY, 10, 2000),
+        ('a|X', '2024-01-04', SELL, 15, 3000),
+    ), {})
+
+    state = states['a|X']
+    assert state['realized_pnl'] == pytest.approx(3000 - (1000 + 5 * 200))
+    assert state['lots'] == [('2024-01-03', pytest.approx(5.0), pytest.approx(1000.0))]
+
+def test_sales_beyond_holdings_have_no_cost_basis():
+    states, _ = replay(_trades(
+        ('a|X', '2024-01-02', SELL, 5, 500),
+        ('a|X', '2024-01-03', BUY, 10, 1000),
+        ('a|X', '2024-01-04', SELL, 4, 800),
+    ), {})
+
+    state = states['a|X']
+    assert state['realized_pnl'] == pytest.approx(500 + (800 - 400))
+    assert state['lots'] == [('2024-01-03', pytest.approx(6.0), pytest.approx(600.0))]
+
+def test_month_end_snapshots_and_dividends():
+    _, months = replay(_trades(
+        ('a|X', '2024-01-02', BUY, 10, 1000),
+        ('a|X', '2024-01-20', DIVIDEND, 0, 12),
+        ('a|X', '2024-02-05', SELL, 10, 1500),
+        ('a|Y', '2024-02-06', BUY, 1, 50),
+    ), {})
+
+    assert set(months) == {'2024-01', '2024-02'}
+    assert set(months['2024-01']) == {'a|X'}
+    assert months['2024-01']['a|X']['dividend_income'] == pytest.approx(12)
+    assert months['2024-01']['a|X']['realized_pnl'] == 0
+    assert months['2024-02']['a|X']['lots'] == []
+    assert months['2024-02']['a|X']['realized_pnl'] == pytest.approx(500)
+
+def test_replaying_from_a_checkpoint_matches_a_full_replay():
+    rng = np.random.default_rng(2)
+    days = np.sort(np.datetime64('2023-01-01') + rng.integers(0, 365, 200))
+    trades = _trades(*(
+        (f'a|{"XYZ"[i % 3]}', str(day), kind, float(rng.integers(1, 20)), float(rng.integers(100, 2000)))
+        for i, (day, kind) in enumerate(zip(days, rng.choice([BUY, BUY, SELL, DIVIDEND], 200)))
+    ))
+
+    full, _ = replay(trades, {})
+    first = np.flatnonzero(trades.date < np.datetime64('2023-07-01'))
+    rest = np.flatnonzero(trades.date >= np.datetime64('2023-07-01'))
+    checkpoint, _ = replay(trades.take(first), {})
+    resumed, _ = replay(trades.take(rest), checkpoint)
+
+    assert set(resumed) == set(full)
+    for key, state in full.items():
+        assert resumed[key]['realized_pnl'] == pytest.approx(state['realized_pnl'])
+        assert resumed[key]['dividend_income'] == pytest.approx(state['dividend_income'])
+        assert [lot[1:] for lot in resumed[key]['lots']] == pytest.approx([lot[1:] for lot in state['lots']])
@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from backend.database.receipts import ReceiptStore
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.registry import INSTRUMENT_CLASSES
+from backend.services.receipts.matching import ReceiptMatcher
+
+@pytest.fixture
+def receipts(tmp_path) -> ReceiptStore:
+    return ReceiptStore(str(tmp_path / 'receipt_data'))
+
+def _receipt(receipt_id, total, purchase_date=date(2024, 5, 1), merchant='Target'):
+    return dict(
+        receipt_id=receipt_id, merchant=merchant, purchase_date=purchase_date, line_items=[], subtotal=None, tax=None,
+        total=total, raw_text='', account_type=None, transaction_id=None
+    )
+
+def _store_transactions(storage, account_type, *records):
+    instrument_class = INSTRUMENT_CLASSES[account_type]
+    instrument_class(ColumnarTransactionStore.from_records(instrument_class.SCHEMA, records), storage).sync_transaction_data()
+
+def _subclassifications(storage, account_type):
+    return INSTRUMENT_CLASSES[account_type].load_existing_transaction_data(storage=storage).data['subclassification'].tolist()
+
+def test_receipt_is_linked_to_one_transaction_across_accounts(storage, receipts, cash_record):
+    _store_transactions(storage, 'checking', cash_record(transaction_id='checking-1', description='TARGET #123'))
+    _store_transactions(storage, 'credit', cash_record(transaction_id='credit-1', account='shared_credit', description='TARGET 00012'))
+    receipt = _receipt('r1', 42.17)
+    receipts.save(receipt)
+
+    matches = ReceiptMatcher(receipts, storage).match_receipts([receipt])
+
+    assert len(matches) == 1
+    linked = {'checking': 'checking-1', 'credit': 'credit-1'}[matches[0].account_type]
+    assert (receipts.get('r1')['account_type'], receipts.get('r1')['transaction_id']) == (matches[0].account_type, linked)
+    assert (_subclassifications(storage, 'checking') + _subclassifications(storage, 'credit')).count('Target') == 1
+
+def test_each_transaction_takes_its_closest_receipt(storage, receipts, cash_record):
+    _store_transactions(storage, 'checking', cash_record(transaction_id='t1', activity_date=date(2024, 5, 2)))
+    exact, later = _receipt('exact', 42.17, date(2024, 5, 2)), _receipt('later', 42.17, date(2024, 5, 4))
+    for receipt in (exact, later):
+        receipts.save(receipt)
+
+    matches = ReceiptMatcher(receipts, storage).match_receipts([later, exact])
+
+    assert [(match.receipt_id, match.transaction_id) for match in matches] == [('exact', 't1')]
+    assert receipts.get('later')['transaction_id'] is None
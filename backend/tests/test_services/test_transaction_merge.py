@@ -0,0 +1,107 @@
+from datetime import date
+
+import numpy as np
+
+from backend.models.instruments import CheckingData
+from backend.services.instruments.batch_transforms import transaction_ids
+from backend.services.instruments.checking import Checking
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.transaction_index import TransactionIndex
+from backend.services.instruments.transaction_merge import dedupe_rows, merge_stores
+
+def _store(records):
+    return ColumnarTransactionStore.from_records(CheckingData, records)
+
+def test_identical_purchases_get_distinct_ids(cash_record):
+    coffee = cash_record(description='COFFEE SHOP', debit=4.5)
+    ids = transaction_ids(CheckingData, _store([coffee, coffee]).columns)
+    assert ids[0] != ids[1]
+
+def test_overlapping_reimport_reproduces_ids(cash_record):
+    records = [
+        cash_record(activity_date=date(2024, 5, day), description=f'STORE {day}', debit=float(day))
+        for day in range(1, 6)
+    ]
+    first = transaction_ids(CheckingData, _store(records[:3]).columns)
+    overlap = transaction_ids(CheckingData, _store(records[1:]).columns)
+    assert overlap[:2].tolist() == first[1:].tolist()
+
+def test_posted_flag_is_not_fingerprinted(cash_record):
+    pending = transaction_ids(CheckingData, _store([cash_record(posted=False)]).columns)
+    posted = transaction_ids(CheckingData, _store([cash_record(posted=True)]).columns)
+    assert pending.tolist() == posted.tolist()
+
+def test_dedupe_prefers_posted_then_latest(cash_record):
+    data = _store([
+        cash_record(transaction_id='a', posted=True, description='first'),
+        cash_record(transaction_id='a', posted=False, description='pending'),
+        cash_record(transaction_id='b', posted=False, description='old'),
+        cash_record(transaction_id='b', posted=False, description='new'),
+    ])
+    kept = data.take(dedupe_rows(data))
+    assert kept['transaction_id'].tolist() == ['a', 'b']
+    assert kept['description'].tolist() == ['first', 'new']
+
+def test_merge_updates_pending_and_appends_new(cash_record):
+    data = _store([cash_record(transaction_id='a', posted=False), cash_record(transaction_id='b', posted=True, debit=1.0)])
+    index = TransactionIndex(data)
+    incoming = _store([
+        cash_record(transaction_id='a', posted=True),
+        cash_record(transaction_id='b', posted=False, debit=2.0),
+        cash_record(transaction_id='c'),
+    ])
+
+    merged = merge_stores(data, index, incoming)
+
+    assert merged.updated_rows.tolist() == [0]
+    assert merged.appended_rows.tolist() == [2]
+    assert merged.data['posted'].tolist() == [True, True, True]
+    assert merged.data['debit'].tolist() == [42.17, 1.0, 42.17]  # A pending row never overwrites a posted one.
+    assert index.lookup(['a', 'b', 'c']).tolist() == [0, 1, 2]
+
+def test_merging_the_same_data_twice_is_idempotent(cash_record):
+    incoming = _store([cash_record(transaction_id=f't{i}', debit=float(i)) for i in range(5)])
+    data = ColumnarTransactionStore(CheckingData)
+    index = TransactionIndex(data)
+
+    data = merge_stores(data, index, incoming).data
+    again = merge_stores(data, index, incoming)
+
+    assert len(again.data) == 5
+    assert not len(again.appended_rows)
+    assert np.array_equal(again.data['transaction_id'], incoming['transaction_id'])
+
+def test_merge_transaction_data_marks_changed_rows_unsynced(storage, cash_record):
+    existing = Checking(_store([cash_record(transaction_id='a', posted=False), cash_record(transaction_id='b')]), storage)
+    existing._unsynced[:] = False
+    incoming = Checking(_store([cash_record(transaction_id='a', posted=True), cash_record(transaction_id='c')]), storage)
+
+    merged = Checking.merge_transaction_data(existing, incoming)
+
+    assert merged.data['transaction_id'].tolist() == ['a', 'b', 'c']
+    assert merged._unsynced.tolist() == [True, False, True]
+
+def test_merge_transaction_data_leaves_the_incoming_instance_alone(storage, cash_record):
+    existing = Checking(_store([cash_record(transaction_id='a')]), storage)
+    incoming = Checking(_store([cash_record(transaction_id='b', posted=False), cash_record(transaction_id='b')]), storage)
+
+    Checking.merge_transaction_data(existing, incoming)
+
+    assert incoming.data['transaction_id'].tolist() == ['b', 'b']
+    assert len(incoming._unsynced) == 2
+    assert existing.data['transaction_id'].tolist() == ['a', 'b']
+
+def test_merges_append_into_spare_capacity(storage, cash_record):
+    merged = Checking(_store([cash_record(transaction_id='t0')]), storage)
+    before = merged.data['transaction_id']
+    addresses = set()
+    for i in range(1, 40):
+        Checking.merge_transaction_data(merged, Checking(_store([cash_record(transaction_id=f't{i}', debit=float(i))]), storage))
+        addresses.add(merged.data['debit'].ctypes.data)
+
+    assert merged.data['transaction_id'].tolist() == [f't{i}' for i in range(40)]
+    assert merged.data['debit'].tolist() == [42.17] + [float(i) for i in range(1, 40)]
+    assert merged.index.lookup(['t0', 't39']).tolist() == [0, 39]
+    assert merged._unsynced.all() and len(merged._unsynced) == 40
+    assert len(addresses) <= 7  # Capacity doubles, so only a handful of reallocations.
+    assert before.tolist() == ['t0']  # Earlier views keep their length.
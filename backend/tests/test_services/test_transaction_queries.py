@@ -0,0 +1,73 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backend.models.instruments import CheckingData
+from backend.services.instruments.checking import Checking
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.services.instruments.transaction_queries import TransactionQueries, decode_cursor, encode_cursor
+
+DAYS = [date(2024, 4, 30), date(2024, 5, 1), date(2024, 5, 1), date(2024, 5, 1), date(2024, 5, 31), date(2024, 6, 1), date(2024, 7, 15)]
+
+@pytest.fixture
+def queries(storage, cash_record) -> TransactionQueries:
+    # IDs are written out of order, so same-day rows only come back sorted if pages sort them.
+    ids = ['t5', 't3', 't10', 't2', 't7', 't1', 't4']
+    Checking(ColumnarTransactionStore.from_records(CheckingData, [
+        cash_record(transaction_id=transaction_id, activity_date=day, account='shared_checking' if index % 2 else 'foster_checking')
+        for index, (transaction_id, day) in enumerate(zip(ids, DAYS))
+    ]), storage).sync_transaction_data()
+    return TransactionQueries(storage)
+
+def _keys(records):
+    return [(record['activity_date'], record['transaction_id']) for record in records]
+
+def _all_pages(queries, limit, **filters):
+    records, cursor, pages = [], None, 0
+    while True:
+        page = queries.page('checking', limit, cursor, **filters)
+        records.extend(page.records)
+        pages += 1
+        if page.next_cursor is None:
+            return records, pages
+        cursor = page.next_cursor
+
+def test_cursors_round_trip():
+    cursor = encode_cursor(np.datetime64('2024-05-01'), 'id|with|pipes')
+    assert decode_cursor(cursor) == (np.datetime64('2024-05-01'), 'id|with|pipes')
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
+
+def test_same_day_rows_are_ordered_by_transaction_id(queries):
+    assert _keys(queries.page('checking', 10).records) == [
+        (date(2024, 4, 30), 't5'),
+        (date(2024, 5, 1), 't10'),
+        (date(2024, 5, 1), 't2'),
+        (date(2024, 5, 1), 't3'),
+        (date(2024, 5, 31), 't7'),
+        (date(2024, 6, 1), 't1'),
+        (date(2024, 7, 15), 't4'),
+    ]
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 6, 7, 50])
+def test_pages_cover_every_row_once_across_days_and_months(queries, limit):
+    records, pages = _all_pages(queries, limit)
+    assert _keys(records) == _keys(queries.page('checking', 50).records)
+    assert pages == max(1, -(-len(DAYS) // limit))
+
+def test_pages_respect_filters(queries):
+    records, _ = _all_pages(queries, 1, date_start=date(2024, 5, 1), date_end=date(2024, 6, 30), accounts=['shared_checking'])
+    assert _keys(records) == [(date(2024, 5, 1), 't2'), (date(2024, 5, 1), 't3'), (date(2024, 6, 1), 't1')]
+    assert list(map(len, queries.iter_batches('checking', batch_size=2))) == [1, 2, 2, 1, 1]
+
+def test_a_sync_only_reloads_the_months_it_wrote_to(queries, storage, cash_record):
+    queries.page('checking', 50)
+    april, july = queries.month('checking', '2024-04'), queries.month('checking', '2024-07')
+    Checking(ColumnarTransactionStore.from_records(CheckingData, [
+        cash_record(transaction_id='t0', activity_date=date(2024, 7, 1))
+    ]), storage).sync_transaction_data()
+
+    assert queries.month('checking', '2024-04') is april
+    assert queries.month('checking', '2024-07') is not july
+    assert (date(2024, 7, 1), 't0') in _keys(queries.page('checking', 50).records)
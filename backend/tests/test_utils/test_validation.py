@@ -0,0 +1,54 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backend.models.instruments import CheckingData, CryptoData
+from backend.services.instruments.columnar_store import ColumnarTransactionStore
+from backend.utils.validation import BatchValidator, RowError, get_validator
+
+def _validate(records, schema=CheckingData):
+    return get_validator(schema).validate(ColumnarTransactionStore.from_records(schema, records))
+
+def test_valid_rows_have_no_errors(cash_record):
+    result = _validate([cash_record(), cash_record(credit=3.0, debit=None)])
+    assert result.valid.tolist() == [True, True]
+    assert not len(result.invalid_rows)
+    assert result.counts() == {}
+
+def test_error_codes_and_field_bitmap(cash_record):
+    result = _validate([
+        cash_record(),
+        cash_record(credit=1.0, debit=2.0),
+        cash_record(description='', activity_date=date(1800, 1, 1)),
+        cash_record(debit=-5.0),
+        cash_record(classification='Not a classification'),
+    ])
+
+    assert result.invalid_rows.tolist() == [1, 2, 3, 4]
+    assert RowError(int(result.errors[1])) == RowError.CREDIT_AND_DEBIT
+    assert result.failed_fields(1) == ['credit', 'debit']
+    assert RowError(int(result.errors[2])) == RowError.MISSING | RowError.DATE_OUT_OF_RANGE
+    assert result.failed_fields(2) == ['activity_date', 'description']
+    assert result.describe(3) == ['NEGATIVE_AMOUNT: debit']
+    assert result.describe(4) == ['UNKNOWN_CATEGORY: classification']
+    assert result.counts() == {
+        'MISSING': 1, 'UNKNOWN_CATEGORY': 1, 'NEGATIVE_AMOUNT': 1, 'CREDIT_AND_DEBIT': 1, 'DATE_OUT_OF_RANGE': 1
+    }
+
+def test_bitmap_packs_eight_fields_per_byte(cash_record):
+    result = _validate([cash_record()] * 3)
+    assert result.field_bitmap.dtype == np.uint8
+    assert result.field_bitmap.shape == (3, -(-len(result.fields) // 8))
+
+def test_wrong_column_type_fails_every_row(cash_record):
+    data = ColumnarTransactionStore.from_records(CheckingData, [cash_record(), cash_record()])
+    data.columns['debit'] = data['debit'].astype(object)
+    result = get_validator(CheckingData).validate(data)
+    assert [result.failed_fields(row) for row in range(2)] == [['debit'], ['debit']]
+    assert result.counts() == {'WRONG_TYPE': 2}
+
+def test_rejects_stores_of_another_schema(cash_record):
+    data = ColumnarTransactionStore.from_records(CheckingData, [cash_record()])
+    with pytest.raises(TypeError):
+        BatchValidator(CryptoData).validate(data)
@@ -0,0 +1,180 @@
+import codecs
+import csv
+import re
+from datetime import date, datetime
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Type, Union, get_args, get_origin, get_type_hints
+
+import numpy as np
+
+from backend.constants import DRIVE_CHUNK_SIZE
+from backend.models.instruments import TransactionSchema
+
+# Bank export headers that don't snake_case cleanly onto their TypedDict field names.
+RAW_FIELD_ALIASES = {
+    'transaciton_description': 'transaction_description',
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d')
+
+def field_name(header: str) -> str:
+    """Converts a bank export column header into its TypedDict field name."""
+    name = re.sub(r'[^0-9a-z]+', '_', header.strip().lower()).strip('_')
+    return RAW_FIELD_ALIASES.get(name, name)
+
+def parse_date(value: str) -> Optional[date]:
+    """Parses a single date string in any of the supported bank export formats."""
+    value = value.strip()
+    if not value:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date format: '{value}'")
+
+def _parse_unique(values: np.ndarray, parser: Callable[[str], Any], dtype: Any, missing: Any) -> np.ndarray:
+    """Parses only the distinct strings of a column and gathers the results back out.
+
+    Statement columns such as dates and account numbers repeat heavily, so this turns
+    a per-row Python call into one per distinct value.
+    """
+    uniques, inverse = np.unique(values, return_inverse=True)
+    parsed = [parser(value) for value in uniques]
+    parsed = np.array([missing if value is None else value for value in parsed], dtype=dtype)
+    return parsed[inverse.reshape(-1)] if len(uniques) else np.empty(0, dtype=dtype)
+
+def parse_dates(values: Union[Sequence[str], np.ndarray]) -> np.ndarray:
+    """Parses a column of date strings into a datetime64[D] array (NaT for blanks)."""
+    return _parse_unique(np.asarray(values, dtype=str), parse_date, 'datetime64[D]', np.datetime64('NaT'))
+
+def parse_integers(values: Union[Sequence[str], np.ndarray]) -> np.ndarray:
+    """Parses a column of integer strings, ignoring masking characters (-1 for blanks)."""
+    def parse_integer(value: str) -> Optional[int]:
+        digits = re.sub(r'\D', '', value)
+        return int(digits) if digits else None
+
+    return _parse_unique(np.asarray(values, dtype=str), parse_integer, np.int64, -1)
+
+def parse_amounts(values: Union[Sequence[str], np.ndarray]) -> Dict[str, np.ndarray]:
+    """Parses a column of currency/quantity strings into float64 (NaN for blanks).
+
+    Handles '$', thousands separators, '+' signs and accounting style '(12.00)'
+    negatives. Any trailing unit (e.g. the ticker in Robinhood crypto '0.5 BTC') is
+    returned separately.
+
+    Returns:
+        Dict[str, np.ndarray]: 'value' float64 array and 'unit' object array (None where absent).
+    """
+    text = np.char.strip(np.asarray(values, dtype=str))
+    if not len(text):
+        return {'value': np.empty(0, dtype=np.float64), 'unit': np.empty(0, dtype=object)}
+    parts = np.char.partition(text, ' ')
+    number, unit = parts[:, 0], np.char.strip(parts[:, 2])
+
+    negative = np.char.startswith(number, '(') & np.char.endswith(number, ')')
+    for token in ('$', ',', '+', '(', ')'):
+        number = np.char.replace(number, token, '')
+    blank = np.char.str_len(number) == 0
+
+    parsed = np.where(blank, 'nan', number).astype(np.float64)
+    parsed[negative] *= -1
+
+    units = unit.astype(object)
+    units[np.char.str_len(unit) == 0] = None
+    return {'value': parsed, 'unit': units}
+
+def rows_to_columns(rows: Iterable[Mapping[str, str]], schema: Type[TransactionSchema]) -> Dict[str, np.ndarray]:
+    """Converts parsed CSV rows of a raw bank export into typed column arrays.
+
+    Rows are keyed by the export's column headers, which are matched to the raw
+    schema's fields via field_name. Each column is then coerced in one vectorized
+    pass according to the schema annotation.
+
+    Args:
+        rows: Parsed CSV rows, e.g. from csv.DictReader.
+        schema: Raw instrument schema such as UCCUChecking or USAAChecking.
+
+    Returns:
+        Dict[str, np.ndarray]: One array per schema field. Float fields that carried a
+        trailing unit also get a '<field>_unit' column.
+    """
+    rows = list(rows)
+    headers = [header for header in rows[0] if header is not None] if rows else []
+    raw: Dict[str, Sequence[str]] = {}
+    if headers:
+        # Transpose the rows into columns in C instead of appending cell by cell.
+        getter = itemgetter(*headers)
+        cells = map(getter, rows) if len(headers) > 1 else ((getter(row),) for row in rows)
+        raw = {field_name(header): column for header, column in zip(headers, zip(*cells))}
+
+    length = len(rows)
+    columns: Dict[str, np.ndarray] = {}
+    for name, annotation in get_type_hints(schema).items():
+        values = raw.get(name, [''] * length)
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if get_origin(annotation) is Union and len(args) == 1:
+            annotation = args[0]
+
+        if annotation is date:
+            columns[name] = parse_dates(values)
+        elif annotation is float:
+            amounts = parse_amounts(values)
+            columns[name] = amounts['value']
+            if amounts['unit'].astype(bool).any():
+                columns[f'{name}_unit'] = amounts['unit']
+        elif annotation is int:
+            columns[name] = parse_integers(values)
+        else:
+            text = np.char.strip(np.asarray(values, dtype=str))
+            column = text.astype(object)
+            column[np.char.str_len(text) == 0] = None
+            columns[name] = column
+    return columns
+
+def iter_decoded_lines(chunks: Iterable[bytes], encoding: str = 'utf-8-sig') -> Iterator[str]:
+    """Incrementally decodes byte chunks into text lines as they arrive.
+
+    Multi-byte characters split across chunk boundaries are held back by an
+    incremental decoder, and a partial trailing line is carried over to the next
+    chunk. Lines keep their line endings so csv.reader can still join quoted fields
+    that span several lines.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    remainder = ''
+    for chunk in chunks:
+        lines = (remainder + decoder.decode(chunk)).split('\n')
+        remainder = lines.pop()
+        for line in lines:
+            yield line + '\n'
+
+    remainder += decoder.decode(b'', final=True)
+    if remainder:
+        yield remainder
+
+def iter_file_chunks(path: str, chunksize: int = DRIVE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Reads a file from disk in chunks, for streaming it through the same parsers as a download."""
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunksize):
+            yield chunk
+
+def iter_hashed(chunks: Iterable[bytes], hasher: Any) -> Iterator[bytes]:
+    """Passes byte chunks through while feeding them to a hashlib hash object."""
+    for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+def iter_csv_rows(chunks: Iterable[bytes], encoding: str = 'utf-8-sig') -> Iterator[Dict[str, str]]:
+    """Parses CSV rows incrementally from a stream of byte chunks."""
+    return csv.DictReader(iter_decoded_lines(chunks, encoding), restval='')
+
+def iter_batches(rows: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Groups an iterable into lists of at most batch_size items."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
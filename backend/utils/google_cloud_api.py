@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Optional
+
+import gspread
+import httplib2
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+logger = logging.getLogger('numifocus.external')
+
+class SharedCredentials(Credentials):
+    """OAuth user credentials shared by every thread of the process.
+
+    Expired tokens are refreshed under a lock, so when several threads notice the
+    expiry at once only the first one calls the token endpoint; the others reuse the
+    new token. Refreshed tokens are written back to the token file.
+    """
+
+    _refresh_lock = threading.Lock()
+    token_path: Optional[str] = None
+
+    def refresh(self, request: Request) -> None:
+        with self._refresh_lock:
+            if self.valid:
+                return
+            logger.info("[SharedCredentials] Refreshing expired credentials")
+            super().refresh(request)
+            if self.token_path:
+                with open(self.token_path, 'w') as token:
+                    token.write(self.to_json())
+
+class GoogleClientPool:
+    """Process-wide pool of Google API clients.
+
+    Credentials are loaded (and refreshed) once and shared. httplib2 transports aren't
+    thread-safe, so each thread lazily gets its own AuthorizedHttp, Drive service and
+    gspread client, built from a Drive discovery document that is parsed only once.
+    """
+
+    def __init__(
+        self,
+        scopes: Optional[List[str]] = None,
+        token_path: Optional[str] = None,
+        credentials_path: Optional[str] = None
+    ):
+        self.scopes = scopes if scopes is not None else [s.strip() for s in os.environ.get("SCOPES", "").split(",") if s.strip()]
+        self.token_path = token_path if token_path is not None else os.environ.get("TOKEN")
+        self.credentials_path = credentials_path if credentials_path is not None else os.environ.get("CREDENTIALS")
+        self._lock = threading.Lock()
+        self._credentials: Optional[SharedCredentials] = None
+        self._drive_document: Optional[str] = None
+        self._local = threading.local()
+
+    @property
+    def credentials(self) -> SharedCredentials:
+        """The shared credentials, loaded on first use and refreshed if expired."""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._load_credentials()
+        if not self._credentials.valid:
+            self._credentials.refresh(Request())
+        return self._credentials
+
+    @property
+    def drive_service(self):
+        """This thread's Google Drive v3 service client."""
+        service = getattr(self._local, 'drive_service', None)
+        if service is None:
+            with self._lock:
+                if self._drive_document is None:
+                    self._drive_document = get_static_doc("drive", "v3")
+            service = self._local.drive_service = build_from_document(self._drive_document, http=self.http)
+            logger.debug("[GoogleClientPool] Drive service client created for thread %s", threading.get_ident())
+        return service
+
+    @property
+    def gspread_client(self) -> gspread.Client:
+        """This thread's gspread client for Google Sheets."""
+        client = getattr(self._local, 'gspread_client', None)
+        if client is None:
+            client = self._local.gspread_client = gspread.authorize(self.credentials)
+            logger.debug("[GoogleClientPool] gspread client created for thread %s", threading.get_ident())
+        return client
+
+    @property
+    def http(self) -> AuthorizedHttp:
+        """This thread's authorized HTTP transport."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def _load_credentials(self) -> SharedCredentials:
+        logger.info("[GoogleClientPool] Loading credentials")
+        creds = None
+        if self.token_path and os.path.exists(self.token_path):
+            creds = SharedCredentials.from_authorized_user_file(self.token_path, self.scopes)
+
+        if not creds or not creds.refresh_token:
+            logger.info("[GoogleClientPool] Starting OAuth flow for new credentials")
+            flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, self.scopes)
+            creds = SharedCredentials.from_authorized_user_info(json.loads(flow.run_local_server(port=0).to_json()), self.scopes)
+            with open(self.token_path, "w") as token:
+                token.write(creds.to_json())
+
+        creds.token_path = self.token_path
+        logger.info("[GoogleClientPool] Credentials are ready")
+        return creds
+
+_default_pool: Optional[GoogleClientPool] = None
+_default_pool_lock = threading.Lock()
+
+def get_client_pool() -> GoogleClientPool:
+    """Returns the process-wide GoogleClientPool, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = GoogleClientPool()
+        return _default_pool
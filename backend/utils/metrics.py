@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, TypeVar
+
+logger = logging.getLogger('numifocus.utils')
+
+T = TypeVar('T')
+
+INGESTION_STAGES = ('download', 'parse', 'normalize', 'validate', 'dedupe', 'persist')
+MAX_TRACKED_FILES = 1000  # Per-file timings kept for the metrics endpoint; older files only count in the stage totals.
+
+class _Span:
+    __slots__ = ('stage', 'file_id', 'children')
+
+    def __init__(self, stage: str, file_id: Optional[str]):
+        self.stage = stage
+        self.file_id = file_id
+        self.children = 0.0
+
+class StageMetrics:
+    """Process-wide durations of the ingestion stages, per file ID and in total.
+
+    Spans are exclusive: time spent in a span opened inside another one (such as
+    the download chunks pulled while parsing a streamed file) counts towards the
+    inner stage only, so the stages of a file add up to its wall-clock time.
+    Repeated spans of the same stage and file accumulate. Stages that handle a whole
+    batch of files at once are recorded without a file ID and only appear in the
+    stage totals.
+    """
+
+    def __init__(self, max_files: int = MAX_TRACKED_FILES):
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._files: 'OrderedDict[str, Dict[str, float]]' = OrderedDict()
+        self._stages: Dict[str, List[float]] = {}  # stage -> [count, total seconds, max seconds]
+
+    @contextmanager
+    def span(self, stage: str, file_id: Optional[str] = None) -> Iterator[None]:
+        """Times the enclosed block as one stage of a file."""
+        stack = self._stack()
+        current = _Span(stage, file_id)
+        stack.append(current)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1].children += elapsed
+            self.record(stage, file_id, elapsed - current.children)
+
+    def timed_iter(self, iterable: Iterable[T], stage: str, file_id: Optional[str] = None) -> Iterator[T]:
+        """Yields from an iterable, timing the work of producing each item as the stage."""
+        iterator = iter(iterable)
+        while True:
+            with self.span(stage, file_id):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def record(self, stage: str, file_id: Optional[str], seconds: float) -> None:
+        """Adds a measured duration to a stage's totals and, with a file ID, to that file's timings."""
+        with self._lock:
+            totals = self._stages.setdefault(stage, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            if file_id is not None:
+                timings = self._files.get(file_id)
+                if timings is None:
+                    timings = self._files[file_id] = {}
+                    if len(self._files) > self.max_files:
+                        self._files.popitem(last=False)
+                timings[stage] = timings.get(stage, 0.0) + seconds
+        logger.debug("[StageMetrics] %s of %s took %.4fs", stage, file_id, seconds, extra={'stage': stage, 'file_id': file_id, 'seconds': seconds})
+
+    def merge(self, file_id: str, timings: Mapping[str, float]) -> None:
+        """Records stage timings measured elsewhere, e.g. in a worker process."""
+        for stage, seconds in timings.items():
+            self.record(stage, file_id, seconds)
+
+    def file_timings(self, file_id: str) -> Dict[str, float]:
+        """Returns the accumulated seconds per stage of one file."""
+        with self._lock:
+            return dict(self._files.get(file_id, {}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the stage totals and the per-file timings, for the metrics endpoint."""
+        with self._lock:
+            stages = {
+                stage: {'count': count, 'total_seconds': total, 'mean_seconds': total / count, 'max_seconds': longest}
+                for stage, (count, total, longest) in self._stages.items()
+            }
+            files = {file_id: dict(timings) for file_id, timings in self._files.items()}
+        return {'stages': stages, 'files': files}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._stages.clear()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+_metrics = StageMetrics()
+
+def get_stage_metrics() -> StageMetrics:
+    """Returns the process-wide StageMetrics."""
+    return _metrics
@@ -0,0 +1,68 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from backend.constants import TESSERACT_CONFIG
+
+logger = logging.getLogger('numifocus.utils')
+
+class OCRError(Exception):
+    """Raised when an image or document can't be read."""
+
+def ocr_image(image: np.ndarray, config: str = TESSERACT_CONFIG) -> str:
+    """Runs Tesseract over a preprocessed (grayscale or binary) image."""
+    import pytesseract  # Only OCR workers need it; keeps it out of server startup.
+
+    return pytesseract.image_to_string(image, config=config)
+
+def run_ocr_task(func: Callable[..., Any], *args: Any) -> Any:
+    """Process pool entry point that calls func(*args).
+
+    Some pytesseract exceptions can't be unpickled, which would break the whole pool,
+    so errors are passed back to the parent as OCRError.
+    """
+    try:
+        return func(*args)
+    except Exception as e:
+        raise OCRError(f"{type(e).__name__}: {e}") from None
+
+def _init_ocr_worker() -> None:
+    # Parallelism comes from the process pool; keep Tesseract's OpenMP threads from
+    # oversubscribing the cores.
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """Returns the process-wide OCR process pool, sized to the cores and started on first use.
+
+    Receipts and paystubs share this pool, so concurrent uploads of both never run
+    more OCR processes than there are cores.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = os.cpu_count() or 1
+            # Spawn rather than fork: the server process runs threads (event loop, thread pool)
+            # that a forked child would inherit in an undefined state.
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_ocr_worker
+            )
+            logger.info("[OCR] Started %s OCR workers", max_workers)
+        return _executor
+
+def shutdown_ocr_executor() -> None:
+    """Stops the OCR worker processes, if they were started."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None